@@ -2,7 +2,6 @@ from setuptools import setup, find_packages
 
 dependencies = [
     'psutil>=4.0',
-    'python_arptable>=0.0.1',
 ]
 
 test_deps = [
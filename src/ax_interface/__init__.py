@@ -10,4 +10,5 @@ logger.addHandler(logging.NullHandler())
 from . import exceptions
 from .agent import Agent
 from .constants import ValueType
-from .mib import MIBMeta, MIBUpdater, MIBEntry, SubtreeMIBEntry
+from .mib import MIBMeta, MIBUpdater, MIBEntry, SubtreeMIBEntry, MIBSnapshot, SnapshotBuffer, \
+    PackedMIBIndex, PackedSnapshotBuffer
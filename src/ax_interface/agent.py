@@ -1,6 +1,8 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from .mib import MIBTable, MIBMeta
+from .stats import AgentStats, STATS_BASIC
 from .socket_io import SocketManager
 
 # how long to wait before forcibly killing background task(s) during the shutdown procedure.
@@ -8,7 +10,8 @@ BACKGROUND_WAIT_TIMEOUT = 10  # seconds
 
 
 class Agent:
-    def __init__(self, mib_cls, enable_dynamic_frequency, update_frequency, loop):
+    def __init__(self, mib_cls, enable_dynamic_frequency, update_frequency, loop, update_workers=0, update_processes=False,
+                 stats_level=STATS_BASIC):
         if not type(mib_cls) is MIBMeta:
             raise ValueError("Expected a class with type: {}".format(MIBMeta))
 
@@ -22,6 +25,15 @@ class Agent:
         # Initialize our MIB
         self.mib_table = MIBTable(mib_cls, enable_dynamic_frequency, update_frequency)
 
+        # request instrumentation, see get_stats()
+        self.stats = AgentStats(stats_level)
+        self.mib_table.stats = self.stats
+
+        # number of worker threads running the (thread safe) MIB updaters, 0 runs every updater on the event loop.
+        self.update_workers = update_workers
+        # run the MIB updaters publishing snapshots in their own process.
+        self.update_processes = update_processes
+
         # containers
         self.socket_mgr = SocketManager(self.mib_table, self.run_enabled, self.loop)
 
@@ -31,12 +43,23 @@ class Agent:
         self.oid_updaters_enabled.set()
         self.stopped.clear()
 
+        executor = None
+        if self.update_workers:
+            executor = ThreadPoolExecutor(max_workers=self.update_workers, thread_name_prefix='mib_updater')
+
         # run while
         while self.run_enabled.is_set():
+            connection_task = asyncio.ensure_future(self.socket_mgr.connection_loop())
+            # let the socket manager start connecting to the master agent before constructing the
+            # deferred updaters, the loop is blocked until they are all constructed.
+            await asyncio.sleep(0)
+            self.mib_table.initialize_updaters()
+
             # start the MIB updater(s) and remember the future obj.
-            background_task = self.mib_table.start_background_tasks(self.oid_updaters_enabled)
+            background_task = self.mib_table.start_background_tasks(self.oid_updaters_enabled, executor,
+                                                                     self.update_processes)
             # wait for the socket manager to close
-            await self.socket_mgr.connection_loop()
+            await connection_task
 
             #
             # Main thread will block here until the connection closes.
@@ -48,9 +71,26 @@ class Agent:
             # wait for handlers to come back
             await asyncio.wait_for(background_task, BACKGROUND_WAIT_TIMEOUT)
 
+        if executor is not None:
+            # don't block the loop on a cycle still in flight, its result is no longer used.
+            executor.shutdown(wait=False)
+
+        # the updaters won't run again, release what they hold
+        self.mib_table.shutdown_updaters()
+
         # signal that we're done!
         self.stopped.set()
 
+    def get_stats(self):
+        """
+        :return: latency summaries (microseconds) per PDU type and, at STATS_DETAILED, per registered prefix.
+                 See AgentStats.summary().
+        """
+        return self.stats.summary()
+
+    def reset_stats(self):
+        self.stats.reset()
+
     async def shutdown(self):
         # allow the agent to quit
         self.run_enabled.clear()
@@ -11,6 +11,10 @@ AGENTX_HEADER_LENGTH = 20
 # The smallest possible PDU is header only.
 AGENTX_MINIMUM_PDU_SIZE = AGENTX_HEADER_LENGTH
 
+# Sanity bound on h.payload_length for received PDUs. A larger value means the byte stream is corrupt and
+# PDU boundaries can no longer be trusted.
+AGENTX_MAX_PAYLOAD_LENGTH = 1 << 20
+
 # from http://net-snmp.sourceforge.net/dev/agent/snmp__api_8h_source.html
 # 00122 #define SNMP_MAX_MSG_SIZE          1472 /* ethernet MTU minus IP/UDP header */
 SNMP_MAX_MSG_SIZE = 1472
@@ -4,10 +4,20 @@
 
 import struct
 from collections import namedtuple
+from functools import lru_cache
 
 from . import constants, util
 
 
+@lru_cache(maxsize=512)
+def compiled_struct(fmt):
+    """
+    Returns a precompiled (and cached) struct.Struct for the given format string.
+    Raises struct.error on bad format strings, just like struct.pack/unpack.
+    """
+    return struct.Struct(fmt)
+
+
 class ObjectIdentifier(
     namedtuple('_ObjectIdentifier', ('n_subid', 'prefix_', 'include', 'reserved', 'subids'))
 ):
@@ -50,7 +60,18 @@ class ObjectIdentifier(
 
     def to_bytes(self, endianness):
         format_string = endianness + 'BBBB' + str(len(self.subids)) + 'L'
-        return struct.pack(format_string, self.n_subid, self.prefix_, self.include, self.reserved, *self.subids)
+        return compiled_struct(format_string).pack(self.n_subid, self.prefix_, self.include, self.reserved,
+                                                   *self.subids)
+
+    def pack_into(self, buffer, offset, endianness):
+        """
+        Packs the OID into a preallocated `buffer` at `offset`.
+        :return: the offset following the end of the OID
+        """
+        format_string = endianness + 'BBBB' + str(len(self.subids)) + 'L'
+        compiled_struct(format_string).pack_into(buffer, offset, self.n_subid, self.prefix_, self.include,
+                                                 self.reserved, *self.subids)
+        return offset + 4 + 4 * len(self.subids)
 
     def inc(self):
         """
@@ -86,15 +107,25 @@ class ObjectIdentifier(
 
         :param byte_string: string to unpack
         :param endianness: '!' or '<' (big/little endian)
-        :return: n-oids, does not modify the original buffer and the index following the end of the OID
+        :return: n-oids, does not modify the original buffer.
+        """
+        return cls.unpack_from(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, endianness):
+        """
+        :param buffer: bytes, bytearray or memoryview to unpack from (never copied)
+        :param offset: index of the first byte of the OID
+        :param endianness: '!' or '<' (big/little endian)
+        :return: n-oids and the index following the end of the OID
         """
-        oid_attributes = (n_subid, prefix, _, reserved) = struct.unpack(endianness + 'BBBB', byte_string[:4])
-        start_offset = 4
-        end_offset = start_offset + n_subid * 4
-        subids = struct.unpack(endianness + n_subid * 'L', byte_string[start_offset:end_offset])
+        oid_attributes = (n_subid, prefix, _, reserved) = \
+            compiled_struct(endianness + 'BBBB').unpack_from(buffer, offset)
+        offset += 4
+        subids = compiled_struct(endianness + str(n_subid) + 'L').unpack_from(buffer, offset)
 
         # oid = (n_subid, prefix, _, reserved, (subid1, subid2, ...))
-        return cls(*oid_attributes, subids)
+        return cls(*oid_attributes, subids), offset + 4 * n_subid
 
 
 class SearchRange(namedtuple('_SearchRange', ('start', 'end'))):
@@ -122,14 +153,22 @@ class SearchRange(namedtuple('_SearchRange', ('start', 'end'))):
     def to_bytes(self, endianness):
         return self.start.to_bytes(endianness) + self.end.to_bytes(endianness)
 
+    def pack_into(self, buffer, offset, endianness):
+        offset = self.start.pack_into(buffer, offset, endianness)
+        return self.end.pack_into(buffer, offset, endianness)
+
     @classmethod
     def from_bytes(cls, byte_string, endianness):
+        return cls.unpack_from(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, endianness):
         # unpack the first OID
-        start = ObjectIdentifier.from_bytes(byte_string, endianness)
+        start, offset = ObjectIdentifier.unpack_from(buffer, offset, endianness)
         # unpack the second OID (resume at the end of the first)
-        end = ObjectIdentifier.from_bytes(byte_string[start.size:], endianness)
+        end, offset = ObjectIdentifier.unpack_from(buffer, offset, endianness)
         # compose our SearchRange tuple
-        return cls(start, end)
+        return cls(start, end), offset
 
 
 class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
@@ -157,6 +196,16 @@ class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
         fmt = endianness + 'L{}s{}s'.format(self.length, util.pad4(self.length))
         return struct.pack(fmt, self.length, self.string, self.padding)
 
+    def pack_into(self, buffer, offset, endianness):
+        """
+        Packs the octet string into a preallocated `buffer` at `offset`.
+        :return: the offset following the end of the (padded) octet string
+        """
+        padding_length = util.pad4(self.length)
+        fmt = endianness + 'L{}s{}s'.format(self.length, padding_length)
+        struct.pack_into(fmt, buffer, offset, self.length, self.string, self.padding)
+        return offset + 4 + self.length + padding_length
+
     @classmethod
     def from_bytes(cls, byte_string, endianness):
         """
@@ -171,21 +220,26 @@ class OctetString(namedtuple('_OctetString', ('length', 'string', 'padding'))):
 
         :param byte_string: string to unpack.
         :param endianness: '!' or '<' (big/little endian)
+        :return: octet string tuple. does not modify the original buffer.
+        """
+        return cls.unpack_from(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, endianness):
+        """
+        :param buffer: bytes, bytearray or memoryview to unpack from
+        :param offset: index of the first byte of the octet string (length field)
+        :param endianness: '!' or '<' (big/little endian)
         :return: octet string tuple, new offset. does not modify the original buffer.
         """
-        # read the length string
-        string_length_bytes = byte_string[:4]
         # look ahead to the length value
-        string_length = struct.unpack(endianness + 'L', string_length_bytes)[0]
+        string_length = compiled_struct(endianness + 'L').unpack_from(buffer, offset)[0]
         # strings are padded to 4 bytes.
         padding_length = util.pad4(string_length)
 
-        # E.g. !L101s3s -> (length[long], string, padding[string])
-        fmt = '{}L{}s{}s'.format(endianness, string_length, padding_length)
-        # calculate offset
-        size = struct.calcsize(fmt)
-        # format the context string
-        return cls(*struct.unpack(fmt, byte_string[:size]))
+        # E.g. 101s3s -> (string, padding[string]). Lengths vary too much to precompile.
+        string, padding = struct.unpack_from('{}s{}s'.format(string_length, padding_length), buffer, offset + 4)
+        return cls(string_length, string, padding), offset + 4 + string_length + padding_length
 
 
 class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved', 'name', 'data'))):
@@ -199,44 +253,47 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
     """
     __slots__ = ()
 
-    FOUR_BYTE_TYPES = [
+    FOUR_BYTE_TYPES = frozenset([
         constants.ValueType.INTEGER,
         constants.ValueType.COUNTER_32,
         constants.ValueType.GAUGE_32,
         constants.ValueType.TIME_TICKS,
         # Four total
-    ]
+    ])
 
-    OCTET_STRINGS = [
+    OCTET_STRINGS = frozenset([
         constants.ValueType.IP_ADDRESS,
         constants.ValueType.OPAQUE,
         constants.ValueType.OCTET_STRING,
         # Three total
-    ]
+    ])
 
-    EMPTY_TYPES = [
+    EMPTY_TYPES = frozenset([
         constants.ValueType.NULL,
         constants.ValueType.NO_SUCH_OBJECT,
         constants.ValueType.NO_SUCH_INSTANCE,
         constants.ValueType.END_OF_MIB_VIEW,
         # Four total
-    ]
+    ])
 
     # 2 + 4 + 3 + 4 = 13. All types accounted for.
 
     @property
     def size(self):
         size = 4 + self.name.size
-        typed_bind = constants.ValueType(self.type_)
-        if typed_bind in self.FOUR_BYTE_TYPES:
+        # ValueType is an int enum, the type sets match plain integers as well.
+        type_ = self.type_
+        if type_ in self.FOUR_BYTE_TYPES:
             size += 4
-        elif typed_bind == constants.ValueType.COUNTER_64:
+        elif type_ == constants.ValueType.COUNTER_64:
             size += 8
-        elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER or typed_bind in self.OCTET_STRINGS:
+        elif type_ == constants.ValueType.OBJECT_IDENTIFIER or type_ in self.OCTET_STRINGS:
             size += self.data.size
-        elif typed_bind in self.EMPTY_TYPES:
+        elif type_ in self.EMPTY_TYPES:
             # _size += 0
             pass
+        else:
+            raise ValueError("Unknown bound type.")
         return size
 
     @classmethod
@@ -255,7 +312,7 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         return cls(type_, 0, oid, _data)
 
     @classmethod
-    def _unpack_data(cls, type_, byte_string, endianness):
+    def _unpack_data_from(cls, type_, buffer, offset, endianness):
         """
         -  Integer, Counter32, Gauge32, and TimeTicks are encoded as 4
         contiguous bytes, according to the header's
@@ -283,45 +340,59 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         in these cases.
 
         :param type_: type integer
-        :param byte_string:  byte stream
+        :param buffer: byte stream
+        :param offset: index of the first data byte
+        :return: data, offset following the data
         """
         typed_bind = constants.ValueType(type_)
         if typed_bind in cls.FOUR_BYTE_TYPES:
-            data = struct.unpack(endianness + 'L', byte_string[:4])[0]
-            size = 4
+            data = compiled_struct(endianness + 'L').unpack_from(buffer, offset)[0]
+            offset += 4
         elif typed_bind == constants.ValueType.COUNTER_64:
-            data = struct.unpack(endianness + 'Q', byte_string[:8])[0]
-            size = 8
+            data = compiled_struct(endianness + 'Q').unpack_from(buffer, offset)[0]
+            offset += 8
         elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER:
-            data = ObjectIdentifier.from_bytes(byte_string, endianness)
-            size = data.size
+            data, offset = ObjectIdentifier.unpack_from(buffer, offset, endianness)
         elif typed_bind in cls.OCTET_STRINGS:
-            data = OctetString.from_bytes(byte_string, endianness)
-            size = data.size
+            data, offset = OctetString.unpack_from(buffer, offset, endianness)
         elif typed_bind in cls.EMPTY_TYPES:
             data = None
-            size = 0
         else:
             raise ValueError("Unknown bound type.")
 
-        return data, size
+        return data, offset
 
     def to_bytes(self, endianness):
-        fmt = endianness + 'HH'
-        byte_string = struct.pack(fmt, self.type_, self.reserved)
-        byte_string += self.name.to_bytes(endianness)
+        buffer = bytearray(self.size)
+        self.pack_into(buffer, 0, endianness)
+        return bytes(buffer)
 
-        typed_bind = constants.ValueType(self.type_)
-        if typed_bind in self.FOUR_BYTE_TYPES:
-            byte_string += struct.pack(endianness + 'L', self.data & 0x00000000ffffffff)
-        elif typed_bind == constants.ValueType.COUNTER_64:
-            byte_string += struct.pack(endianness + 'Q', self.data & 0xffffffffffffffff)
-        elif typed_bind == constants.ValueType.OBJECT_IDENTIFIER or typed_bind in self.OCTET_STRINGS:
-            byte_string += self.data.to_bytes(endianness)
-        elif typed_bind in self.EMPTY_TYPES:
-            # ret += b''
+    def pack_into(self, buffer, offset, endianness):
+        """
+        Packs the VarBind into a preallocated `buffer` at `offset` (see `size`).
+        :return: the offset following the end of the VarBind
+        """
+        # v.type, <reserved> and v.name in one go
+        name = self.name
+        n_subid = len(name.subids)
+        compiled_struct(endianness + 'HHBBBB' + str(n_subid) + 'L').pack_into(
+            buffer, offset, self.type_, self.reserved, name.n_subid, name.prefix_, name.include, name.reserved,
+            *name.subids)
+        offset += 8 + 4 * n_subid
+
+        type_ = self.type_
+        if type_ in self.FOUR_BYTE_TYPES:
+            compiled_struct(endianness + 'L').pack_into(buffer, offset, self.data & 0x00000000ffffffff)
+            offset += 4
+        elif type_ == constants.ValueType.COUNTER_64:
+            compiled_struct(endianness + 'Q').pack_into(buffer, offset, self.data & 0xffffffffffffffff)
+            offset += 8
+        elif type_ == constants.ValueType.OBJECT_IDENTIFIER or type_ in self.OCTET_STRINGS:
+            offset = self.data.pack_into(buffer, offset, endianness)
+        elif type_ in self.EMPTY_TYPES:
+            # offset += 0
             pass
-        return byte_string
+        return offset
 
     @classmethod
     def from_bytes(cls, byte_string, endianness):
@@ -354,9 +425,18 @@ class ValueRepresentation(namedtuple('_ValueRepresentation', ('type_', 'reserved
         :param endianness: big/little endian format specifier.
         :return: an instance of ValueRepresentation.
         """
-        type_, reserved = struct.unpack(endianness + 'HH', byte_string[:4])
-        name = ObjectIdentifier.from_bytes(byte_string[4:], endianness)
-        offset = 4 + name.size
-        data, offset = cls._unpack_data(type_, byte_string[offset:], endianness)
+        return cls.unpack_from(byte_string, 0, endianness)[0]
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, endianness):
+        """
+        :param buffer: bytes, bytearray or memoryview from which to unpack the VR
+        :param offset: index of the first byte of the VarBind
+        :param endianness: big/little endian format specifier.
+        :return: an instance of ValueRepresentation, offset following the VarBind.
+        """
+        type_, reserved = compiled_struct(endianness + 'HH').unpack_from(buffer, offset)
+        name, offset = ObjectIdentifier.unpack_from(buffer, offset + 4, endianness)
+        data, offset = cls._unpack_data_from(type_, buffer, offset, endianness)
         vr = cls(constants.ValueType(type_), reserved, name, data)
-        return vr
+        return vr, offset
@@ -1,11 +1,21 @@
+import array
 import asyncio
 import bisect
+import contextlib
+import functools
+import multiprocessing
+from collections import OrderedDict
+import pickle
 import random
+import struct
+import sys
+import time
 from datetime import datetime
 
 from . import logger, util
-from .constants import ValueType
-from .encodings import ValueRepresentation
+from .constants import ValueType, AGENTX_HEADER_LENGTH, SNMP_MAX_MSG_SIZE
+from .encodings import ValueRepresentation, SearchRange
+from .stats import AgentStats, UpdaterTelemetry, STATS_DISABLED
 from .util import get_next_update_interval
 
 """
@@ -23,11 +33,92 @@ Disable dynamic frequency by default
 """
 DEFAULT_ENABLE_DYNAMIC_FREQUENCY = False
 
+"""
+How long the agent waits for a snapshot from an updater process before re-checking its state (in seconds).
+"""
+SNAPSHOT_POLL_INTERVAL = 1
+
+"""
+How long to wait for an updater process to exit before killing it (in seconds).
+"""
+UPDATER_PROCESS_JOIN_TIMEOUT = 5
+
+"""
+Number of successors fetched at once when a GetNext walk hits a cursor, 0 disables the walk cursors.
+"""
+DEFAULT_WALK_READAHEAD = 16
+
+"""
+Maximum number of walk cursors remembered per AgentX session (i.e. concurrent walks).
+"""
+WALK_CURSOR_CACHE_SIZE = 64
+
+
+# set by deferred_updater_init()
+_defer_updater_init = False
+
+
+@contextlib.contextmanager
+def deferred_updater_init():
+    """
+    The MIBUpdater (subclasses) constructed in this context, typically at MIB class definition while importing the
+    MIB modules, only record their constructor arguments. Their constructor (DB connections...) runs from
+    MIBUpdater.initialize(), when the agent starts.
+    """
+    global _defer_updater_init
+    previous, _defer_updater_init = _defer_updater_init, True
+    try:
+        yield
+    finally:
+        _defer_updater_init = previous
+
+
+def _wrap_deferrable_init(init):
+    @functools.wraps(init)
+    def __init__(self, *args, **kwargs):
+        # only the outermost constructor of a deferred updater is skipped, the super() chain runs from initialize()
+        if _defer_updater_init and self.deferrable_init and MIBUpdater.DEFERRED_INIT not in self.__dict__:
+            MIBUpdater.__init__(self)
+            self.__dict__[MIBUpdater.DEFERRED_INIT] = (args, kwargs)
+            return
+        init(self, *args, **kwargs)
+    return __init__
+
 
 class MIBUpdater:
     """
     Interface for developing OID handlers that require persistent (or background) execution.
     """
+    DEFERRED_INIT = '__deferred_init__'
+
+    """
+    Set by subclasses whose update cycle may run on a worker thread (see MIBTable.start_background_tasks):
+      - the OID handlers only read data published by reinit_data()/update_data(), never Redis,
+      - reinit_data()/update_data() build new containers and publish them by rebinding the attribute(s),
+        see SnapshotBuffer.
+    The connectors of an updater are only used by its own update cycle, one cycle at a time.
+    """
+    thread_safe_update = False
+
+    """
+    Set by subclasses whose update cycle may block for long, e.g. reading a whole table with SCAN on resync.
+    With `thread_safe_update`, their update cycles run in the default executor of the event loop when no
+    update executor is configured, instead of blocking the agent.
+    """
+    offload_update = False
+
+    """
+    Names of the attributes holding everything the OID handlers read. Declaring them (on top of the
+    `thread_safe_update` requirements) lets the update cycles run in a separate process, see run_in_process:
+    the attributes are pickled after every cycle and shipped to the agent process.
+    """
+    snapshot_attributes = ()
+
+    """
+    Cleared by subclasses whose instances must be complete at MIB class definition, e.g. because MIB entries
+    reference their attributes there. Their constructor always runs immediately, see deferred_updater_init().
+    """
+    deferrable_init = True
 
     def __init__(self):
         self.run_event = asyncio.Event()
@@ -35,67 +126,199 @@ class MIBUpdater:
         self.enable_dynamic_frequency = DEFAULT_ENABLE_DYNAMIC_FREQUENCY
         self.reinit_rate = DEFAULT_REINIT_RATE // DEFAULT_UPDATE_FREQUENCY
         self.update_counter = self.reinit_rate + 1  # reinit_data when init
+        # concurrent.futures.Executor running the update cycles, None runs them on the event loop.
+        self.executor = None
+        # run the update cycles in a forked process, the agent process only applies the snapshots.
+        self.run_in_process = False
+        # the MIBTable running this updater, set by MIBTable.start_background_tasks
+        self.mib_table = None
+        self.telemetry = UpdaterTelemetry()
+        # name -> data read ahead by prefetch_data(), see take_prefetched()
+        self.prefetched = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__init__' in vars(cls):
+            cls.__init__ = _wrap_deferrable_init(vars(cls)['__init__'])
+
+    def initialize(self):
+        """
+        Runs the constructor deferred by deferred_updater_init(), no-op for an updater constructed normally.
+
+        :return: True if the constructor ran.
+        """
+        deferred = self.__dict__.get(MIBUpdater.DEFERRED_INIT)
+        if deferred is None:
+            return False
+        args, kwargs = deferred
+        type(self).__init__(self, *args, **kwargs)
+        del self.__dict__[MIBUpdater.DEFERRED_INIT]
+        return True
 
     async def start(self):
         # Run the update while we are allowed
         redis_exception_happen = False
+        loop = asyncio.get_event_loop()
+        if self.run_in_process:
+            await self._start_process(loop)
+            # the update process exited on its own, keep updating from the agent process.
+            # its connections were left in an unknown state, reconnect on the first cycle.
+            redis_exception_happen = True
         while self.run_event.is_set():
             start = datetime.now()
-            try:
-                # reinit internal structures
-                if self.update_counter > self.reinit_rate:
-                    # reconnect when redis exception happen
-                    if redis_exception_happen:
-                        self.reinit_connection()
-
-                    self.reinit_data()
-                    self.update_counter = 0
-                else:
-                    self.update_counter += 1
-
-                # run the background update task
-                self.update_data()
-                redis_exception_happen = False
-            except RuntimeError:
-                # Any unexpected exception or error, log it and keep running
-                logger.exception("MIBUpdater.start() caught a RuntimeError during update_data(), will reinitialize the connections")
-                # When redis server restart, swsscommon will throw swsscommon.RedisError, redis connection need re-initialize in reinit_data()
-                # TODO: change to swsscommon.RedisError
-                redis_exception_happen = True
-            except Exception:
-                # Any unexpected exception or error, log it and keep running
-                logger.exception("MIBUpdater.start() caught an unexpected exception during update_data()")
-
-            if self.enable_dynamic_frequency:
-                """
-                On SONiC device with huge interfaces
-                  for example RP card on ethernet chassis, including backend ports, 600+ interfaces
-                The update_data function could be very slow, especially when 100% CPU utilization.
-                  for example ciscoSwitchQosMIB.QueueStatUpdater, uses 1-3 seconds on normal state.
-                                                                  uses 3-8 seconds on 100% CPU utilization state.
-                We use Asyncio/Coroutine as the basic framework,
-                  the mib updaters share the same asyncio event loop with the SNMP agent client.
-                  Hence during the updaters executing, the agent client can't receive/respond to new requests,
-
-                The high frequency and the long execution time
-                  causes the SNMP request to be timed out on High CPU utilization.
-                The stable frequency(generally with default value 5s)
-                  doesn't works well on this huge interfaces situation.
-                when the execution time is long,
-                  wait for longer time to give back the control of asyncio event loop to SNMP agent
-                """
-                execution_time = (datetime.now() - start).total_seconds()
-                next_frequency = get_next_update_interval(execution_time, self.frequency)
-
-                if next_frequency > self.frequency:
-                    logger.debug(f"MIBUpdater type[{type(self)}] slow update detected, "
-                                 f"update execution time[{execution_time}], next_frequency[{next_frequency}]")
+            if self.executor is not None or (self.offload_update and self.thread_safe_update):
+                # the update cycle blocks a worker thread instead of the event loop,
+                # the request path keeps answering from the previously published data.
+                redis_exception_happen = await loop.run_in_executor(self.executor, self._update_cycle,
+                                                                    redis_exception_happen)
             else:
-                next_frequency = self.frequency
+                redis_exception_happen = await self._prefetch(redis_exception_happen)
+                redis_exception_happen = self._update_cycle(redis_exception_happen)
 
             # wait based on our update frequency before executing again.
-            # randomize to avoid concurrent update storms.
-            await asyncio.sleep(next_frequency + random.randint(-2, 2))
+            await asyncio.sleep(self._next_update_interval(start))
+
+    def _next_update_interval(self, start):
+        """
+        :param start: datetime at which the last update cycle started.
+        :return: seconds to wait before the next update cycle.
+        """
+        if self.enable_dynamic_frequency:
+            """
+            On SONiC device with huge interfaces
+              for example RP card on ethernet chassis, including backend ports, 600+ interfaces
+            The update_data function could be very slow, especially when 100% CPU utilization.
+              for example ciscoSwitchQosMIB.QueueStatUpdater, uses 1-3 seconds on normal state.
+                                                              uses 3-8 seconds on 100% CPU utilization state.
+            We use Asyncio/Coroutine as the basic framework,
+              the mib updaters share the same asyncio event loop with the SNMP agent client.
+              Hence during the updaters executing, the agent client can't receive/respond to new requests,
+
+            The high frequency and the long execution time
+              causes the SNMP request to be timed out on High CPU utilization.
+            The stable frequency(generally with default value 5s)
+              doesn't works well on this huge interfaces situation.
+            when the execution time is long,
+              wait for longer time to give back the control of asyncio event loop to SNMP agent
+            """
+            execution_time = (datetime.now() - start).total_seconds()
+            next_frequency = get_next_update_interval(execution_time, self.frequency)
+
+            if next_frequency > self.frequency:
+                logger.debug(f"MIBUpdater type[{type(self)}] slow update detected, "
+                             f"update execution time[{execution_time}], next_frequency[{next_frequency}]")
+        else:
+            next_frequency = self.frequency
+
+        self.telemetry.next_interval = next_frequency
+        # randomize to avoid concurrent update storms.
+        return next_frequency + random.randint(-2, 2)
+
+    async def _start_process(self, loop):
+        """
+        Runs the update cycles in a forked process and applies the snapshots it sends back until
+        the run event is cleared or the process dies.
+        """
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        stop_event = context.Event()
+        process = context.Process(target=_run_updater_process, args=(self, sender, stop_event),
+                                  name='{}-updater'.format(type(self).__name__), daemon=True)
+        process.start()
+        # only the child writes to the pipe, an EOF is then seen as soon as it is gone.
+        sender.close()
+        logger.info("MIBUpdater type[{}] running in process [{}]".format(type(self), process.pid))
+
+        try:
+            while self.run_event.is_set():
+                blob = await loop.run_in_executor(None, _receive_snapshot, receiver, SNAPSHOT_POLL_INTERVAL)
+                if blob is not None:
+                    snapshot, self.telemetry = pickle.loads(blob)
+                    self.apply_snapshot(snapshot)
+                elif not process.is_alive():
+                    logger.error("MIBUpdater type[{}] process exited with code [{}]".format(type(self), process.exitcode))
+                    break
+        finally:
+            stop_event.set()
+            receiver.close()
+            await loop.run_in_executor(None, process.join, UPDATER_PROCESS_JOIN_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+
+    def get_snapshot(self):
+        """
+        :return: the published data, a dict of the `snapshot_attributes`.
+        """
+        return {name: getattr(self, name) for name in self.snapshot_attributes}
+
+    def apply_snapshot(self, snapshot):
+        """
+        Publishes data produced by get_snapshot() (in the update process) by rebinding the attributes.
+        """
+        for name, value in snapshot.items():
+            setattr(self, name, value)
+
+    async def _prefetch(self, redis_exception_happen):
+        """
+        Awaits prefetch_data() ahead of an update cycle running on the event loop.
+
+        :param redis_exception_happen: True if the previous cycle failed with a redis error.
+        :return: redis_exception_happen for the update cycle.
+        """
+        self.prefetched.clear()
+        if redis_exception_happen:
+            # the update cycle reinitializes the connections first and reads everything itself
+            return True
+        try:
+            await self.prefetch_data(self.update_counter > self.reinit_rate)
+            return False
+        except RuntimeError:
+            logger.exception("MIBUpdater.start() caught a RuntimeError during prefetch_data(), will reinitialize the connections")
+            self.prefetched.clear()
+            return True
+        except Exception:
+            # the update cycle reads what is missing itself
+            logger.exception("MIBUpdater.start() caught an unexpected exception during prefetch_data()")
+            self.prefetched.clear()
+            return False
+
+    def _update_cycle(self, redis_exception_happen):
+        """
+        Runs a single reinit/update cycle.
+
+        :param redis_exception_happen: True if the previous cycle failed with a redis error.
+        :return: True if this cycle failed with a redis error (the connections are reinitialized next reinit).
+        """
+        start = time.perf_counter()
+        try:
+            # reinit internal structures
+            if self.update_counter > self.reinit_rate:
+                # reconnect when redis exception happen
+                if redis_exception_happen:
+                    self.reinit_connection()
+
+                self.reinit_data()
+                self.update_counter = 0
+                self.telemetry.reinit_count += 1
+            else:
+                self.update_counter += 1
+
+            # run the background update task
+            self.update_data()
+            self.telemetry.record_cycle(time.perf_counter() - start, True)
+            return False
+        except RuntimeError:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("MIBUpdater.start() caught a RuntimeError during update_data(), will reinitialize the connections")
+            # When redis server restart, swsscommon will throw swsscommon.RedisError, redis connection need re-initialize in reinit_data()
+            # TODO: change to swsscommon.RedisError
+            self.telemetry.record_cycle(time.perf_counter() - start, False)
+            return True
+        except Exception:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("MIBUpdater.start() caught an unexpected exception during update_data()")
+            self.telemetry.record_cycle(time.perf_counter() - start, False)
+            return redis_exception_happen
 
     def reinit_data(self):
         """
@@ -109,6 +332,33 @@ class MIBUpdater:
         """
         return
 
+    async def prefetch_data(self, reinit):
+        """
+        Awaited on the event loop before each update cycle running there (no executor, no process), so the
+        agent keeps answering requests while it waits on I/O, e.g. between the batches of a SCAN. Stores what it
+        read in self.prefetched for the cycle, which gets it with take_prefetched(). Children may override this method.
+
+        :param reinit: True if the cycle runs reinit_data() before update_data().
+        """
+        return
+
+    def take_prefetched(self, name, read):
+        """
+        :param name: the name prefetch_data() stored the data under.
+        :param read: reads the data when it was not prefetched (cycle not on the event loop, prefetch failed).
+        :return: the prefetched data (only once), else read().
+        """
+        if name in self.prefetched:
+            return self.prefetched.pop(name)
+        return read()
+
+    def shutdown(self):
+        """
+        Releases what the updater holds (e.g. shared connections) once the agent stopped for good.
+        Children may override this method.
+        """
+        return
+
     def update_data(self):
         """
         Background task. Children must override this method.
@@ -116,6 +366,482 @@ class MIBUpdater:
         raise NotImplementedError()
 
 
+class MIBSnapshot:
+    """
+    Immutable table of sub-identifier -> value rows published by an updater, with its sub-identifiers sorted
+    once so that walks are a bisect away. The generation tells apart successive snapshots of the same table.
+    """
+    __slots__ = ('rows', 'keys', 'generation')
+
+    def __init__(self, rows=None, generation=0, keys=None):
+        self.rows = rows if rows is not None else {}
+        # keys: the sub-identifiers of rows, when the updater already keeps them sorted
+        self.keys = tuple(sorted(self.rows)) if keys is None else tuple(keys)
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, sub_id):
+        return sub_id in self.rows
+
+    def get(self, sub_id, default=None):
+        return self.rows.get(sub_id, default)
+
+    def get_next(self, sub_id):
+        """
+        :return: the first sub-identifier after `sub_id`, None at the end of the table.
+        """
+        right = bisect.bisect_right(self.keys, sub_id)
+        if right >= len(self.keys):
+            return None
+        return self.keys[right]
+
+    def get_next_many(self, sub_id, count):
+        """
+        :return: up to `count` sub-identifiers following `sub_id`, in order.
+        """
+        right = bisect.bisect_right(self.keys, sub_id)
+        return self.keys[right:right + count]
+
+
+class SnapshotBuffer:
+    """
+    Double buffered MIBSnapshot. An update cycle fills the rows returned by back_buffer(), publish() then swaps
+    them in as the next snapshot in a single reference assignment: a request sees the previous table or the next
+    one, never a half-built one.
+
+    The rows of a retired snapshot are recycled as the back buffer of the cycle after, so a snapshot must not be
+    held beyond the request (or update cycle) that read it. Remember its generation instead.
+
+    A SnapshotBuffer can be the iterator of a SubtreeMIBEntry: it walks (and versions) the current snapshot.
+    """
+
+    def __init__(self):
+        self.snapshot = MIBSnapshot()
+        self._spare_rows = None
+
+    def back_buffer(self):
+        """
+        :return: an empty dict to fill with the rows of the next snapshot.
+        """
+        rows = self._spare_rows if self._spare_rows is not None else {}
+        self._spare_rows = None
+        rows.clear()
+        return rows
+
+    def publish(self, rows, keys=None):
+        """
+        Swaps in the rows built from back_buffer() as the current snapshot.
+
+        :param keys: the sorted sub-identifiers of rows, saves sorting them again if the updater keeps them in order.
+        """
+        retired = self.snapshot
+        self.snapshot = MIBSnapshot(rows, retired.generation + 1, keys)
+        self._spare_rows = retired.rows
+
+    @property
+    def generation(self):
+        return self.snapshot.generation
+
+    def get_next(self, sub_id):
+        return self.snapshot.get_next(sub_id)
+
+    def get_next_many(self, sub_id, count):
+        return self.snapshot.get_next_many(sub_id, count)
+
+    def __getstate__(self):
+        # only the published snapshot leaves an updater process.
+        return {'snapshot': self.snapshot}
+
+    def __setstate__(self, state):
+        self.snapshot = state['snapshot']
+        self._spare_rows = None
+
+
+# struct codes of the big-endian unsigned sub-identifier components of a PackedMIBIndex, by byte width
+PACKED_KEY_CODES = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+# the packed keys of a PackedMIBIndex are stored in columns of 64-bit words
+PACKED_WORD_SIZE = 8
+
+
+class PackedMIBIndex:
+    """
+    Sorted sub-identifier -> unsigned int table, for the large tables (FDB, ARP, routes) whose sub-identifiers all
+    have the same layout. Each component is packed big-endian on its fixed width (`key_widths`, in bytes) so that the
+    byte order of the packed keys is the order of the sub-identifiers. A packed key is stored as an unsigned int split
+    in 64-bit words, one array per word (a single array up to 8 bytes keys), and the values in one more array: a row
+    costs a few bytes instead of a tuple, its ints and a dict slot, and lookups bisect the arrays without leaving C.
+
+    set() / remove() collect the edits in `pending`, merge() applies them in one pass over the rows (at publish time),
+    instead of moving the tail of the arrays on every edit. The arrays are never edited in place: a copy() shares them.
+
+    Has the MIBSnapshot read interface.
+    """
+    __slots__ = ('key_widths', 'key_struct', 'key_size', 'row_struct', 'word_struct', 'columns', 'values', 'pending',
+                 'row_count', 'value_check', 'generation')
+
+    def __init__(self, key_widths, value_typecode='I', generation=0):
+        self.key_widths = tuple(key_widths)
+        codes = ''.join(PACKED_KEY_CODES[width] for width in self.key_widths)
+        self.key_struct = struct.Struct('>' + codes)
+        self.key_size = self.key_struct.size
+        word_count = max(1, -(-self.key_size // PACKED_WORD_SIZE))
+        # the packed key padded to whole words, and its words
+        self.row_struct = struct.Struct('>{}{}x'.format(codes, word_count * PACKED_WORD_SIZE - self.key_size))
+        self.word_struct = struct.Struct('>{}Q'.format(word_count))
+        self.columns = tuple(array.array('Q') for _ in range(word_count))
+        self.values = array.array(value_typecode)
+        # packed key -> value of the rows set, None for the rows removed, since the last merge()
+        self.pending = {}
+        self.row_count = 0
+        # raises like the values array would on a value it can't hold, at set() time
+        self.value_check = array.array(value_typecode, [0])
+        self.generation = generation
+
+    def _key(self, packed):
+        # padded with zeros
+        return int.from_bytes(packed.ljust(self.row_struct.size, b'\0'), 'big')
+
+    def _pack(self, sub_id):
+        """
+        :return: the packed key of sub_id, None if it doesn't have the layout of the index.
+        """
+        if len(sub_id) != len(self.key_widths):
+            return None
+        try:
+            return int.from_bytes(self.row_struct.pack(*sub_id), 'big')
+        except struct.error:
+            return None
+
+    def _pack_bound(self, sub_id):
+        """
+        :return: (packed key, whether it is a whole key) ordered like sub_id among the packed keys, for any sub_id
+                 (e.g. a prefix or a walk start). A prefix is padded with zeros, and sorts before the keys sharing it.
+        """
+        packed = bytearray()
+        for component, width in zip(sub_id, self.key_widths):
+            if component >> (8 * width):
+                # past every key sharing the prefix
+                return self._key(bytes(packed) + b'\xff' * (self.key_size - len(packed))), True
+            packed += component.to_bytes(width, 'big')
+        return self._key(bytes(packed)), len(packed) == self.key_size
+
+    def _words(self, key):
+        if len(self.columns) == 1:
+            return key,
+        return self.word_struct.unpack(key.to_bytes(self.word_struct.size, 'big'))
+
+    def _key_at(self, i):
+        if len(self.columns) == 1:
+            return self.columns[0][i]
+        return int.from_bytes(self.word_struct.pack(*[column[i] for column in self.columns]), 'big')
+
+    def _bisect(self, key, right=False):
+        """
+        :return: the bisect_left (bisect_right) row number of the packed key among the merged rows.
+        """
+        lo, hi = 0, len(self.values)
+        if len(self.columns) == 1:
+            return (bisect.bisect_right if right else bisect.bisect_left)(self.columns[0], key, lo, hi)
+        last = len(self.columns) - 1
+        for j, (column, word) in enumerate(zip(self.columns, self._words(key))):
+            if j == last:
+                return (bisect.bisect_right if right else bisect.bisect_left)(column, word, lo, hi)
+            # the rows sharing the leading words
+            lo, hi = bisect.bisect_left(column, word, lo, hi), bisect.bisect_right(column, word, lo, hi)
+
+    def _find_merged(self, key):
+        """
+        :return: the row number of the packed key among the merged rows, None if it isn't one of them.
+        """
+        i = self._bisect(key)
+        if i < len(self.values) and self._key_at(i) == key:
+            return i
+        return None
+
+    def _get(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        i = self._find_merged(key)
+        if i is None:
+            return None
+        return self.values[i]
+
+    def _unpack(self, start, end):
+        """
+        :return: the sub-identifiers of the rows from start to end.
+        """
+        if len(self.columns) == 1:
+            words = self.columns[0][start:end]
+        else:
+            words = array.array('Q', (word for i in range(start, end) for word in (column[i] for column in self.columns)))
+        if sys.byteorder == 'little':
+            words.byteswap()
+        return tuple(self.row_struct.iter_unpack(words.tobytes()))
+
+    def __len__(self):
+        return self.row_count
+
+    def __contains__(self, sub_id):
+        key = self._pack(sub_id)
+        return key is not None and self._get(key) is not None
+
+    @property
+    def row_size(self):
+        return len(self.columns) * PACKED_WORD_SIZE + self.values.itemsize
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the rows.
+        """
+        return self.row_count * self.row_size
+
+    @property
+    def keys(self):
+        """
+        The sub-identifiers, unpacked on demand: walks should use get_next() / get_next_many().
+        """
+        self.merge()
+        return self._unpack(0, len(self.values))
+
+    def get(self, sub_id, default=None):
+        key = self._pack(sub_id)
+        value = None if key is None else self._get(key)
+        return default if value is None else value
+
+    def _next_row(self, sub_id):
+        """
+        :return: the row number of the first sub-identifier after `sub_id`.
+        """
+        self.merge()
+        key, whole = self._pack_bound(sub_id)
+        # a whole key walks past its own row, a prefix doesn't
+        return self._bisect(key, right=whole)
+
+    def get_next(self, sub_id):
+        """
+        :return: the first sub-identifier after `sub_id`, None at the end of the table.
+        """
+        right = self._next_row(sub_id)
+        if right >= len(self.values):
+            return None
+        return self._unpack(right, right + 1)[0]
+
+    def get_next_many(self, sub_id, count):
+        """
+        :return: up to `count` sub-identifiers following `sub_id`, in order.
+        """
+        right = self._next_row(sub_id)
+        return self._unpack(right, min(right + count, len(self.values)))
+
+    def set(self, sub_id, value):
+        """
+        Inserts or replaces a row, raises struct.error if sub_id doesn't fit the layout of the index.
+
+        :return: True if the table changed.
+        """
+        key = int.from_bytes(self.row_struct.pack(*sub_id), 'big')
+        current = self._get(key)
+        if current == value:
+            return False
+        self.value_check[0] = value
+        if current is None:
+            self.row_count += 1
+        self.pending[key] = value
+        return True
+
+    def _discard(self, key):
+        """
+        Removes the row of a packed key known to be in the table.
+        """
+        if self._find_merged(key) is None:
+            del self.pending[key]
+        else:
+            self.pending[key] = None
+        self.row_count -= 1
+
+    def remove(self, sub_id):
+        """
+        :return: True if the row was in the table.
+        """
+        key = self._pack(sub_id)
+        if key is None or self._get(key) is None:
+            return False
+        self._discard(key)
+        return True
+
+    def remove_prefix(self, prefix):
+        """
+        Removes the rows whose sub-identifier starts with the components of `prefix`.
+
+        :return: the number of rows removed.
+        """
+        if len(prefix) > len(self.key_widths) or any(component >> (8 * width)
+                                                     for component, width in zip(prefix, self.key_widths)):
+            return 0
+        packed = b''.join(component.to_bytes(width, 'big') for component, width in zip(prefix, self.key_widths))
+        rest = self.key_size - len(packed)
+        lower, upper = self._key(packed + bytes(rest)), self._key(packed + b'\xff' * rest)
+        keys = {self._key_at(i) for i in range(self._bisect(lower), self._bisect(upper, right=True))}
+        keys.update(key for key in self.pending if lower <= key <= upper)
+        removed = 0
+        for key in keys:
+            if self._get(key) is not None:
+                self._discard(key)
+                removed += 1
+        return removed
+
+    def merge(self):
+        """
+        Applies the pending edits. The rows are rebuilt in new arrays in one pass, or only the values are when
+        the edits just replace values.
+        """
+        if not self.pending:
+            return
+        edits = sorted((key, value, self._bisect(key)) for key, value in self.pending.items())
+        row_count = len(self.values)
+        replaced = [i < row_count and value is not None and self._key_at(i) == key for key, value, i in edits]
+        if all(replaced):
+            values = array.array(self.values.typecode, self.values)
+            for key, value, i in edits:
+                values[i] = value
+            self.values = values
+            self.pending = {}
+            return
+
+        columns = tuple(array.array('Q') for _ in self.columns)
+        values = array.array(self.values.typecode)
+        start = 0
+        for key, value, i in edits:
+            for column, merged in zip(self.columns, columns):
+                merged += column[start:i]
+            values += self.values[start:i]
+            start = i + 1 if i < row_count and self._key_at(i) == key else i
+            if value is not None:
+                for word, merged in zip(self._words(key), columns):
+                    merged.append(word)
+                values.append(value)
+        for column, merged in zip(self.columns, columns):
+            merged += column[start:]
+        values += self.values[start:]
+        self.columns, self.values = columns, values
+        self.pending = {}
+
+    def load(self, rows):
+        """
+        Replaces the table with `rows`, a dict of sub-identifier -> value, sorted once.
+        """
+        packed_rows = sorted((self.row_struct.pack(*sub_id), value) for sub_id, value in rows.items())
+        words = array.array('Q')
+        words.frombytes(b''.join(packed for packed, _ in packed_rows))
+        if sys.byteorder == 'little':
+            words.byteswap()
+        word_count = len(self.columns)
+        self.columns = (words,) if word_count == 1 else tuple(words[j::word_count] for j in range(word_count))
+        self.values = array.array(self.values.typecode, (value for _, value in packed_rows))
+        self.pending = {}
+        self.row_count = len(self.values)
+
+    def copy(self, generation=None):
+        """
+        :return: an index of the rows merged so far, sharing the arrays.
+        """
+        index = PackedMIBIndex(self.key_widths, self.values.typecode,
+                               self.generation if generation is None else generation)
+        index.columns = self.columns
+        index.values = self.values
+        index.row_count = len(self.values)
+        return index
+
+    def __getstate__(self):
+        self.merge()
+        return self.key_widths, self.values.typecode, self.columns, self.values, self.generation
+
+    def __setstate__(self, state):
+        key_widths, value_typecode, columns, values, generation = state
+        self.__init__(key_widths, value_typecode, generation)
+        self.columns = columns
+        self.values = values
+        self.row_count = len(values)
+
+
+class PackedSnapshotBuffer:
+    """
+    SnapshotBuffer counterpart for a PackedMIBIndex. The update cycles edit `index`, publish() merges their edits and
+    swaps in an index sharing its arrays as the current snapshot: the merge is the only pass over the rows of a cycle,
+    and the arrays it leaves behind are never edited again.
+    """
+
+    def __init__(self, key_widths, value_typecode='I'):
+        self.index = PackedMIBIndex(key_widths, value_typecode)
+        self.snapshot = self.index.copy()
+
+    def publish(self):
+        """
+        Swaps in the current content of `index` as the next snapshot.
+        """
+        self.index.merge()
+        self.snapshot = self.index.copy(self.snapshot.generation + 1)
+
+    @property
+    def generation(self):
+        return self.snapshot.generation
+
+    def get_next(self, sub_id):
+        return self.snapshot.get_next(sub_id)
+
+    def get_next_many(self, sub_id, count):
+        return self.snapshot.get_next_many(sub_id, count)
+
+    def __getstate__(self):
+        # only the published snapshot leaves an updater process.
+        return {'snapshot': self.snapshot}
+
+    def __setstate__(self, state):
+        self.snapshot = state['snapshot']
+        # the receiving side doesn't update, a process taking over the updates rebuilds the index.
+        self.index = PackedMIBIndex(self.snapshot.key_widths, self.snapshot.values.typecode)
+
+
+def _run_updater_process(updater, sender, stop_event):
+    """
+    Entry point of an updater process: runs the update cycles and sends a pickled snapshot (with the updater
+    telemetry) after each one.
+    """
+    # don't share the random sequence with the agent and the other updater processes.
+    random.seed()
+    redis_exception_happen = False
+    while not stop_event.is_set():
+        start = datetime.now()
+        redis_exception_happen = updater._update_cycle(redis_exception_happen)
+        try:
+            blob = pickle.dumps((updater.get_snapshot(), updater.telemetry), pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            logger.exception("MIBUpdater type[{}] failed to serialize its snapshot".format(type(updater)))
+        else:
+            try:
+                sender.send_bytes(blob)
+            except OSError:
+                # the agent is gone
+                break
+        stop_event.wait(updater._next_update_interval(start))
+
+
+def _receive_snapshot(receiver, timeout):
+    """
+    :return: the next pickled snapshot, None if there was none within `timeout` or the sending process is gone.
+    """
+    try:
+        if receiver.poll(timeout):
+            return receiver.recv_bytes()
+    except (EOFError, OSError):
+        pass
+    return None
+
+
 class MIBMeta(type):
     KEYSTORE = '__subids__'
     PREFIXES = '__subtrees__'
@@ -220,6 +946,24 @@ class MIBEntry:
     def get_next(self, sub_id):
         return None
 
+    def get_next_many(self, sub_id, count):
+        """
+        :return: up to `count` sub ids following `sub_id`, in order.
+        """
+        sub_ids = []
+        while len(sub_ids) < count:
+            sub_id = self.get_next(sub_id)
+            if sub_id is None:
+                break
+            sub_ids.append(sub_id)
+        return sub_ids
+
+    def get_generation(self):
+        """
+        :return: a value changing whenever the sub ids of this entry may change, None if unknown.
+        """
+        return None
+
     def get_prefix(self):
         return getattr(self, MIBEntry.PREFIX)
 
@@ -259,6 +1003,20 @@ class SubtreeMIBEntry(MIBEntry):
             logger.exception("SubtreeMIBEntry.get_next() caught an unexpected exception during iterator.get_next()")
             return None
 
+    def get_next_many(self, sub_id, count):
+        if not hasattr(self.iterator, 'get_next_many'):
+            return super().get_next_many(sub_id, count)
+        try:
+            return self.iterator.get_next_many(sub_id, count)
+        except Exception:
+            # Any unexpected exception or error, log it and keep running
+            logger.exception("SubtreeMIBEntry.get_next_many() caught an unexpected exception during iterator.get_next_many()")
+            return []
+
+    def get_generation(self):
+        # iterators publishing a SnapshotBuffer expose its generation.
+        return getattr(self.iterator, 'generation', None)
+
 
 # Define MIB entry (subtree) with a callable, which accepts a starndard OID tuple as a paramter
 class OidMIBEntry(MIBEntry):
@@ -305,6 +1063,35 @@ class OverlayAdpaterMIBEntry(MIBEntry):
     def get_next(self, sub_id):
         return self.underlay_mibentry.get_next(sub_id)
 
+    def get_next_many(self, sub_id, count):
+        return self.underlay_mibentry.get_next_many(sub_id, count)
+
+    def get_generation(self):
+        return self.underlay_mibentry.get_generation()
+
+
+class WalkCursorCache:
+    """
+    GetNext walks of one AgentX session, keyed by the last OID returned to each of them. A cursor holds the
+    index of the MIB entry being walked, the generation of its data, and the sub ids read ahead after that OID.
+    Least recently used cursors are dropped first.
+    """
+
+    def __init__(self, size=WALK_CURSOR_CACHE_SIZE):
+        self.size = size
+        self._cursors = OrderedDict()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def pop(self, oid_key):
+        return self._cursors.pop(oid_key, None)
+
+    def put(self, oid_key, cursor):
+        self._cursors[oid_key] = cursor
+        if len(self._cursors) > self.size:
+            self._cursors.popitem(last=False)
+
 
 class MIBTable(dict):
     """
@@ -313,7 +1100,8 @@ class MIBTable(dict):
 
     def __init__(self, mib_cls,
                  enable_dynamic_frequency=DEFAULT_ENABLE_DYNAMIC_FREQUENCY,
-                 update_frequency=DEFAULT_UPDATE_FREQUENCY):
+                 update_frequency=DEFAULT_UPDATE_FREQUENCY,
+                 walk_readahead=DEFAULT_WALK_READAHEAD):
         if type(mib_cls) is not MIBMeta:
             raise ValueError("Supplied object is not a MIB class instance.")
         super().__init__(getattr(mib_cls, MIBMeta.KEYSTORE))
@@ -321,6 +1109,37 @@ class MIBTable(dict):
         self.update_frequency = update_frequency
         self.updater_instances = getattr(mib_cls, MIBMeta.UPDATERS)
         self.prefixes = getattr(mib_cls, MIBMeta.PREFIXES)
+        self._build_prefix_index()
+        self.walk_readahead = walk_readahead
+        # session_id -> WalkCursorCache
+        self._walk_cursors = {}
+        # replaced by the Agent's instrumentation
+        self.stats = AgentStats(STATS_DISABLED)
+
+    def _build_prefix_index(self):
+        """
+        Build the immutable prefix index shared by every Get/GetNext request, so no request has to sort or slice
+        the prefix list:
+          - _sorted_prefixes: every registered prefix, in lexicographic order.
+          - _sorted_entries: the MIB entry of each prefix, in the same order.
+          - _parent_index: for each prefix, the index of the closest registered prefix enclosing it (-1 if none).
+          - _walkable: for each prefix, True if no other prefix is nested in it, i.e. every OID below it resolves to
+            its entry. Only those entries are walked with cursors.
+        """
+        sorted_prefixes = tuple(sorted(set(self.prefixes)))
+        parent_index = []
+        for idx, prefix in enumerate(sorted_prefixes):
+            # the enclosing prefixes of `prefix` are found on the parent chain of its predecessor
+            parent = idx - 1
+            while parent >= 0 and prefix[:len(sorted_prefixes[parent])] != sorted_prefixes[parent]:
+                parent = parent_index[parent]
+            parent_index.append(parent)
+
+        self._sorted_prefixes = sorted_prefixes
+        self._sorted_entries = tuple(dict.get(self, prefix) for prefix in sorted_prefixes)
+        self._parent_index = tuple(parent_index)
+        nested = set(parent_index)
+        self._walkable = tuple(idx not in nested for idx in range(len(sorted_prefixes)))
 
     @staticmethod
     def _done_background_task_callback(fut):
@@ -331,27 +1150,69 @@ class MIBTable(dict):
             )
             logger.error(exstr)
 
-    def start_background_tasks(self, event):
+    def initialize_updaters(self):
+        """
+        Constructs the updaters deferred by deferred_updater_init() and logs the time spent per MIB module.
+        """
+        durations = OrderedDict()
+        for updater in sorted(self.updater_instances, key=lambda u: type(u).__module__):
+            start = time.perf_counter()
+            if updater.initialize():
+                module = type(updater).__module__
+                durations[module] = durations.get(module, 0) + time.perf_counter() - start
+        for module, duration in durations.items():
+            logger.info("MIB module {} updaters initialized in {:.3f}s".format(module, duration))
+
+    def shutdown_updaters(self):
+        """
+        Shuts down the updaters constructed by initialize_updaters() (or at MIB class definition), see
+        MIBUpdater.shutdown(). A failing updater does not keep the others from shutting down.
+        """
+        for updater in self.updater_instances:
+            if MIBUpdater.DEFERRED_INIT in updater.__dict__:
+                continue
+            try:
+                updater.shutdown()
+            except Exception:
+                logger.exception("MIBUpdater type[{}] failed to shut down".format(type(updater)))
+
+    def start_background_tasks(self, event, executor=None, update_processes=False):
+        """
+        :param event: the updaters run while this event is set.
+        :param executor: optional executor for the update cycles of updaters declaring `thread_safe_update`.
+        :param update_processes: run the update cycles of updaters declaring `snapshot_attributes` in a process.
+        :return: future gathering all updater tasks.
+        """
         tasks = []
         for updater in self.updater_instances:
             updater.frequency = self.update_frequency
             updater.enable_dynamic_frequency = self.enable_dynamic_frequency
             updater.run_event = event
+            updater.mib_table = self
+            updater.executor = executor if updater.thread_safe_update else None
+            updater.run_in_process = bool(update_processes and updater.thread_safe_update and
+                                          updater.snapshot_attributes)
             fut = asyncio.ensure_future(updater.start())
             fut.add_done_callback(MIBTable._done_background_task_callback)
             tasks.append(fut)
         return asyncio.gather(*tasks)
 
+    def _find_parent_index(self, item):
+        """
+        :return: index (in the sorted prefix index) of the longest registered prefix of `item`, -1 if there is none.
+        """
+        sorted_prefixes = self._sorted_prefixes
+        idx = bisect.bisect_right(sorted_prefixes, item) - 1
+        # any prefix of item sorts between that prefix and item itself, i.e. on the parent chain of `idx`
+        while idx >= 0 and item[:len(sorted_prefixes[idx])] != sorted_prefixes[idx]:
+            idx = self._parent_index[idx]
+        return idx
+
     def _find_parent_prefix(self, item):
-        oids = sorted(self.prefixes)
-        left_insert_index = bisect.bisect(oids, item)
-        preceding_oids = oids[:left_insert_index]
-        if not preceding_oids:
-            return None
-        if preceding_oids[-1] == item[: len(preceding_oids[-1])]:
-            return preceding_oids[-1]
-        else:
+        idx = self._find_parent_index(item)
+        if idx < 0:
             return None
+        return self._sorted_prefixes[idx]
 
     def _get_value(self, mib_entry, oid_key):
         sub_id = mib_entry.get_sub_id(oid_key)
@@ -366,25 +1227,67 @@ class MIBTable(dict):
         sub_id = mib_entry.get_sub_id(oid_key)
         key1 = mib_entry.get_next(sub_id)
         if key1 is None:
-            return None
+            return None, None
         val1 = mib_entry(key1)
         if val1 is None:
-            return None
+            return None, None
         oid1 = mib_entry.replace_sub_id(oid_key, key1)
         # OID found, call the OIDEntry
         vr = ValueRepresentation.from_typecast(mib_entry.value_type, oid1, val1)
-        return vr
+        return vr, oid1
+
+    def _get_cursor_value(self, cursors, oid_key):
+        """
+        Continues the walk that last returned `oid_key`, if its entry data is still the same generation.
+
+        :return: (ValueRepresentation, entry index) of the successor, (None, -1) when the regular lookup is needed.
+        """
+        cursor = cursors.pop(oid_key)
+        if cursor is None:
+            return None, -1
+        entry_idx, generation, upcoming, position = cursor
+        mib_entry = self._sorted_entries[entry_idx]
+        if mib_entry.get_generation() != generation:
+            return None, -1
+        if position >= len(upcoming):
+            upcoming = mib_entry.get_next_many(mib_entry.get_sub_id(oid_key), self.walk_readahead)
+            position = 0
+            if not upcoming:
+                # end of the entry, the regular lookup moves on to the next prefix.
+                return None, -1
+        key1 = upcoming[position]
+        val1 = mib_entry(key1)
+        if val1 is None:
+            return None, -1
+        oid1 = mib_entry.replace_sub_id(oid_key, key1)
+        cursors.put(oid1, (entry_idx, generation, upcoming, position + 1))
+        vr = ValueRepresentation.from_typecast(mib_entry.value_type, oid1, val1)
+        return vr, entry_idx
 
     def get(self, sr, d=None):
+        if self.stats.detailed:
+            start = self.stats.clock()
+            vr, prefix_idx = self._get(sr)
+            self._record_lookup(prefix_idx, self.stats.clock() - start)
+            return vr
+        return self._get(sr)[0]
+
+    def _record_lookup(self, prefix_idx, latency):
+        self.stats.record_lookup(self._sorted_prefixes[prefix_idx] if prefix_idx >= 0 else None, latency)
+
+    def _get(self, sr):
+        """
+        :return: (ValueRepresentation, index of the prefix it resolved to or -1)
+        """
         oid_key = sr.start.to_tuple()
 
         # find the best match prefix, either a exact match or a parent prefix
-        prefix = self._find_parent_prefix(oid_key)
-        if prefix is not None:
-            parent_mib_entry = super().get(prefix)
+        prefix_idx = self._find_parent_index(oid_key)
+        if prefix_idx >= 0:
+            parent_mib_entry = self._sorted_entries[prefix_idx]
             vr = self._get_value(parent_mib_entry, oid_key)
             if vr is not None:
-                return vr
+                return vr, prefix_idx
             # we found a prefix. E.g. (1,2,3) is a prefix to OID (1,2,3,1)
             value_type = ValueType.NO_SUCH_INSTANCE
         else:
@@ -397,49 +1300,90 @@ class MIBTable(dict):
             sr.start,
             None,  # null value
         )
-        return vr
+        return vr, prefix_idx
 
-    def get_next(self, sr):
+    def get_next(self, sr, session_id=None):
+        """
+        :param sr: SearchRange.
+        :param session_id: AgentX session of the request. Sequential walks of a session are continued from a cursor
+                           (see WalkCursorCache) instead of a fresh lookup.
+        :return: ValueRepresentation
+        """
+        if self.stats.detailed:
+            start = self.stats.clock()
+            vr, entry_idx = self._get_next_from_session(sr, session_id)
+            self._record_lookup(entry_idx, self.stats.clock() - start)
+            return vr
+        return self._get_next_from_session(sr, session_id)[0]
+
+    def _get_next_from_session(self, sr, session_id):
+        """
+        :return: (ValueRepresentation, index of the MIB entry it was found in or -1)
+        """
         start_key = sr.start.to_tuple()
+        cursors = None
+        if session_id is not None and self.walk_readahead > 0:
+            cursors = self._walk_cursors.get(session_id)
+            if cursors is None:
+                cursors = self._walk_cursors[session_id] = WalkCursorCache()
+            if not sr.start.include:
+                vr, entry_idx = self._get_cursor_value(cursors, start_key)
+                if vr is not None:
+                    return vr, entry_idx
+
+        vr, entry_idx, oid1 = self._get_next(sr, start_key)
+        if cursors is not None and entry_idx >= 0 and self._walkable[entry_idx]:
+            generation = self._sorted_entries[entry_idx].get_generation()
+            if generation is not None:
+                # nothing read ahead yet, the first request continuing this walk fills the cursor.
+                cursors.put(oid1, (entry_idx, generation, (), 0))
+        return vr, entry_idx
+
+    def close_session(self, session_id):
+        """
+        Forgets the walk cursors of an AgentX session.
+        """
+        self._walk_cursors.pop(session_id, None)
+
+    def _get_next(self, sr, start_key):
+        """
+        :return: (ValueRepresentation, index of the MIB entry it was found in or -1, its OID key or None)
+        """
         end_key = sr.end.to_tuple()
-        oid_list = sorted(self.prefixes)
 
         # find the best match prefix, either a exact match or a parent prefix
-        prefix = self._find_parent_prefix(start_key)
-        if prefix is not None:
-            parent_mib_entry = super().get(prefix)
+        prefix_idx = self._find_parent_index(start_key)
+        if prefix_idx >= 0:
+            parent_mib_entry = self._sorted_entries[prefix_idx]
 
             if sr.start.include:
                 vr = self._get_value(parent_mib_entry, start_key)
                 if vr is not None:
-                    return vr
+                    return vr, prefix_idx, start_key
 
-            vr = self._get_nextvalue(parent_mib_entry, start_key)
+            vr, oid1 = self._get_nextvalue(parent_mib_entry, start_key)
             if vr is not None:
-                return vr
+                return vr, prefix_idx, oid1
 
+        sorted_prefixes = self._sorted_prefixes
         # return the index of an insertion point immediately following any duplicate value (thereby excluding it)
-        sorted_start_index = bisect.bisect_right(oid_list, start_key)
-
-        # slice our MIB by the insertion point.
-        remaining_oids = oid_list[sorted_start_index:]
-
-        while remaining_oids and remaining_oids[0] < end_key:
-            # we found at least one remaining oid and the first entry in the remaining oid list
-            # is less than our end value--it's a match.
-            oid_key = remaining_oids[0]
-            mib_entry = self[oid_key]
+        idx = bisect.bisect_right(sorted_prefixes, start_key)
+
+        # walk the remaining prefixes in order, skipping the subtrees without data.
+        while idx < len(sorted_prefixes) and sorted_prefixes[idx] < end_key:
+            # the current prefix is less than our end value--it's a match.
+            oid_key = sorted_prefixes[idx]
+            mib_entry = self._sorted_entries[idx]
+            idx += 1
             try:
                 key1 = next(iter(mib_entry))  # get the first sub_id from the mib_etnry
             except StopIteration:
                 # handler returned None, which implies there's no data, keep walking.
-                remaining_oids = remaining_oids[1:]
                 continue
 
             val1 = mib_entry(key1)
             if val1 is None:
                 logger.error('MIBTable.get_next found an invalid key: {}+{}'.format(mib_entry.subtree, key1))
-                remaining_oids = remaining_oids[1:]
                 continue
 
             oid1 = mib_entry.replace_sub_id(oid_key, key1)
@@ -450,20 +1394,75 @@ class MIBTable(dict):
                 oid1,
                 val1
             )
-            return vr
+            return vr, idx - 1, oid1
 
         # exhausted all remaining OID options--we're at the end of the MIB view.
-        return ValueRepresentation(
+        vr = ValueRepresentation(
             ValueType.END_OF_MIB_VIEW,
             0,  # reserved
             sr.start,
             None,  # null value
         )
+        return vr, -1, None
+
+    def get_bulk(self, non_repeaters, max_repetitions, sr_list, max_size=SNMP_MAX_MSG_SIZE, session_id=None):
+        """
+        Resolve the SearchRangeList of an agentx-GetBulk-PDU in a single pass.
+
+        The first `non_repeaters` ranges are processed exactly like GetNext. The remaining (repeater) ranges
+        are walked up to `max_repetitions` times, each repetition resuming right after the name returned by
+        the previous one. A repeater that reached the end of the MIB view stays there.
+
+        Repetitions are only ever returned whole; the walk stops as soon as the next repetition would push
+        the encoded ResponsePDU beyond `max_size` bytes, or when every repeater reached the end of the MIB view.
+
+        :param non_repeaters: number of leading search ranges that are not repeated.
+        :param max_repetitions: maximum number of repetitions of the remaining search ranges.
+        :param sr_list: list of SearchRange.
+        :param max_size: upper bound on the encoded response size (bytes).
+        :param session_id: AgentX session of the request, see get_next().
+        :return: list of ValueRepresentation
+        """
+        non_repeaters = max(0, min(non_repeaters, len(sr_list)))
+
+        var_bind_list = [self.get_next(sr, session_id) for sr in sr_list[:non_repeaters]]
+        # header + sys_up_time/error/index
+        response_size = AGENTX_HEADER_LENGTH + 8 + sum(vr.size for vr in var_bind_list)
+
+        repeaters = list(sr_list[non_repeaters:])
+        end_of_mib_view = [False] * len(repeaters)
+        for _ in range(max_repetitions if repeaters else 0):
+            repetition = []
+            for i, sr in enumerate(repeaters):
+                if end_of_mib_view[i]:
+                    vr = ValueRepresentation(ValueType.END_OF_MIB_VIEW, 0, sr.start, None)
+                else:
+                    vr = self.get_next(sr, session_id)
+                    if vr.type_ == ValueType.END_OF_MIB_VIEW:
+                        end_of_mib_view[i] = True
+                    else:
+                        # resume right after the returned name (its 'include' field is never set)
+                        repeaters[i] = SearchRange(start=vr.name, end=sr.end)
+                repetition.append(vr)
+
+            repetition_size = sum(vr.size for vr in repetition)
+            if response_size + repetition_size > max_size:
+                break
+            var_bind_list.extend(repetition)
+            response_size += repetition_size
+
+            if all(end_of_mib_view):
+                break
+
+        return var_bind_list
 
     def __setitem__(self, key, value):
         if not hasattr(value, '__iter__'):
             raise ValueError("Invalid key '{}'. All keys must be iterable types.".format(key))
         super().__setitem__(key, value)
+        if key in self._sorted_prefixes:
+            # keep the prefix index in sync with the replaced entry
+            self._sorted_entries = tuple(dict.get(self, prefix) for prefix in self._sorted_prefixes)
 
     def __eq__(self, other):
         if not isinstance(other, MIBTable):
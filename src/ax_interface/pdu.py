@@ -7,7 +7,7 @@ from collections import namedtuple
 
 from . import constants, logger, exceptions
 from .constants import PduTypes
-from .encodings import OctetString
+from .encodings import OctetString, compiled_struct
 
 supported_pdus = {}
 _ignored_pdus = {}
@@ -88,7 +88,11 @@ class PDUHeaderTags(namedtuple('_PDUHeaderTags', ('version', 'type_', 'flags', '
 
     @classmethod
     def from_bytes(cls, byte_string):
-        return cls(*struct.unpack('!BBBB', byte_string[:4]))
+        return cls.unpack_from(byte_string)
+
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        return cls(*compiled_struct('!BBBB').unpack_from(buffer, offset))
 
 
 PDUIdentifiers = namedtuple('PDUIdentifiers', ('session_id', 'transaction_id', 'packet_id', 'payload_length'))
@@ -113,14 +117,23 @@ class PDUHeader(namedtuple('_PDUHeader', PDUHeaderTags._fields + PDUIdentifiers.
     __slots__ = ()
 
     def to_bytes(self):
-        ret = struct.pack('!BBBB', self.version, self.type_, self.flags, self.reserved)
-        fmt = self.endianness + 'LLLL'
-        ret += struct.pack(fmt, self.session_id, self.transaction_id, self.packet_id, self.payload_length)
-        return ret
+        buffer = bytearray(constants.AGENTX_HEADER_LENGTH)
+        self.pack_into(buffer)
+        return bytes(buffer)
+
+    def pack_into(self, buffer, offset=0):
+        compiled_struct('!BBBB').pack_into(buffer, offset, self.version, self.type_, self.flags, self.reserved)
+        compiled_struct(self.endianness + 'LLLL').pack_into(
+            buffer, offset + 4, self.session_id, self.transaction_id, self.packet_id, self.payload_length)
+        return offset + constants.AGENTX_HEADER_LENGTH
 
     @classmethod
     def from_bytes(cls, byte_string):
-        pdu_info = PDUHeaderTags.from_bytes(byte_string)
+        return cls.unpack_from(byte_string)
+
+    @classmethod
+    def unpack_from(cls, buffer, offset=0):
+        pdu_info = PDUHeaderTags.unpack_from(buffer, offset)
         """
         Four remaining longs makeup the identifiers. Combine the two based on parsed flags.
 
@@ -132,7 +145,7 @@ class PDUHeader(namedtuple('_PDUHeader', PDUHeaderTags._fields + PDUIdentifiers.
             header = cls(
                 *pdu_info,
                 *PDUIdentifiers(
-                    *struct.unpack(pdu_info.endianness + '4L', byte_string[4:constants.AGENTX_HEADER_LENGTH])
+                    *compiled_struct(pdu_info.endianness + '4L').unpack_from(buffer, offset + 4)
                 )
             )
             return header
@@ -157,18 +170,70 @@ class RegisteredPDU(type):
 
 class PDUStream:
     """
-    Contiguous PDU bytestream constructor.
+    Contiguous PDU bytestream constructor. PDUs are framed by their header's payload length and decoded in place
+    from a single memoryview over the stream.
     """
 
     def __init__(self, data):
         self.data = data
 
     def __iter__(self):
-        _data = self.data
-        while _data:
-            pdu = PDU.decode(_data)
+        buffer = memoryview(self.data)
+        offset = 0
+        while offset < len(buffer):
+            pdu = PDU.decode(buffer[offset:])
             yield pdu
-            _data = pdu._trailing_bytes
+            offset += constants.AGENTX_HEADER_LENGTH + pdu.header.payload_length
+
+
+class PDUFrameBuffer:
+    """
+    Receive buffer for the AgentX byte stream. Socket reads carry no PDU boundaries: a read may hold several PDUs,
+    or end in the middle of one. Received bytes are appended to the buffer, complete PDUs--framed by the
+    h.payload_length field of their 20-byte header--are handed out and any partial PDU is kept for the next read.
+    """
+
+    def __init__(self, max_payload_length=constants.AGENTX_MAX_PAYLOAD_LENGTH):
+        self.max_payload_length = max_payload_length
+        self._buffer = bytearray()
+        # start of the first PDU not handed out yet
+        self._offset = 0
+
+    def __len__(self):
+        return len(self._buffer) - self._offset
+
+    def feed(self, data):
+        if self._offset:
+            # drop the PDUs handed out after the previous read
+            del self._buffer[:self._offset]
+            self._offset = 0
+        self._buffer += data
+
+    def clear(self):
+        self._buffer = bytearray()
+        self._offset = 0
+
+    def __iter__(self):
+        """
+        Yields a memoryview on each complete PDU (header included), valid until the iteration moves on.
+        Raises PDUUnpackError (and drops the buffered bytes) when a header announces an implausible payload length.
+        """
+        buffer = self._buffer
+        while len(buffer) - self._offset >= constants.AGENTX_HEADER_LENGTH:
+            header = PDUHeader.unpack_from(buffer, self._offset)
+            if header.payload_length > self.max_payload_length:
+                self.clear()
+                raise exceptions.PDUUnpackError("PDU payload length [{}] exceeds [{}] bytes.".format(
+                    header.payload_length, self.max_payload_length))
+
+            pdu_end = self._offset + constants.AGENTX_HEADER_LENGTH + header.payload_length
+            if pdu_end > len(buffer):
+                # partial PDU, wait for the rest of it
+                break
+
+            with memoryview(buffer)[self._offset:pdu_end] as frame:
+                self._offset = pdu_end
+                yield frame
 
 
 class PDU(object, metaclass=RegisteredPDU):
@@ -189,13 +254,37 @@ class PDU(object, metaclass=RegisteredPDU):
             raise ValueError("Payload and PDU fields are mutually exclusive.")
 
         self.header = header._replace(type_=self.header_type_)
-        self._trailing_bytes = payload or b''
+        # decode cursor: the payload is consumed in place, only the offset moves.
+        self._buffer = memoryview(payload if payload is not None else b'')
+        self._offset = 0
+
+    def _unpack(self, fmt):
+        """
+        Unpacks `fmt` (without the byte order character) at the decode cursor and advances the cursor.
+        """
+        compiled = compiled_struct(self.header.endianness + fmt)
+        values = compiled.unpack_from(self._buffer, self._offset)
+        self._offset += compiled.size
+        return values
+
+    def _unpack_encoding(self, encoding_cls):
+        """
+        Unpacks an AgentX encoding (ObjectIdentifier, SearchRange, ...) at the decode cursor and advances the cursor.
+        """
+        value, self._offset = encoding_cls.unpack_from(self._buffer, self._offset, self.header.endianness)
+        return value
+
+    def _has_trailing_bytes(self):
+        return self._offset < len(self._buffer)
+
+    def _fields(self):
+        return {k: v for k, v in self.__dict__.items() if k not in ('_buffer', '_offset')}
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(self._fields())
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self._fields() == other._fields()
 
     @staticmethod
     def decode(byte_string):
@@ -211,26 +300,49 @@ class PDU(object, metaclass=RegisteredPDU):
 
         # based on the type field, find the appropriate class and instantiate it.
         try:
-            return supported_pdus[header.type_](
-                payload=byte_string[constants.AGENTX_HEADER_LENGTH:],
-                header=header)
+            pdu_cls = supported_pdus[header.type_]
         except KeyError:
             raise exceptions.UnsupportedPDUError("PDU Type [{}] is not supported".format(header.type_))
+
+        # the payload is a view on the caller's bytes, bounded by the header's payload length.
+        payload_end = constants.AGENTX_HEADER_LENGTH + header.payload_length
+        try:
+            pdu = pdu_cls(payload=memoryview(byte_string)[constants.AGENTX_HEADER_LENGTH:payload_end], header=header)
         except (struct.error, ValueError) as e:
             raise exceptions.PDUUnpackError("Failed to unpack PDU.", inner_exception=e)
+        # decoding is complete, don't keep the caller's buffer alive.
+        pdu._buffer = None
+        return pdu
 
     def encode(self):
+        """
+        Encodes the PDU in a single pass: the payload size is computed up front, then the header and the payload
+        are packed into one preallocated buffer.
+        """
         try:
-            return self.header.to_bytes()
+            buffer = bytearray(constants.AGENTX_HEADER_LENGTH + self.payload_length)
+            offset = self.header.pack_into(buffer)
+            self.pack_payload_into(buffer, offset)
         except (struct.error, ValueError) as e:
             raise exceptions.PDUPackError("Failed to pack PDU.", inner_exception=e)
+        return bytes(buffer)
+
+    def pack_payload_into(self, buffer, offset):
+        """
+        Packs everything following the header into `buffer` at `offset`, returns the offset following the payload.
+        Children with a payload extend this (and `payload_length`).
+        """
+        return offset
 
     def make_response(self, lut):
         raise NotImplementedError("Child PDUs must create response objects.")
 
     @property
     def payload_length(self):
-        return len(self.encode()) - constants.AGENTX_HEADER_LENGTH
+        """
+        Size of the encoded payload, computed from the PDU fields (without encoding them).
+        """
+        return 0
 
 
 class ContextOptionalPDU(PDU):
@@ -245,13 +357,15 @@ class ContextOptionalPDU(PDU):
         super().__init__(header=header, payload=payload)
         self.context = context
         if self.header.flag__non_default_context:
-            # Optional context is present, process it.
-            self.context = OctetString.from_bytes(self._trailing_bytes, self.header.endianness)
-            # chomp the context block from unprocessed bytes
-            self._trailing_bytes = self._trailing_bytes[self.context.size:]
+            # Optional context is present, process it (and move the cursor past it).
+            self.context = self._unpack_encoding(OctetString)
 
-    def encode(self):
-        ret = super().encode()
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
         if self.context is not None:
-            ret += self.context.to_bytes(self.header.endianness)
-        return ret
+            offset = self.context.pack_into(buffer, offset, self.header.endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + (self.context.size if self.context is not None else 0)
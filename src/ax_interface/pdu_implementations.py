@@ -1,12 +1,11 @@
 """
 PDU Implementation classes.
 """
-import struct
 from enum import Enum, unique
 
-from . import util, constants
-from .constants import PduTypes
-from .encodings import ObjectIdentifier, SearchRange, OctetString, ValueRepresentation
+from . import logger, util, constants
+from .constants import PduTypes, ValueType
+from .encodings import ObjectIdentifier, SearchRange, OctetString, ValueRepresentation, compiled_struct
 from .pdu import PDU, ContextOptionalPDU
 
 
@@ -30,25 +29,24 @@ class OpenPDU(PDU):
         self.oid = oid
 
         if payload is not None:
-            self.timeout, self.reserved = struct.unpack(self.header.endianness + 'B3s', self._trailing_bytes[:4])
-            self._trailing_bytes = self._trailing_bytes[4:]
-            self.oid = ObjectIdentifier.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.oid.size:]
-            self.descr = OctetString.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.descr.size:]
+            self.timeout, self.reserved = self._unpack('B3s')
+            self.oid = self._unpack_encoding(ObjectIdentifier)
+            self.descr = self._unpack_encoding(OctetString)
         else:
             self.descr = OctetString.from_string(descr)
             self.header = self.header._replace(payload_length=self.payload_length)
 
             # end of object stream
 
-    def encode(self):
-        ret = super().encode()
-        fmt = self.header.endianness + 'B3s'
-        ret += struct.pack(fmt, self.timeout, self.reserved)
-        ret += self.oid.to_bytes(self.header.endianness)
-        ret += self.descr.to_bytes(self.header.endianness)
-        return ret
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
+        compiled_struct(self.header.endianness + 'B3s').pack_into(buffer, offset, self.timeout, self.reserved)
+        offset = self.oid.pack_into(buffer, offset + 4, self.header.endianness)
+        return self.descr.pack_into(buffer, offset, self.header.endianness)
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4 + self.oid.size + self.descr.size
 
 
 class ClosePDU(PDU):
@@ -94,10 +92,19 @@ class ClosePDU(PDU):
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         # | c.reason |                  < reserved >                      |
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
-        self.reason, self.reason_reserved = struct.unpack(self.header.endianness + 'B3s', self._trailing_bytes[:4])
+        self.reason, self.reason_reserved = self._unpack('B3s')
         self.header = self.header._replace(payload_length=4)
         # end of object stream
 
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
+        compiled_struct(self.header.endianness + 'B3s').pack_into(buffer, offset, self.reason, self.reason_reserved)
+        return offset + 4
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4
+
 
 class RegisterPDU(ContextOptionalPDU):
     """
@@ -117,18 +124,14 @@ class RegisterPDU(ContextOptionalPDU):
         # | r.timeout | r.priority | r.range_subid |     < reserved >     |
         # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
         if payload is not None:
-            self.timeout, self.priority, self.range_subid, self.range_subid_reserved = \
-                struct.unpack(self.header.endianness + 'BBBB', self._trailing_bytes[:4])
-            self._trailing_bytes = self._trailing_bytes[4:]
-            self.subtree = ObjectIdentifier.from_bytes(self._trailing_bytes, self.header.endianness)
-            self._trailing_bytes = self._trailing_bytes[self.subtree.size:]
+            self.timeout, self.priority, self.range_subid, self.range_subid_reserved = self._unpack('BBBB')
+            self.subtree = self._unpack_encoding(ObjectIdentifier)
             # From the RFC:
             # This field is present only if r.range_subid is not 0.
             # r.upper_bound
             self.upper_bound = None
             if self.range_subid:
-                self.upper_bound = struct.unpack(self.header.endianness + 'L', self._trailing_bytes[:4])[0]
-                self._trailing_bytes = self._trailing_bytes[4:]
+                self.upper_bound = self._unpack('L')[0]
                 # end of stream
         else:
             self.timeout, self.priority, self.range_subid, self.range_subid_reserved = \
@@ -136,14 +139,19 @@ class RegisterPDU(ContextOptionalPDU):
             self.subtree, self.upper_bound = subtree, upper_bound
             self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
-        ret += struct.pack(self.header.endianness + 'BBBB', self.timeout, self.priority, self.range_subid,
-                           self.range_subid_reserved)
-        ret += self.subtree.to_bytes(self.header.endianness)
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
+        compiled_struct(self.header.endianness + 'BBBB').pack_into(
+            buffer, offset, self.timeout, self.priority, self.range_subid, self.range_subid_reserved)
+        offset = self.subtree.pack_into(buffer, offset + 4, self.header.endianness)
         if self.upper_bound is not None:
-            ret += struct.pack(self.header.endianness + 'L', self.upper_bound)
-        return ret
+            compiled_struct(self.header.endianness + 'L').pack_into(buffer, offset, self.upper_bound)
+            offset += 4
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4 + self.subtree.size + (4 if self.upper_bound is not None else 0)
 
 
 # class UnRegisterPDU(OptionalContextPDU):
@@ -166,28 +174,26 @@ class GetPDU(ContextOptionalPDU):
 
         if payload is not None:
             # consume the remaining bytestream
-            bytes_read = 0
-            while self._trailing_bytes and bytes_read < self.header.payload_length:
-                # unpack the OID
-                search_oid = SearchRange.from_bytes(self._trailing_bytes, self.header.endianness)
-                # move the pointer
-                self._trailing_bytes = self._trailing_bytes[search_oid.size:]
-                bytes_read += search_oid.size
-                # remember the OID
-                self.sr.append(search_oid)
+            while self._has_trailing_bytes():
+                # unpack the SearchRange (moves the pointer) and remember it
+                self.sr.append(self._unpack_encoding(SearchRange))
                 # end of stream post-loop
         else:
             for oid in oids:
                 self.sr.append(
                     SearchRange(start=oid, end=oid.inc())
                 )
-            self.header = self.header._replace(payload_length=len(self.encode()))
+            self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
         for sr in self.sr:
-            ret += sr.to_bytes(self.header.endianness)
-        return ret
+            offset = sr.pack_into(buffer, offset, self.header.endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + sum(sr.size for sr in self.sr)
 
     def make_response(self, lut):
         """
@@ -286,7 +292,7 @@ class GetNextPDU(GetPDU):
         var_bind_list = []
 
         for sr in self.sr:
-            vr = lut.get_next(sr)
+            vr = lut.get_next(sr, self.header.session_id)
             var_bind_list.append(vr)
 
         response_pdu = ResponsePDU(
@@ -302,13 +308,93 @@ class GetNextPDU(GetPDU):
         return response_pdu
 
 
-# class GetBulkPDU(ContextOptionalPDU):
-#     """
-#     https://tools.ietf.org/html/rfc2741#section-6.2.7
-#     """
-# TODO: 'generr' on other failure
-#     header_type_ = PduTypes.GET_BULK
-# TODO: Implement.
+class GetBulkPDU(ContextOptionalPDU):
+    """
+    https://tools.ietf.org/html/rfc2741#section-6.2.7
+    """
+    header_type_ = PduTypes.GET_BULK
+
+    def __init__(self, header=None, payload=None, context=None, non_repeaters=None, max_repetitions=None,
+                 oids=None):
+        super().__init__(header=header, payload=payload, context=context)
+        self.sr = []
+
+        # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+        # |      g.non_repeaters          |     g.max_repetitions         |
+        # +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+        if payload is not None:
+            self.non_repeaters, self.max_repetitions = self._unpack('HH')
+
+            # consume the remaining bytestream
+            while self._has_trailing_bytes():
+                # unpack the SearchRange (moves the pointer) and remember it
+                self.sr.append(self._unpack_encoding(SearchRange))
+                # end of stream post-loop
+        else:
+            self.non_repeaters, self.max_repetitions = non_repeaters, max_repetitions
+            for oid in oids:
+                self.sr.append(
+                    SearchRange(start=oid, end=oid.inc())
+                )
+            self.header = self.header._replace(payload_length=self.payload_length)
+
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
+        compiled_struct(self.header.endianness + 'HH').pack_into(
+            buffer, offset, self.non_repeaters, self.max_repetitions)
+        offset += 4
+        for sr in self.sr:
+            offset = sr.pack_into(buffer, offset, self.header.endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 4 + sum(sr.size for sr in self.sr)
+
+    def make_response(self, lut):
+        """
+        From https://tools.ietf.org/html/rfc2741#section-7.2.3.3:
+
+           (1)  For each of the first N (g.non_repeaters) SearchRanges, the
+                subagent processes the SearchRange as for agentx-GetNext-PDU.
+
+           (2)  The remaining R SearchRanges are processed M (g.max_repetitions)
+                times. On each repetition, the starting OID of a SearchRange is
+                replaced with the name of the variable returned for it by the
+                previous repetition.
+
+           (3)  Once a SearchRange yields `endOfMibView', every subsequent
+                repetition of it does as well. The subagent may terminate the
+                repetitions early, e.g. once every SearchRange reached
+                `endOfMibView'.
+
+        The response is bounded by SNMP_MAX_MSG_SIZE; see MIBTable.get_bulk().
+        If processing fails, the response is a `genErr' on the first SearchRange, with the
+        requested OIDs as Null VarBinds (https://tools.ietf.org/html/rfc2741#section-7.2.4).
+
+        :param lut:
+        :return:
+        """
+
+        error, index = ResponsePDU.Errors.NO_AGENT_X_ERROR, 0
+        try:
+            var_bind_list = lut.get_bulk(self.non_repeaters, self.max_repetitions, self.sr,
+                                         session_id=self.header.session_id)
+        except Exception:
+            logger.exception("GetBulk processing failed")
+            error, index = ResponsePDU.Errors.SNMP2_GEN_ERR, 1
+            var_bind_list = [ValueRepresentation(ValueType.NULL, 0, sr.start, None) for sr in self.sr]
+
+        response_pdu = ResponsePDU(
+            header=self.header._replace(
+                type_=constants.PduTypes.RESPONSE,
+            ),
+            sys_up_time=0,  # ignored for this PDU type.
+            error=error,
+            index=index,
+            values=var_bind_list
+        )
+        return response_pdu
 
 
 
@@ -322,11 +408,9 @@ class TestSetPDU(ContextOptionalPDU):
         super().__init__(*args, **kwargs)
         self.vbs = []
 
-        while self._trailing_bytes:
-            # unpack the VarBind
-            vb = ValueRepresentation.from_bytes(self._trailing_bytes, self.header.endianness)
-            # move up the pointer
-            self._trailing_bytes = self._trailing_bytes[vb.size:]
+        while self._has_trailing_bytes():
+            # unpack the VarBind (moves up the pointer)
+            self.vbs.append(self._unpack_encoding(ValueRepresentation))
 
 
 class CommitSetPDU(PDU):
@@ -478,17 +562,11 @@ class ResponsePDU(PDU):
         super().__init__(header=header, payload=payload)
 
         if payload is not None:
-            self.sys_up_time, self.error, self.index = struct.unpack(
-                self.header.endianness + 'LHH', self._trailing_bytes[:8])
-            self._trailing_bytes = self._trailing_bytes[8:]
+            self.sys_up_time, self.error, self.index = self._unpack('LHH')
 
             self.values = []
-            bytes_read = 0
-            while self._trailing_bytes and bytes_read < self.header.payload_length - 8:
-                vr_next = ValueRepresentation.from_bytes(self._trailing_bytes, self.header.endianness)
-                self.values.append(vr_next)
-                bytes_read += vr_next.size
-                self._trailing_bytes = self._trailing_bytes[vr_next.size:]
+            while self._has_trailing_bytes():
+                self.values.append(self._unpack_encoding(ValueRepresentation))
 
         else:
             self.sys_up_time, self.error, self.index = sys_up_time, error, index
@@ -496,14 +574,19 @@ class ResponsePDU(PDU):
             self.values = list(values)
             self.header = self.header._replace(payload_length=self.payload_length)
 
-    def encode(self):
-        ret = super().encode()
-        fmt = self.header.endianness + 'LHH'
-        ret += struct.pack(fmt, self.sys_up_time, self.error, self.index)
-        if self.values:
-            for value in self.values:
-                ret += value.to_bytes(self.header.endianness)
-        return ret
+    def pack_payload_into(self, buffer, offset):
+        offset = super().pack_payload_into(buffer, offset)
+        compiled_struct(self.header.endianness + 'LHH').pack_into(
+            buffer, offset, self.sys_up_time, self.error, self.index)
+        offset += 8
+        endianness = self.header.endianness
+        for value in self.values:
+            offset = value.pack_into(buffer, offset, endianness)
+        return offset
+
+    @property
+    def payload_length(self):
+        return super().payload_length + 8 + sum(value.size for value in self.values)
 
     def make_response(self, lut):
         raise NotImplementedError(
@@ -2,7 +2,7 @@ import asyncio
 
 from . import logger, constants, exceptions
 from .encodings import ObjectIdentifier
-from .pdu import PDUHeader, PDUStream
+from .pdu import PDU, PDUHeader, PDUFrameBuffer
 from .pdu_implementations import RegisterPDU, ResponsePDU, OpenPDU
 
 
@@ -19,6 +19,7 @@ class AgentX(asyncio.Protocol):
         self.mib_table = mib_table
         self.closed = asyncio.Event()
         self.counter = 0
+        self.frame_buffer = PDUFrameBuffer()
 
     def send_pdu(self, pdu):
         write_bytes = pdu.encode()
@@ -119,7 +120,7 @@ class AgentX(asyncio.Protocol):
           other reason the subagent cannot send a reply, processing is
           complete.
 
-        :param data: Socket stream data (as byte string)
+        :param data: Socket stream data (as byte string), not necessarily aligned on PDU boundaries.
         """
         self.counter += 1
         if not (self.counter % constants.REPORTING_FREQUENCY):
@@ -127,22 +128,48 @@ class AgentX(asyncio.Protocol):
             # Ahh, ahh, ahh, ahh
             logger.debug("Parsed {} PDUs...".format(self.counter))
         try:
+            # only complete PDUs come out of the frame buffer, a trailing partial PDU waits for the next read.
+            self.frame_buffer.feed(data)
+            for pdu_bytes in self.frame_buffer:
+                self.process_pdu(pdu_bytes)
+        except exceptions.PDUUnpackError:
+            logger.exception('framing_error[{}]'.format(data))
+
+    def process_pdu(self, pdu_bytes):
+        """
+        Decodes a single, complete PDU and answers it. Errors are contained to the PDU.
+
+        :param pdu_bytes: bytes (or memoryview) holding exactly one PDU
+        """
+        stats = self.mib_table.stats
+        timed = stats.enabled
+        try:
+            if timed:
+                decode_start = stats.clock()
             # each PDU type implements it's own subclass and will be inferred at construction.
-            pdu_stream = PDUStream(data)
-            for pdu in pdu_stream:
-                if isinstance(pdu, ResponsePDU):
-                    # parse the response
-                    self.parse_response(pdu)
-                else:
-                    # a response will be returned if the current PDU warrants a response
-                    response_pdu = pdu.make_response(self.mib_table)
-                    self.transport.write(response_pdu.encode())
+            pdu = PDU.decode(pdu_bytes)
+            if isinstance(pdu, ResponsePDU):
+                # parse the response
+                self.parse_response(pdu)
+            else:
+                if timed:
+                    decode_end = stats.clock()
+                # a response will be returned if the current PDU warrants a response
+                response_pdu = pdu.make_response(self.mib_table)
+                if timed:
+                    encode_start = stats.clock()
+                response_bytes = response_pdu.encode()
+                if timed:
+                    encode_end = stats.clock()
+                    stats.record_pdu(pdu.header.type_, encode_end - decode_start, decode_end - decode_start,
+                                     encode_end - encode_start, len(response_pdu.values))
+                self.transport.write(response_bytes)
         except exceptions.PDUUnpackError:
-            logger.exception('decode_error[{}]'.format(data))
+            logger.exception('decode_error[{}]'.format(bytes(pdu_bytes)))
         except exceptions.PDUPackError:
-            logger.exception('encode_error[{}]'.format(data))
+            logger.exception('encode_error[{}]'.format(bytes(pdu_bytes)))
         except Exception:
-            logger.exception("Uncaught AgentX proto error! [{}]".format(data))
+            logger.exception("Uncaught AgentX proto error! [{}]".format(bytes(pdu_bytes)))
 
     def pause_writing(self):
         logger.warning("AgentX buffer above high-water mark. Suspending PDU processing.")
@@ -155,4 +182,5 @@ class AgentX(asyncio.Protocol):
         logger.info("AgentX socket connection closed.")
         if isinstance(exc, Exception):
             logger.error(exc)
+        self.mib_table.close_session(self.session_id)
         self.closed.set()
@@ -0,0 +1,233 @@
+"""
+Request instrumentation: latency histograms per PDU type and per registered prefix.
+"""
+import time
+
+from .constants import PduTypes
+
+"""
+Instrumentation levels:
+  - STATS_DISABLED: nothing is recorded.
+  - STATS_BASIC: per PDU type latency, decode/encode time and varbind counts. A handful of clock reads per PDU,
+    cheap enough to stay on.
+  - STATS_DETAILED: also times every varbind lookup against the registered prefix it resolved to.
+"""
+STATS_DISABLED = 0
+STATS_BASIC = 1
+STATS_DETAILED = 2
+
+"""
+Each power of two is split in 2^SUB_BUCKET_BITS linear buckets, i.e. a recorded value is known within 1/16th.
+"""
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+"""
+Percentiles reported by LatencyHistogram.summary().
+"""
+SUMMARY_PERCENTILES = (50, 90, 99, 99.9)
+
+"""
+Weight of the latest update cycle in UpdaterTelemetry.average_duration (exponential moving average).
+"""
+DURATION_AVERAGE_WEIGHT = 0.2
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of nanosecond latencies: values below 2 * SUB_BUCKET_COUNT are counted exactly,
+    larger ones in SUB_BUCKET_COUNT buckets per power of two. Recording is O(1) and memory grows with the
+    dynamic range of the values, not their count.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket_index(value):
+        length = value.bit_length()
+        if length <= SUB_BUCKET_BITS + 1:
+            return value
+        shift = length - SUB_BUCKET_BITS - 1
+        # (value >> shift) is in [SUB_BUCKET_COUNT, 2 * SUB_BUCKET_COUNT)
+        return shift * SUB_BUCKET_COUNT + (value >> shift)
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        if index < 2 * SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_COUNT - 1
+        top = index - shift * SUB_BUCKET_COUNT
+        return ((top + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        :param value: latency in nanoseconds.
+        """
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """
+        :return: the highest value equivalent to the `percent` percentile (nanoseconds), None if empty.
+        """
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        """
+        :return: dict of the count, mean, min, max and SUMMARY_PERCENTILES, in microseconds.
+        """
+        summary = {'count': self.count}
+        if not self.count:
+            return summary
+        summary['mean_us'] = self.total / self.count / 1000
+        summary['min_us'] = self.min / 1000
+        summary['max_us'] = self.max / 1000
+        for percent in SUMMARY_PERCENTILES:
+            summary['p{}_us'.format(percent)] = self.percentile(percent) / 1000
+        return summary
+
+
+class PDUStats:
+    """
+    Counters of one PDU type.
+    """
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.decode = LatencyHistogram()
+        self.encode = LatencyHistogram()
+        self.varbinds = 0
+
+    def summary(self):
+        return {
+            'latency': self.latency.summary(),
+            'decode': self.decode.summary(),
+            'encode': self.encode.summary(),
+            'varbinds': self.varbinds,
+        }
+
+
+class AgentStats:
+    """
+    Request instrumentation shared by the AgentX protocol (per PDU) and the MIBTable (per varbind lookup).
+    """
+    clock = staticmethod(time.perf_counter_ns)
+
+    def __init__(self, level=STATS_BASIC):
+        self.level = level
+        self.reset()
+
+    @property
+    def enabled(self):
+        return self.level >= STATS_BASIC
+
+    @property
+    def detailed(self):
+        return self.level >= STATS_DETAILED
+
+    def reset(self):
+        # PduTypes -> PDUStats
+        self.pdus = {}
+        # prefix tuple -> LatencyHistogram
+        self.prefixes = {}
+
+    def record_pdu(self, pdu_type, latency, decode, encode, varbinds):
+        """
+        :param pdu_type: PduTypes of the request.
+        :param latency: time from the start of decoding to the end of encoding the response (nanoseconds).
+        :param decode: time spent decoding the request (nanoseconds).
+        :param encode: time spent encoding the response (nanoseconds).
+        :param varbinds: number of varbinds in the response.
+        """
+        stats = self.pdus.get(pdu_type)
+        if stats is None:
+            stats = self.pdus[pdu_type] = PDUStats()
+        stats.latency.record(latency)
+        stats.decode.record(decode)
+        stats.encode.record(encode)
+        stats.varbinds += varbinds
+
+    def record_lookup(self, prefix, latency):
+        """
+        :param prefix: registered prefix (tuple) the varbind resolved to, None if it matched none.
+        :param latency: lookup time (nanoseconds).
+        """
+        histogram = self.prefixes.get(prefix)
+        if histogram is None:
+            histogram = self.prefixes[prefix] = LatencyHistogram()
+        histogram.record(latency)
+
+    def summary(self):
+        """
+        :return: {'pdus': {pdu type name: PDUStats summary}, 'prefixes': {dotted prefix: latency summary}}
+        """
+        return {
+            'pdus': {PduTypes(pdu_type).name: stats.summary() for pdu_type, stats in self.pdus.items()},
+            'prefixes': {_dotted(prefix): histogram.summary()
+                         for prefix, histogram in self.prefixes.items()},
+        }
+
+
+class UpdaterTelemetry:
+    """
+    Health of one MIBUpdater, recorded by its update cycles. Durations are in seconds.
+    """
+
+    def __init__(self):
+        self.update_count = 0
+        self.reinit_count = 0
+        self.exception_count = 0
+        self.last_duration = None
+        self.average_duration = None
+        # the update interval computed after the last cycle, before randomization (see MIBUpdater)
+        self.next_interval = None
+        # time.time() at the end of the last successful cycle
+        self.last_update_time = None
+
+    def record_cycle(self, duration, succeeded):
+        self.last_duration = duration
+        if self.average_duration is None:
+            self.average_duration = duration
+        else:
+            self.average_duration += DURATION_AVERAGE_WEIGHT * (duration - self.average_duration)
+        if succeeded:
+            self.update_count += 1
+            self.last_update_time = time.time()
+        else:
+            self.exception_count += 1
+
+    def snapshot_age(self):
+        """
+        :return: seconds since the last successful cycle, None before the first one.
+        """
+        if self.last_update_time is None:
+            return None
+        return max(0.0, time.time() - self.last_update_time)
+
+
+def _dotted(prefix):
+    if prefix is None:
+        return None
+    return '.' + '.'.join(str(sub_id) for sub_id in prefix)
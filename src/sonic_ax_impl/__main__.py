@@ -9,6 +9,7 @@ from swsscommon import swsscommon
 
 import ax_interface
 import sonic_ax_impl
+from ax_interface.mib import deferred_updater_init
 
 from .utils.arg_parser import process_options
 from . import mibs
@@ -109,6 +110,9 @@ if __name__ == "__main__":
         # syslog was unavailable when it should've been.
         sonic_ax_impl.logger.warning("Syslog is unavailable. Logging to STDERR.")
 
-    from .main import main
+    # the MIB updaters are constructed once the agent starts, after it began connecting to the master agent
+    with deferred_updater_init():
+        from .main import main
 
-    main(enable_dynamic_frequency=args.get('enable_dynamic_frequency'), update_frequency=args.get('update_frequency'))
+    main(enable_dynamic_frequency=args.get('enable_dynamic_frequency'), update_frequency=args.get('update_frequency'),
+         update_workers=args.get('update_workers'), update_processes=args.get('update_processes', False))
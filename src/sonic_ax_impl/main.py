@@ -4,15 +4,37 @@ SNMP subagent entrypoint.
 
 import asyncio
 import functools
+import importlib
 import os
 import signal
 import sys
+import time
 
 import ax_interface
-from sonic_ax_impl.mibs import ieee802_1ab, Namespace
+from sonic_ax_impl.mibs import Namespace
 from . import logger
-from .mibs.ietf import rfc1213, rfc2737, rfc2863, rfc3433, rfc4292, rfc4363
-from .mibs.vendor import dell, cisco
+
+
+def import_mib_module(name):
+    """
+    Imports a MIB module and traces the time it took (see also MIBTable.initialize_updaters).
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(name, __package__)
+    logger.info("MIB module {} imported in {:.3f}s".format(module.__name__, time.perf_counter() - start))
+    return module
+
+
+ieee802_1ab = import_mib_module('.mibs.ieee802_1ab')
+telemetry = import_mib_module('.mibs.telemetry')
+rfc1213 = import_mib_module('.mibs.ietf.rfc1213')
+rfc2737 = import_mib_module('.mibs.ietf.rfc2737')
+rfc2863 = import_mib_module('.mibs.ietf.rfc2863')
+rfc3433 = import_mib_module('.mibs.ietf.rfc3433')
+rfc4292 = import_mib_module('.mibs.ietf.rfc4292')
+rfc4363 = import_mib_module('.mibs.ietf.rfc4363')
+dell = import_mib_module('.mibs.vendor.dell')
+cisco = import_mib_module('.mibs.vendor.cisco')
 
 # Background task update frequency ( in seconds )
 DEFAULT_UPDATE_FREQUENCY = 5
@@ -41,6 +63,7 @@ class SonicMIB(
     cisco.ciscoPfcExtMIB.cpfcIfPriorityTable,
     cisco.ciscoSwitchQosMIB.csqIfQosGroupStatsTable,
     cisco.ciscoEntityFruControlMIB.cefcFruPowerStatusTable,
+    telemetry.SonicSubagentTelemetryMIB,
 ):
     """
     If SONiC was to create custom MIBEntries, they may be specified here.
@@ -54,14 +77,16 @@ def shutdown(signame, agent):
     shutdown_task = event_loop.create_task(agent.shutdown())
 
 
-def main(enable_dynamic_frequency=False, update_frequency=None):
+def main(enable_dynamic_frequency=False, update_frequency=None, update_workers=None, update_processes=False):
     global event_loop
 
     try:
         Namespace.init_sonic_db_config()
 
         # initialize handler and set update frequency (or use the default)
-        agent = ax_interface.Agent(SonicMIB, enable_dynamic_frequency, update_frequency or DEFAULT_UPDATE_FREQUENCY, event_loop)
+        agent = ax_interface.Agent(SonicMIB, enable_dynamic_frequency, update_frequency or DEFAULT_UPDATE_FREQUENCY, event_loop,
+                                   update_workers=update_workers or 0,
+                                   update_processes=update_processes)
 
         # add "shutdown" signal handlers
         # https://docs.python.org/3.5/library/asyncio-eventloop.html#set-signal-handlers-for-sigint-and-sigterm
@@ -1,12 +1,20 @@
+import asyncio
+import hashlib
+import json
 import pprint
 import re
 import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+from swsscommon import swsscommon
 from swsscommon.swsscommon import SonicV2Connector
 from swsscommon.swsscommon import SonicDBConfig
 from sonic_py_common import port_util
 from sonic_py_common.port_util import get_index_from_str
-from ax_interface.mib import MIBUpdater
+from ax_interface.mib import MIBUpdater, DEFAULT_REINIT_RATE, DEFAULT_UPDATE_FREQUENCY
 from ax_interface.util import oid2tuple
 from sonic_ax_impl import logger
 from sonic_py_common import multi_asic
@@ -46,6 +54,89 @@ RIF_DROPS_AGGR_MAP = {
 
 redis_kwargs = {'unix_socket_path': '/var/run/redis/redis.sock'}
 
+# the DBs connected by Namespace.init_namespace_dbs()
+NAMESPACE_DB_NAMES = [APPL_DB, COUNTERS_DB, CONFIG_DB, STATE_DB, ASIC_DB, SNMP_OVERLAY_DB]
+
+"""
+How old the snapshot published by the PortCounterCache may get before a reader polls the counters itself
+(in seconds). The PortCounterUpdater publishes one per update cycle (the default frequency of 5 seconds
+jittered by +2), so the readers only poll when it stopped or fell far behind.
+"""
+PORT_COUNTER_CACHE_MAX_AGE = 3 * DEFAULT_UPDATE_FREQUENCY
+
+"""
+Number of keys asked per SCAN call, Redis serves its other clients (syncd, orchagent...) between the calls.
+"""
+SCAN_COUNT = 1000
+
+"""
+Maximum number of namespaces the Namespace helpers read concurrently.
+"""
+NAMESPACE_FANOUT_WORKERS = 8
+
+"""
+Number of hashes read per GET_ALL_MANY_SCRIPT call, the script holds Redis while it runs.
+"""
+GET_ALL_MANY_BATCH_SIZE = 256
+
+"""
+HGETALL (HMGET of the ARGV fields if any) of every hash of KEYS in one round trip, for the connectors
+without a redis-py pipeline (swsscommon DBConnector). The replies are JSON encoded: runRedisScript only
+returns a list of strings.
+"""
+GET_ALL_MANY_SCRIPT = """
+local result = {}
+for i, key in ipairs(KEYS) do
+    if #ARGV > 0 then
+        result[i] = redis.call('HMGET', key, unpack(ARGV))
+    else
+        result[i] = redis.call('HGETALL', key)
+    end
+end
+return {cjson.encode(result)}
+"""
+
+# SCRIPT LOAD replies the SHA1 of the script: the same for every Redis, no need to ask each of them
+GET_ALL_MANY_SCRIPT_SHA = hashlib.sha1(GET_ALL_MANY_SCRIPT.encode()).hexdigest()
+
+"""
+Number of pending keyspace notifications above which a KeyspaceEvents user reads its whole table again
+instead of applying them one by one.
+"""
+KEYSPACE_MAX_PENDING_EVENTS = 10000
+
+# lazily created executor of map_namespaces(), see _get_namespace_executor()
+_namespace_executor = None
+_namespace_executor_lock = threading.Lock()
+# marks the threads of _namespace_executor
+_namespace_worker = threading.local()
+
+def _init_namespace_worker():
+    _namespace_worker.active = True
+
+
+def _get_namespace_executor():
+    global _namespace_executor
+    with _namespace_executor_lock:
+        if _namespace_executor is None:
+            _namespace_executor = ThreadPoolExecutor(max_workers=NAMESPACE_FANOUT_WORKERS,
+                                                     thread_name_prefix='namespace_fanout',
+                                                     initializer=_init_namespace_worker)
+        return _namespace_executor
+
+
+def map_namespaces(func, dbs):
+    """
+    Runs func(db_conn) for all the namespace connectors concurrently, each connector is only used by one thread.
+    The wall-clock time is the one of the slowest namespace instead of their sum.
+    A single connector, or a call from a fan-out thread, runs inline.
+    :return: the results in the order of dbs.
+    """
+    if len(dbs) < 2 or getattr(_namespace_worker, 'active', False):
+        return [func(db_conn) for db_conn in dbs]
+    return list(_get_namespace_executor().map(func, dbs))
+
+
 def get_neigh_info(neigh_key):
     """
     split neigh_key string of the format:
@@ -517,15 +608,92 @@ def clear_pubsub_msg(pubsub):
             break
 
 
+class KeyspaceEvents:
+    """
+    Keyspace notifications of the keys matching `pattern`, in one DB of each namespace. Lets an updater
+    keep a table current by applying the changes of its keys, instead of reading the whole table every update.
+
+    Usage: subscribe() right before reading the whole table, then apply the events returned by poll() on
+    each update. Read the whole table again (subscribe() first) whenever poll() returns None.
+    """
+
+    # events removing a key, the other events change it
+    DELETE_EVENTS = ('del', 'expired', 'evicted')
+
+    def __init__(self, dbs, db_name, pattern, max_pending=KEYSPACE_MAX_PENDING_EVENTS):
+        self.dbs = dbs
+        self.db_name = db_name
+        self.pattern = pattern
+        self.max_pending = max_pending
+        self.pubsub = [None] * len(dbs)
+
+    def subscribe(self):
+        """
+        Subscribes in the namespaces not subscribed to yet and drops the pending notifications elsewhere,
+        the read of the table that follows covers them.
+        """
+        for db_index, db_conn in enumerate(self.dbs):
+            if self.pubsub[db_index] is None:
+                self.pubsub[db_index] = get_redis_pubsub(db_conn, self.db_name, self.pattern)
+            else:
+                clear_pubsub_msg(self.pubsub[db_index])
+
+    def reset(self):
+        """
+        Drops the subscriptions, e.g. when their connections are reinitialized.
+        """
+        self.pubsub = [None] * len(self.dbs)
+
+    def poll(self):
+        """
+        :return: {(db index, key): latest event} of the notifications pending since the previous poll,
+                 None if the table must be read again: a subscription is missing (see subscribe())
+                 or there were more than `max_pending` notifications.
+        """
+        if any(pubsub is None for pubsub in self.pubsub):
+            return None
+
+        events = {}
+        count = 0
+        for db_index, pubsub in enumerate(self.pubsub):
+            try:
+                while True:
+                    msg = pubsub.get_message()
+                    if not msg:
+                        break
+
+                    data = msg['data']  # event data
+                    if not isinstance(data, str):
+                        continue
+
+                    count += 1
+                    if count > self.max_pending:
+                        logger.info("More than {} notifications pending on {} {}".format(self.max_pending, self.db_name, self.pattern))
+                        return None
+                    # channel: __keyspace@<db>__:<key>
+                    events[(db_index, msg["channel"].split(":", maxsplit=1)[-1])] = data
+            except Exception:
+                # the notifications missed while the subscription was broken are gone
+                self.pubsub[db_index] = None
+                raise
+        return events
+
+
 class RedisOidTreeUpdater(MIBUpdater):
     def __init__(self, prefix_str):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
+        self.db_conn = Namespace.borrow_namespace_dbs()
         if prefix_str.startswith('.'):
             prefix_str = prefix_str[1:]
         self.prefix_str = prefix_str
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
+
+    async def prefetch_data(self, reinit):
+        self.prefetched['keys'] = await Namespace.dbs_keys_async(self.db_conn, SNMP_OVERLAY_DB, self.prefix_str + '*')
+
     def get_next(self, sub_id):
         """
         :param sub_id: The 1-based sub-identifier query.
@@ -547,7 +715,7 @@ class RedisOidTreeUpdater(MIBUpdater):
         self.oid_list = []
         self.oid_map = {}
 
-        keys = Namespace.dbs_keys(self.db_conn, SNMP_OVERLAY_DB, self.prefix_str + '*')
+        keys = self.take_prefetched('keys', lambda: Namespace.dbs_keys(self.db_conn, SNMP_OVERLAY_DB, self.prefix_str + '*'))
         # TODO: fix db_conn.keys to return empty list instead of None if there is no match
         if keys is None:
             keys = []
@@ -618,10 +786,24 @@ class Namespace:
             db_map[db_conn.namespace] = db_conn
         return db_map
 
+    @staticmethod
+    def borrow_namespace_dbs():
+        """
+        Same as init_namespace_dbs(), but the connectors are shared with the other borrowers through
+        the ConnectorPool: only for updaters whose cycles run on the event loop, one at a time.
+        """
+        return ConnectorPool.get().borrow()
+
+    @staticmethod
+    def release_namespace_dbs(dbs):
+        """
+        Gives back connectors returned by borrow_namespace_dbs(), from the shutdown() of the borrowing updater.
+        """
+        ConnectorPool.get().release(dbs)
+
     @staticmethod
     def connect_namespace_dbs(dbs):
-        list_of_dbs = [APPL_DB, COUNTERS_DB, CONFIG_DB, STATE_DB, ASIC_DB, SNMP_OVERLAY_DB]
-        for db_name in list_of_dbs:
+        for db_name in NAMESPACE_DB_NAMES:
             Namespace.connect_all_dbs(dbs, db_name)
 
     @staticmethod
@@ -629,16 +811,110 @@ class Namespace:
         for db_conn in dbs:
             db_conn.connect(db_name)
 
+    @staticmethod
+    def scan(db_conn, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        Cursor based replacement of db_conn.keys(): unlike KEYS, which blocks Redis
+        while it walks the whole keyspace, each SCAN call only walks `count` keys.
+        Yields the matching keys batch by batch, a key may be yielded more than once.
+        """
+        client = db_conn.get_redis_client(db_name)
+        if not hasattr(client, 'scan'):
+            # The connector does not expose a SCAN capable client.
+            keys = db_conn.keys(db_name, pattern)
+            if keys:
+                yield keys
+            return
+        cursor = 0
+        while True:
+            cursor, keys = client.scan(cursor, pattern, count)
+            if keys:
+                yield keys
+            if int(cursor) == 0:
+                return
+            # let the other threads run between the batches: this only helps the event loop when the scan
+            # runs on a worker thread (update executor, MIBUpdater.offload_update), on the loop use scan_async()
+            time.sleep(0)
+
+    @staticmethod
+    def scan_keys(db_conn, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        :return: the keys matching pattern, read with SCAN (see Namespace.scan).
+        """
+        keys = {}
+        for batch in Namespace.scan(db_conn, db_name, pattern, count):
+            keys.update(dict.fromkeys(batch))
+        return list(keys)
+
+    @staticmethod
+    async def scan_async(db_conn, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        Namespace.scan() for the event loop (see MIBUpdater.prefetch_data): yields to it between the SCAN calls,
+        the agent answers requests while the keyspace is walked.
+        """
+        client = db_conn.get_redis_client(db_name)
+        if not hasattr(client, 'scan'):
+            keys = db_conn.keys(db_name, pattern)
+            if keys:
+                yield keys
+            return
+        cursor = 0
+        while True:
+            cursor, keys = client.scan(cursor, pattern, count)
+            if keys:
+                yield keys
+            if int(cursor) == 0:
+                return
+            await asyncio.sleep(0)
+
+    @staticmethod
+    async def scan_keys_async(db_conn, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        :return: the keys matching pattern, read with Namespace.scan_async().
+        """
+        keys = {}
+        async for batch in Namespace.scan_async(db_conn, db_name, pattern, count):
+            keys.update(dict.fromkeys(batch))
+        return list(keys)
+
+    @staticmethod
+    async def dbs_keys_async(dbs, db_name, pattern='*'):
+        """
+        Namespace.dbs_keys() for the event loop, the namespaces are scanned one after the other.
+        """
+        result_keys = []
+        for db_conn in dbs:
+            result_keys.extend(await Namespace.scan_keys_async(db_conn, db_name, pattern))
+        return result_keys
+
+    @staticmethod
+    async def dbs_keys_namespace_async(dbs, db_name, pattern='*'):
+        """
+        Namespace.dbs_keys_namespace() for the event loop, the namespaces are scanned one after the other.
+        """
+        result_keys = {}
+        for db_index, db_conn in enumerate(dbs):
+            result_keys.update(dict.fromkeys(await Namespace.scan_keys_async(db_conn, db_name, pattern), db_index))
+        return result_keys
+
+    @staticmethod
+    def dbs_scan(dbs, db_name, pattern='*', count=SCAN_COUNT):
+        """
+        Namespace.scan() over the global and all namespace DBs.
+        Yields (db index, batch of keys).
+        """
+        for db_index, db_conn in enumerate(dbs):
+            for keys in Namespace.scan(db_conn, db_name, pattern, count):
+                yield db_index, keys
+
     @staticmethod
     def dbs_keys(dbs, db_name, pattern='*'):
         """
         db keys function execute on global and all namespace DBs.
         """
         result_keys=[]
-        for db_conn in dbs:
-            keys = db_conn.keys(db_name, pattern)
-            if keys is not None:
-                result_keys.extend(keys)
+        for keys in map_namespaces(lambda db_conn: Namespace.scan_keys(db_conn, db_name, pattern), dbs):
+            result_keys.extend(keys)
         return result_keys
 
     @staticmethod
@@ -649,11 +925,10 @@ class Namespace:
         and namespace(db index).
         """
         result_keys = {}
-        for db_index in range(len(dbs)):
-            keys = dbs[db_index].keys(db_name, pattern)
-            if keys is not None:
-                keys_ns = dict.fromkeys(keys, db_index)
-                result_keys.update(keys_ns)
+        ns_keys = map_namespaces(lambda db_conn: Namespace.scan_keys(db_conn, db_name, pattern), dbs)
+        for db_index, keys in enumerate(ns_keys):
+            keys_ns = dict.fromkeys(keys, db_index)
+            result_keys.update(keys_ns)
         return result_keys
 
     @staticmethod
@@ -670,12 +945,94 @@ class Namespace:
             tmp_kwargs['blocking'] = False
         else:
             tmp_kwargs = kwargs
-        for db_conn in dbs:
-            ns_result = db_conn.get_all(db_name, _hash, *args, **tmp_kwargs)
+        ns_results = map_namespaces(lambda db_conn: db_conn.get_all(db_name, _hash, *args, **tmp_kwargs), dbs)
+        for ns_result in ns_results:
             if ns_result:
                 result.update(ns_result)
         return result
 
+    @staticmethod
+    def dbs_get_all_many(dbs, db_name, keys_by_namespace, fields=None):
+        """
+        Bulk get_all: the hashes of each namespace are read with one pipelined
+        round trip to its DB (redis-py client), or one script call per
+        GET_ALL_MANY_BATCH_SIZE keys (swsscommon DBConnector), instead of one
+        get_all round trip per key.
+        keys_by_namespace - {namespace: list of hash keys}
+        fields - if set, only these fields of each hash are read (HMGET)
+        Return value: {namespace: {hash key: hash content, empty if missing}}
+        """
+        namespace_db_map = Namespace.get_namespace_db_map(dbs)
+        if fields is not None:
+            fields = list(fields)
+        namespaces = list(keys_by_namespace)
+        ns_results = map_namespaces(
+            lambda db_conn: Namespace._get_all_many(db_conn, db_name, list(keys_by_namespace[db_conn.namespace]), fields),
+            [namespace_db_map[namespace] for namespace in namespaces])
+        return dict(zip(namespaces, ns_results))
+
+    @staticmethod
+    def _get_all_many(db_conn, db_name, keys, fields):
+        if not keys:
+            return {}
+        client = db_conn.get_redis_client(db_name)
+        if not hasattr(client, 'pipeline') and hasattr(swsscommon, 'runRedisScript'):
+            return Namespace._get_all_many_script(client, keys, fields)
+        if not hasattr(client, 'pipeline'):
+            # Neither a redis-py client nor a swsscommon connector, one round trip per key.
+            result = {}
+            for key in keys:
+                value = db_conn.get_all(db_name, key, blocking=False) or {}
+                if fields is not None:
+                    value = {field: value[field] for field in fields if field in value}
+                result[key] = value
+            return result
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            if fields is None:
+                pipe.hgetall(key)
+            else:
+                pipe.hmget(key, fields)
+        values = pipe.execute()
+        if fields is None:
+            return {key: value or {} for key, value in zip(keys, values)}
+        # HMGET returns None for the fields missing from the hash
+        return {key: {field: field_value for field, field_value in zip(fields, value) if field_value is not None}
+                for key, value in zip(keys, values)}
+
+    @staticmethod
+    def _get_all_many_script(client, keys, fields):
+        """
+        Read the hashes through GET_ALL_MANY_SCRIPT, one round trip per GET_ALL_MANY_BATCH_SIZE keys.
+        """
+        result = {}
+        for start in range(0, len(keys), GET_ALL_MANY_BATCH_SIZE):
+            batch = keys[start:start + GET_ALL_MANY_BATCH_SIZE]
+            values = json.loads(Namespace._run_get_all_many_script(client, batch, fields or [])[0])
+            for key, value in zip(batch, values):
+                if fields is None:
+                    # HGETALL replies [field, value, ...], cjson encodes the empty ones as {}
+                    result[key] = dict(zip(value[::2], value[1::2])) if value else {}
+                else:
+                    # HMGET replies false for the fields missing from the hash
+                    result[key] = {field: field_value for field, field_value in zip(fields, value)
+                                   if field_value is not False}
+        return result
+
+    @staticmethod
+    def _run_get_all_many_script(client, keys, argv):
+        """
+        EVALSHA of GET_ALL_MANY_SCRIPT, the script is only loaded when this Redis doesn't know it
+        (first use, restart or SCRIPT FLUSH).
+        """
+        try:
+            return swsscommon.runRedisScript(client, GET_ALL_MANY_SCRIPT_SHA, keys, argv)
+        except RuntimeError as e:
+            if 'NOSCRIPT' not in str(e):
+                raise
+        swsscommon.loadRedisScript(client, GET_ALL_MANY_SCRIPT)
+        return swsscommon.runRedisScript(client, GET_ALL_MANY_SCRIPT_SHA, keys, argv)
+
     @staticmethod
     def get_non_host_dbs(dbs):
         """
@@ -697,8 +1054,7 @@ class Namespace:
         result_map = {}
         # list of return values
         result_list = []
-        for db_conn in Namespace.get_non_host_dbs(dbs):
-            ns_tuple = per_namespace_func(db_conn)
+        for ns_tuple in map_namespaces(per_namespace_func, Namespace.get_non_host_dbs(dbs)):
             for idx in range(len(ns_tuple)):
                 if idx not in result_map:
                     result_map[idx] = ns_tuple[idx]
@@ -714,8 +1070,7 @@ class Namespace:
         get_bridge_port_map from all namespace DBs
         """
         if_br_oid_map = {}
-        for db_conn in Namespace.get_non_host_dbs(dbs):
-            if_br_oid_map_ns = port_util.get_bridge_port_map(db_conn)
+        for if_br_oid_map_ns in map_namespaces(port_util.get_bridge_port_map, Namespace.get_non_host_dbs(dbs)):
             if_br_oid_map.update(if_br_oid_map_ns)
         return if_br_oid_map
 
@@ -727,3 +1082,384 @@ class Namespace:
             if vlan_obj is not None:
                 return port_util.get_vlan_id_from_bvid(db_conn, bvid)
         return None
+
+
+class InterfaceDirectory:
+    """
+    Process wide owner of the interface maps (init_sync_d_interface_tables) and
+    LAG maps (init_sync_d_lag_tables) of all namespaces. The updaters get them
+    from here instead of each reading the same tables on reinit.
+    The directory reads the maps once per refresh round: the first updater asking
+    in a round triggers the read, the others get the maps of that read. The rounds
+    are aligned on the monotonic clock, so the jittered updater timers do not matter.
+    generation is bumped whenever a read finds different maps: an updater deriving
+    its own structures from the maps only needs to do it again when it changed.
+    The maps are shared by all the updaters: copy them before modifying them.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # length of the refresh rounds (in seconds), 0 reads on every call: the interface maps
+    # are read once per reinit round, the LAG maps, read by some updaters on every update,
+    # once per update round
+    interface_period = DEFAULT_REINIT_RATE
+    lag_period = DEFAULT_UPDATE_FREQUENCY
+
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.db_conn = None
+        self.reconnect = False
+        self.generation = 0
+        # per namespace function -> (round of the read, maps)
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        :return: the directory of the namespaces in the loaded DB config.
+        """
+        Namespace.init_sonic_db_config()
+        namespaces = tuple(SonicDBConfig.get_ns_list())
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance.namespaces != namespaces:
+                cls._instance = cls(namespaces)
+            return cls._instance
+
+    def interface_tables(self):
+        """
+        :return: tuple(if_name_map, if_alias_map, if_id_map, oid_name_map)
+        """
+        return self._get_tables(init_sync_d_interface_tables, self.interface_period)
+
+    def lag_tables(self):
+        """
+        :return: tuple(lag_name_if_name_map, if_name_lag_name_map, oid_lag_name_map, lag_sai_map, sai_lag_map)
+        """
+        return self._get_tables(init_sync_d_lag_tables, self.lag_period)
+
+    def _get_tables(self, per_namespace_func, period):
+        with self.lock:
+            refresh_round = time.monotonic() // period if period > 0 else None
+            cached = self.tables.get(per_namespace_func)
+            if cached is not None and refresh_round is not None and cached[0] == refresh_round:
+                return cached[1]
+
+            if self.db_conn is None:
+                self.db_conn = Namespace.init_namespace_dbs()
+            elif self.reconnect:
+                Namespace.connect_namespace_dbs(self.db_conn)
+                self.reconnect = False
+            try:
+                tables = tuple(Namespace.get_sync_d_from_all_namespace(per_namespace_func, self.db_conn))
+            except Exception:
+                self.reconnect = True
+                raise
+
+            if cached is None or cached[1] != tables:
+                self.generation += 1
+            self.tables[per_namespace_func] = (refresh_round, tables)
+            return tables
+
+
+"""
+Counters published by the PortCounterCache: {sai_id_key: {column: int value}} of the columns, read at read_time.
+"""
+CounterSnapshot = namedtuple('CounterSnapshot', ('read_time', 'columns', 'counters'))
+
+
+class PortCounterCache:
+    """
+    Process wide snapshot of the COUNTERS_DB port and router interface counters.
+    The updaters serving port counters (rfc1213, rfc2863 and cpfcIfTable) register the ports
+    and columns they serve when reading the snapshot. Its owner, the PortCounterUpdater, polls
+    the union of them once per update cycle and publishes a new snapshot: the readers never
+    wait for each other, and each hash is read once per cycle instead of once per updater.
+    A reader only polls itself when the snapshot misses its ports or columns (e.g. on its first
+    cycle) or is older than max_age.
+    The counters are shared by all the updaters: copy them before modifying them.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    max_age = PORT_COUNTER_CACHE_MAX_AGE
+
+    # the router interface counters aggregated into the port counters
+    RIF_COLUMNS = tuple(sorted(set(RIF_COUNTERS_AGGR_MAP.values()) | set(RIF_DROPS_AGGR_MAP.values())))
+
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.db_conn = None
+        self.reconnect = False
+        # reader -> (sai_id_keys, columns) it serves
+        self.port_readers = {}
+        self.rif_readers = {}
+        # replaced as a whole by the polls, the readers do not lock
+        self.port_snapshot = CounterSnapshot(None, frozenset(), {})
+        self.rif_snapshot = CounterSnapshot(None, frozenset(self.RIF_COLUMNS), {})
+        # serializes the polls (of the owner and of the readers finding the snapshot stale)
+        self.poll_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        :return: the cache of the namespaces in the loaded DB config.
+        """
+        Namespace.init_sonic_db_config()
+        namespaces = tuple(SonicDBConfig.get_ns_list())
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance.namespaces != namespaces:
+                cls._instance = cls(namespaces)
+            return cls._instance
+
+    def port_counters(self, reader, sai_id_keys, columns):
+        """
+        :param reader: the updater reading the counters, the polls read its ports and columns
+                       until it reads others.
+        :param sai_id_keys: the namespace:sai id keys of the ports.
+        :param columns: the counters needed by the reader.
+        :return: {sai_id_key: {column: int value}} holding at least the given ports, the counters
+                 missing in COUNTERS_DB or not holding an integer are absent.
+        """
+        self.port_readers[reader] = (sai_id_keys, tuple(columns))
+        return self._read_snapshot('port_snapshot', self._poll_ports, sai_id_keys, columns)
+
+    def rif_counters(self, reader, sai_id_keys):
+        """
+        The router interface counters are read from all the namespaces, as the VLAN
+        interface sai ids do not carry their namespace.
+        :param reader: the updater reading the counters.
+        :param sai_id_keys: the (namespace:)sai id keys of the router interfaces.
+        :return: {sai_id_key: {column: int value}} of the RIF_COLUMNS, holding at least the given
+                 router interfaces.
+        """
+        self.rif_readers[reader] = (sai_id_keys, self.RIF_COLUMNS)
+        return self._read_snapshot('rif_snapshot', self._poll_rifs, sai_id_keys, self.RIF_COLUMNS)
+
+    def poll(self):
+        """
+        Reads the counters registered by all the readers and publishes them.
+        """
+        with self.poll_lock:
+            self._poll_ports()
+            self._poll_rifs()
+
+    def _read_snapshot(self, snapshot_name, poll, sai_id_keys, columns):
+        snapshot = getattr(self, snapshot_name)
+        if self._serves(snapshot, sai_id_keys, columns):
+            return snapshot.counters
+
+        with self.poll_lock:
+            # published by another poll while waiting for the lock?
+            snapshot = getattr(self, snapshot_name)
+            if not self._serves(snapshot, sai_id_keys, columns):
+                poll()
+                snapshot = getattr(self, snapshot_name)
+            return snapshot.counters
+
+    def _serves(self, snapshot, sai_id_keys, columns):
+        return (snapshot.read_time is not None
+                and time.monotonic() - snapshot.read_time < self.max_age
+                and snapshot.columns.issuperset(columns)
+                and all(sai_id_key in snapshot.counters for sai_id_key in sai_id_keys))
+
+    def _poll_ports(self):
+        sai_id_keys = set()
+        columns = set()
+        # copied first, the readers register from their own threads
+        for reader_keys, reader_columns in list(self.port_readers.values()):
+            sai_id_keys.update(reader_keys)
+            columns.update(reader_columns)
+        read_time = time.monotonic()
+        counters = self._read_counters(sai_id_keys, sorted(columns), False)
+        self.port_snapshot = CounterSnapshot(read_time, frozenset(columns), counters)
+
+    def _poll_rifs(self):
+        sai_id_keys = set()
+        for reader_keys, _ in list(self.rif_readers.values()):
+            sai_id_keys.update(reader_keys)
+        read_time = time.monotonic()
+        counters = self._read_counters(sai_id_keys, self.RIF_COLUMNS, True)
+        self.rif_snapshot = CounterSnapshot(read_time, frozenset(self.RIF_COLUMNS), counters)
+
+    def _read_counters(self, sai_id_keys, fields, all_namespaces):
+        if not sai_id_keys:
+            return {}
+
+        if self.db_conn is None:
+            self.db_conn = Namespace.init_namespace_dbs()
+        elif self.reconnect:
+            Namespace.connect_namespace_dbs(self.db_conn)
+            self.reconnect = False
+
+        sai_ids = {sai_id_key: split_sai_id_key(sai_id_key) for sai_id_key in sai_id_keys}
+        tables = {}
+        namespaces = Namespace.get_namespace_db_map(self.db_conn)
+        for namespace, sai_id in sai_ids.values():
+            for table_namespace in (namespaces if all_namespaces else (namespace,)):
+                tables.setdefault(table_namespace, set()).add(counter_table(sai_id))
+        try:
+            counters = Namespace.dbs_get_all_many(self.db_conn, COUNTERS_DB, tables, fields=fields)
+        except Exception:
+            self.reconnect = True
+            raise
+
+        result = {}
+        for sai_id_key, (namespace, sai_id) in sai_ids.items():
+            values = {}
+            for table_namespace in (namespaces if all_namespaces else (namespace,)):
+                values.update(counters[table_namespace][counter_table(sai_id)])
+            result[sai_id_key] = self._parse_counters(sai_id_key, values)
+        return result
+
+    @staticmethod
+    def _parse_counters(sai_id_key, values):
+        # a malformed value only fails its own counter, not the port and the updaters sharing it
+        counters = {}
+        for counter, value in values.items():
+            try:
+                counters[counter] = int(value)
+            except ValueError:
+                logger.warning("SyncD 'COUNTERS_DB' {} of {} is not an integer: '{}'.".format(counter, sai_id_key, value))
+        return counters
+
+
+class PortCounterUpdater(MIBUpdater):
+    """
+    Owner of the PortCounterCache: polls the counters of its readers once per update cycle.
+    The MIBs of the readers all reference the shared instance (see get()), the MIBTable runs it once.
+    """
+    thread_safe_update = True
+    offload_update = True
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        :return: the updater polling the PortCounterCache.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def reinit_data(self):
+        """
+        The readers register their ports on every read, nothing to reinitialize.
+        """
+        pass
+
+    def update_data(self):
+        PortCounterCache.get().poll()
+
+
+class ConnectorPool:
+    """
+    Process wide pool of the namespace connectors. A connector holds one connection per DB of
+    NAMESPACE_DB_NAMES, so the pool holds one connection per (namespace, DB), shared by the
+    updaters running on the event loop instead of each opening its own.
+    reconnect() checks every (namespace, DB) connection and only reconnects the broken ones,
+    so after a redis restart the first updater reconnects the pool and the others find it healthy.
+    Every borrow() is matched by a release() when the borrowing updater shuts down with the agent
+    (see MIBUpdater.shutdown), the connections are closed when the last borrower released them.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # key probed by the health check, it does not need to exist
+    HEALTH_CHECK_KEY = 'SNMP_AGENT_HEALTH_CHECK'
+
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.db_conn = None
+        self.borrowers = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        :return: the pool of the namespaces in the loaded DB config.
+        """
+        Namespace.init_sonic_db_config()
+        namespaces = tuple(SonicDBConfig.get_ns_list())
+        with cls._instance_lock:
+            if cls._instance is None or cls._instance.namespaces != namespaces:
+                cls._instance = cls(namespaces)
+            return cls._instance
+
+    def borrow(self):
+        """
+        :return: the connectors of all namespaces, host namespace first (see Namespace.init_namespace_dbs).
+        """
+        with self.lock:
+            if self.db_conn is None:
+                self.db_conn = Namespace.init_namespace_dbs()
+            self.borrowers += 1
+            return self.db_conn
+
+    def release(self, db_conn):
+        """
+        Gives back connectors returned by borrow(), the connections are closed when the last borrower released them.
+        Connectors this pool does not hold (e.g. borrowed before a fork) are ignored.
+        """
+        with self.lock:
+            if db_conn is not self.db_conn or self.borrowers == 0:
+                return
+            self.borrowers -= 1
+            if self.borrowers > 0:
+                return
+            self.db_conn = None
+        for db in db_conn:
+            for db_name in NAMESPACE_DB_NAMES:
+                try:
+                    db.close(db_name)
+                except Exception:
+                    logger.exception("Failed to close {} of namespace '{}'".format(db_name, db.namespace))
+
+    def reconnect(self):
+        """
+        Reconnects the (namespace, DB) connections failing the health check.
+        """
+        with self.lock:
+            if self.db_conn is None:
+                return
+            for db in self.db_conn:
+                for db_name in NAMESPACE_DB_NAMES:
+                    if not self._is_healthy(db, db_name):
+                        logger.info("Reconnecting {} of namespace '{}'".format(db_name, db.namespace))
+                        db.connect(db_name)
+
+    def _is_healthy(self, db, db_name):
+        try:
+            db.exists(db_name, self.HEALTH_CHECK_KEY)
+            return True
+        except Exception:
+            return False
+
+
+def _reconnect_after_fork():
+    global _namespace_executor, _namespace_executor_lock
+    # a lock held by another thread of the agent process at fork time would never be released in the child
+    for shared in (InterfaceDirectory, PortCounterCache, ConnectorPool, PortCounterUpdater):
+        shared._instance_lock = threading.Lock()
+    if InterfaceDirectory._instance is not None:
+        InterfaceDirectory._instance.lock = threading.Lock()
+    if PortCounterCache._instance is not None:
+        PortCounterCache._instance.poll_lock = threading.Lock()
+    if ConnectorPool._instance is not None:
+        ConnectorPool._instance.lock = threading.Lock()
+        # the pooled connections stay in use by the agent process, the child borrows its own
+        ConnectorPool._instance.db_conn = None
+        ConnectorPool._instance.borrowers = 0
+    # an updater process inherits the connections of the shared caches, they stay in use by the agent process
+    for shared in (InterfaceDirectory._instance, PortCounterCache._instance):
+        if shared is not None and shared.db_conn is not None:
+            shared.reconnect = True
+    # the threads of the executor were not forked
+    _namespace_executor = None
+    _namespace_executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reconnect_after_fork)
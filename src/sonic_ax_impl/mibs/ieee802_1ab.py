@@ -115,15 +115,18 @@ class LLDPLocalSystemDataUpdater(MIBUpdater):
     def __init__(self):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
+        self.db_conn = Namespace.borrow_namespace_dbs()
         self.loc_chassis_data = {}
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
+
     def reinit_data(self):
         """
         Subclass update data routine.
         """
-        # establish connection to application database.
-        Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
+        # reconnect the broken connections of the shared connectors.
+        mibs.ConnectorPool.get().reconnect()
         self.loc_chassis_data = Namespace.dbs_get_all(self.db_conn, mibs.APPL_DB, mibs.LOC_CHASSIS_TABLE)
         if self.loc_chassis_data:
             self.loc_chassis_data['lldp_loc_sys_cap_supported'] = parse_sys_capability(self.loc_chassis_data.get('lldp_loc_sys_cap_supported', ''))
@@ -154,9 +157,7 @@ class LocPortUpdater(MIBUpdater):
     def __init__(self):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
-        # establish connection to application database.
-        Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
+        self.db_conn = Namespace.borrow_namespace_dbs()
         self.if_name_map = {}
         self.if_alias_map = {}
         self.if_id_map = {}
@@ -172,6 +173,9 @@ class LocPortUpdater(MIBUpdater):
         self.loc_port_data = {}
         self.pubsub = [None] * len(self.db_conn)
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
+
     def reinit_data(self):
         """
         Subclass update interface information
@@ -179,13 +183,15 @@ class LocPortUpdater(MIBUpdater):
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = mibs.InterfaceDirectory.get().interface_tables()
 
         self.mgmt_oid_name_map, \
         self.mgmt_alias_map = mibs.init_mgmt_interface_tables(self.db_conn[0])
 
-        # merge dataplane and mgmt ports
+        # merge dataplane and mgmt ports, in copies of the shared maps
+        self.oid_name_map = dict(self.oid_name_map)
         self.oid_name_map.update(self.mgmt_oid_name_map)
+        self.if_alias_map = dict(self.if_alias_map)
         self.if_alias_map.update(self.mgmt_alias_map)
 
         self.if_range = []
@@ -395,7 +401,7 @@ class LLDPRemTableUpdater(MIBUpdater):
     def __init__(self):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
+        self.db_conn = Namespace.borrow_namespace_dbs()
         self.if_name_map = {}
         self.if_alias_map = {}
         self.if_id_map = {}
@@ -409,6 +415,9 @@ class LLDPRemTableUpdater(MIBUpdater):
         # { sai_id -> { 'counter': 'value' } }
         self.lldp_counters = {}
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
+
     def reinit_data(self):
         """
         Subclass update interface information
@@ -416,10 +425,12 @@ class LLDPRemTableUpdater(MIBUpdater):
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = mibs.InterfaceDirectory.get().interface_tables()
 
         self.mgmt_oid_name_map, _ = mibs.init_mgmt_interface_tables(self.db_conn[0])
 
+        # merge dataplane and mgmt ports, in a copy of the shared map
+        self.oid_name_map = dict(self.oid_name_map)
         self.oid_name_map.update(self.mgmt_oid_name_map)
 
     def get_next(self, sub_id):
@@ -504,9 +515,7 @@ class LLDPRemManAddrUpdater(MIBUpdater):
     def __init__(self):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
-        # establish connection to application database.
-        Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
+        self.db_conn = Namespace.borrow_namespace_dbs()
         self.if_range = []
         self.oid_name_map = {}
         self.mgmt_oid_name_map = {}
@@ -572,18 +581,23 @@ class LLDPRemManAddrUpdater(MIBUpdater):
                 self.pubsub[i] = mibs.get_redis_pubsub(self.db_conn[i], self.db_conn[i].APPL_DB, pattern)
             self._update_per_namespace_data(self.pubsub[i])
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
+
     def reinit_data(self):
         """
         Subclass reinit data routine.
         """
-        _, _, _, self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        _, _, _, self.oid_name_map = mibs.InterfaceDirectory.get().interface_tables()
 
         self.mgmt_oid_name_map, _ = mibs.init_mgmt_interface_tables(self.db_conn[0])
 
+        # merge dataplane and mgmt ports, in a copy of the shared map
+        self.oid_name_map = dict(self.oid_name_map)
         self.oid_name_map.update(self.mgmt_oid_name_map)
 
-        # establish connection to application database.
-        Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
+        # reconnect the broken connections of the shared connectors.
+        mibs.ConnectorPool.get().reconnect()
 
         self.if_range = []
         for if_oid, if_name in self.oid_name_map.items():
@@ -1,12 +1,13 @@
+import csv
 import ipaddress
-import python_arptable
+import os
 import socket
 from enum import unique, Enum
 from bisect import bisect_right
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
-from ax_interface.mib import MIBMeta, ValueType, MIBUpdater, MIBEntry, SubtreeMIBEntry, OverlayAdpaterMIBEntry, OidMIBEntry
+from ax_interface.mib import MIBMeta, ValueType, MIBUpdater, MIBEntry, SubtreeMIBEntry, OverlayAdpaterMIBEntry, OidMIBEntry, SnapshotBuffer, PackedSnapshotBuffer
 from ax_interface.encodings import ObjectIdentifier
 from ax_interface.util import mac_decimals, ip2byte_tuple
 
@@ -53,86 +54,253 @@ class IfTypes(int, Enum):
     l3ipvlan       = 136
     ieee8023adLag  = 161
 
+# byte widths of the packed ipNetToMediaTable sub-ids: ifindex, then the 4 IPv4 address bytes
+ARP_KEY_WIDTHS = (4, 1, 1, 1, 1)
+
+NEIGH_TABLE_PATTERN = "NEIGH_TABLE:*"
+
+# the kernel ARP table, and its columns (as python_arptable names them)
+ARP_TABLE_PATH = '/proc/net/arp'
+ARP_TABLE_FIELDS = ['IP address', 'HW type', 'Flags', 'HW address', 'Mask', 'Device']
+
+
+def parse_arp_table(content):
+    """
+    :param content: the bytes read from ARP_TABLE_PATH.
+    :return: the entries of the kernel ARP table, as dicts keyed by ARP_TABLE_FIELDS.
+    """
+    reader = csv.DictReader(content.decode().splitlines(), fieldnames=ARP_TABLE_FIELDS,
+                            skipinitialspace=True, delimiter=' ')
+    # skip the header
+    next(reader, None)
+    return list(reader)
+
 class ArpUpdater(MIBUpdater):
+    thread_safe_update = True
+    snapshot_attributes = ('arp_dest_table',)
+    # the resyncs SCAN the whole table
+    offload_update = True
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
-        self.arp_dest_map = {}
-        self.arp_dest_list = []
-        self.arp_dest_map = {}
-        self.arp_dest_list = []
-        self.neigh_key_list = {}
+        # sub-id -> MAC address as a 48 bits int, kept from the NEIGH_TABLE keyspace notifications
+        # (and the kernel ARP table on multi-asic) in arp_dest_table.index
+        self.arp_dest_table = PackedSnapshotBuffer(ARP_KEY_WIDTHS, 'Q')
+        self.neigh_events = mibs.KeyspaceEvents(self.db_conn, mibs.APPL_DB, NEIGH_TABLE_PATTERN)
+        # rows of the kernel ARP table: sub-id -> (MAC, NEIGH_TABLE key of the neighbor), and the content they were parsed from
+        self.kernel_arp_rows = {}
+        self.arp_table_content = None
+        # (size, mtime) of ARP_TABLE_PATH when it was read, None if they don't follow its content
+        self.arp_table_signature = None
+        # read the whole NEIGH_TABLE on the next update_data()
+        self.resync = True
 
-    def reinit_data(self):
+    def reinit_connection(self):
         Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
-        self.neigh_key_list = Namespace.dbs_keys_namespace(self.db_conn, mibs.APPL_DB, "NEIGH_TABLE:*")
+        # notifications may have been lost along with the connections
+        self.neigh_events.reset()
+        self.resync = True
 
-    def _update_from_arptable(self):
-        for entry in python_arptable.get_arp_table():
-            dev = entry['Device']
-            mac = entry['HW address']
-            ip = entry['IP address']
-            self._update_arp_info(dev, mac, ip)
+    def reinit_data(self):
+        Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
 
-    def _update_from_db(self):
-        for neigh_key in self.neigh_key_list:
-            neigh_str = neigh_key
-            db_index = self.neigh_key_list[neigh_key]
-            neigh_info = self.db_conn[db_index].get_all(mibs.APPL_DB, neigh_key, blocking=False)
-            if not neigh_info:
-                continue
-            ip_family = neigh_info['family']
-            if ip_family == "IPv4":
-                dev, ip = mibs.get_neigh_info(neigh_str)
-                mac = neigh_info['neigh']
-                # eth0 interface in a namespace is not management interface
-                # but is a part of docker0 bridge. Ignore this interface.
-                if len(self.db_conn) > 1 and dev == "eth0":
-                    continue
-                self._update_arp_info(dev, mac, ip)
-
-    def _update_arp_info(self, dev, mac, ip):
+    def _arp_row(self, dev, mac, ip):
+        """
+        :return: (sub-id, MAC as an int) of a neighbor, None if it isn't in ipNetToMediaTable.
+        """
         if_index = mibs.get_index_from_str(dev)
-        if if_index is None: return
+        if if_index is None: return None
 
         mactuple = mac_decimals(mac)
-        machex = ''.join(chr(b) for b in mactuple)
         # if MAC is all zero
         #if not any(mac): continue
 
         iptuple = ip2byte_tuple(ip)
+        # ipNetToMediaTable only holds IPv4 neighbors
+        if len(iptuple) != 4: return None
 
         subid = (if_index,) + iptuple
-        self.arp_dest_map[subid] = machex
-        self.arp_dest_list.append(subid)
+        return subid, int.from_bytes(bytes(mactuple), 'big')
+
+    def _neigh_row(self, neigh_key, neigh_info):
+        """
+        :return: (sub-id, MAC as an int) of a NEIGH_TABLE entry, None if it isn't in ipNetToMediaTable.
+        """
+        if not neigh_info:
+            return None
+        ip_family = neigh_info['family']
+        if ip_family != "IPv4":
+            return None
+        dev, ip = mibs.get_neigh_info(neigh_key)
+        # eth0 interface in a namespace is not management interface
+        # but is a part of docker0 bridge. Ignore this interface.
+        if len(self.db_conn) > 1 and dev == "eth0":
+            return None
+        return self._arp_row(dev, neigh_info['neigh'], ip)
+
+    def update_neigh(self, db_index, neigh_key, event):
+        """
+        Applies a keyspace event of a NEIGH_TABLE key.
+        :return: True if the rows changed.
+        """
+        try:
+            dev, ip = mibs.get_neigh_info(neigh_key)
+        except ValueError:
+            # IPv6 neighbor
+            return False
+        if_index = mibs.get_index_from_str(dev)
+        if if_index is None:
+            return False
+        sub_id = (if_index,) + ip2byte_tuple(ip)
+        if sub_id in self.kernel_arp_rows:
+            # the kernel ARP table takes precedence
+            return False
+
+        index = self.arp_dest_table.index
+        row = None
+        if event not in mibs.KeyspaceEvents.DELETE_EVENTS:
+            row = self._read_neigh_row(neigh_key, (db_index,))
+        if row is None:
+            # the neighbor is gone from this namespace, another one may still hold it
+            row = self._read_neigh_row(neigh_key, [other for other in range(len(self.db_conn)) if other != db_index])
+        if row is not None:
+            return index.set(*row)
+        return index.remove(sub_id)
+
+    def _read_neigh_row(self, neigh_key, db_indexes):
+        """
+        :return: the row of the first NEIGH_TABLE entry of neigh_key found in the DBs of db_indexes, None if none.
+        """
+        for db_index in db_indexes:
+            neigh_info = self.db_conn[db_index].get_all(mibs.APPL_DB, neigh_key, blocking=False)
+            row = self._neigh_row(neigh_key, neigh_info)
+            if row is not None:
+                return row
+        return None
+
+    def update_from_arptable(self):
+        """
+        Applies the changes of the kernel ARP table. The table isn't read again while its size and mtime stay the
+        same, unless they can't tell (procfs reports a size of 0 and doesn't follow the content with the mtime), and
+        is only parsed again when its content changed. The rows are parsed from the same read.
+        :return: True if the rows changed.
+        """
+        stat = os.stat(ARP_TABLE_PATH)
+        signature = (stat.st_size, stat.st_mtime_ns) if stat.st_size else None
+        if signature is not None and signature == self.arp_table_signature:
+            return False
+        with open(ARP_TABLE_PATH, 'rb') as arp_table:
+            content = arp_table.read()
+        # a change made after the stat is caught by the next one
+        self.arp_table_signature = signature
+        if content == self.arp_table_content:
+            return False
+        self.arp_table_content = content
+
+        kernel_arp_rows = {}
+        for entry in parse_arp_table(content):
+            dev = entry['Device']
+            ip = entry['IP address']
+            row = self._arp_row(dev, entry['HW address'], ip)
+            if row is not None:
+                sub_id, mac = row
+                kernel_arp_rows[sub_id] = (mac, "NEIGH_TABLE:{}:{}".format(dev, ip))
+        removed = {sub_id: neigh_key for sub_id, (_, neigh_key) in self.kernel_arp_rows.items()
+                   if sub_id not in kernel_arp_rows}
+        self.kernel_arp_rows = kernel_arp_rows
+
+        changed = False
+        index = self.arp_dest_table.index
+        for sub_id, (mac, _) in kernel_arp_rows.items():
+            if index.set(sub_id, mac):
+                changed = True
+        for sub_id, neigh_key in removed.items():
+            changed = True
+            # fall back to the NEIGH_TABLE entry of the neighbor, if any
+            row = self._read_neigh_row(neigh_key, range(len(self.db_conn)))
+            if row is not None:
+                index.set(*row)
+            else:
+                index.remove(sub_id)
+        return changed
+
+    def resync_neighbors(self):
+        """
+        Reads the whole NEIGH_TABLE again. The keyspace notifications are subscribed to before the read,
+        a change made during the read is then applied by the next update_data().
+        """
+        self.neigh_events.subscribe()
+
+        arp_dest_rows = {}
+        neigh_keys = {db_conn.namespace: Namespace.scan_keys(db_conn, mibs.APPL_DB, NEIGH_TABLE_PATTERN)
+                      for db_conn in self.db_conn}
+        neighbors = Namespace.dbs_get_all_many(self.db_conn, mibs.APPL_DB, neigh_keys)
+        for db_index, db_conn in enumerate(self.db_conn):
+            for neigh_key, neigh_info in neighbors[db_conn.namespace].items():
+                row = self._neigh_row(neigh_key, neigh_info)
+                if row is not None:
+                    sub_id, mac = row
+                    arp_dest_rows[sub_id] = mac
+        self.arp_dest_table.index.load(arp_dest_rows)
+
+        # the kernel ARP table rows are applied again on top
+        self.kernel_arp_rows = {}
+        self.arp_table_content = None
+        self.arp_table_signature = None
+        self.resync = False
 
     def update_data(self):
-        self.arp_dest_map = {}
-        self.arp_dest_list = []
-        # Update arp table of host.
-        # In case of multi-asic platform, get host arp table
-        # from kernel and namespace arp table from NEIGH_TABLE in APP_DB
-        # in each namespace.
-        self._update_from_db()
-        if len(self.db_conn) > 1:
-            self._update_from_arptable()
-        self.arp_dest_list.sort()
+        """
+        Applies the NEIGH_TABLE changes notified since the previous update.
+        In case of multi-asic platform, the arp table of the host comes
+        from the kernel and the namespace arp tables from NEIGH_TABLE in
+        APP_DB in each namespace.
+        """
+        if not self.resync:
+            events = self.neigh_events.poll()
+            if events is None:
+                self.resync = True
+
+        if self.resync:
+            self.resync_neighbors()
+            changed = True
+        else:
+            changed = False
+            for (db_index, neigh_key), event in events.items():
+                if self.update_neigh(db_index, neigh_key, event):
+                    changed = True
+
+        if len(self.db_conn) > 1 and self.update_from_arptable():
+            changed = True
+
+        if changed:
+            self.arp_dest_table.publish()
 
     def arp_dest(self, sub_id):
-        return self.arp_dest_map.get(sub_id, None)
+        mac = self.arp_dest_table.snapshot.get(sub_id)
+        if mac is None:
+            return None
+        return ''.join(chr(b) for b in mac.to_bytes(6, 'big'))
+
+    @property
+    def generation(self):
+        return self.arp_dest_table.generation
+
+    def get_next_many(self, sub_id, count):
+        return self.arp_dest_table.snapshot.get_next_many(sub_id, count)
 
     def get_next(self, sub_id):
-        right = bisect_right(self.arp_dest_list, sub_id)
-        if right >= len(self.arp_dest_list):
-            return None
-        return self.arp_dest_list[right]
+        return self.arp_dest_table.snapshot.get_next(sub_id)
 
 class NextHopUpdater(MIBUpdater):
+    thread_safe_update = True
+    snapshot_attributes = ('nexthop_table',)
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
-        self.nexthop_map = {}
-        self.route_list = []
+        self.nexthop_table = SnapshotBuffer()
 
     def reinit_connection(self):
         Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
@@ -142,42 +310,42 @@ class NextHopUpdater(MIBUpdater):
         Update redis (caches config)
         Pulls the table references for each interface.
         """
-        self.nexthop_map = {}
-        self.route_list = []
+        nexthop_rows = self.nexthop_table.back_buffer()
+
+        # only the default route is served, read it directly instead of listing the ROUTE_TABLE keys
+        ipnstr = "0.0.0.0/0"
+        routestr = "ROUTE_TABLE:" + ipnstr
+        ent = Namespace.dbs_get_all(self.db_conn, mibs.APPL_DB, routestr, blocking=False)
+        if ent:
+            ipn = ipaddress.ip_network(ipnstr)
+            nexthops = ent.get("nexthop", None)
+            if nexthops is None:
+                mibs.logger.warning("Route has no nexthop: {} {}".format(routestr, str(ent)))
+            else:
+                for nh in nexthops.split(','):
+                    # TODO: if ipn contains IP range, create more sub_id here
+                    sub_id = ip2byte_tuple(ipn.network_address)
+                    nexthop_rows[sub_id] = ipaddress.ip_address(nh).packed
+                    break # Just need the first nexthop
+
+        self.nexthop_table.publish(nexthop_rows)
+
+    @property
+    def route_list(self):
+        return self.nexthop_table.snapshot.keys
 
-        route_entries = Namespace.dbs_keys(self.db_conn, mibs.APPL_DB, "ROUTE_TABLE:*")
-        if not route_entries:
-            return
+    def nexthop(self, sub_id):
+        return self.nexthop_table.snapshot.get(sub_id)
 
-        for route_entry in route_entries:
-            routestr = route_entry
-            ipnstr = routestr[len("ROUTE_TABLE:"):]
-            if ipnstr == "0.0.0.0/0":
-                ipn = ipaddress.ip_network(ipnstr)
-                ent = Namespace.dbs_get_all(self.db_conn, mibs.APPL_DB, routestr, blocking=False)
-                if ent:
-                    nexthops = ent.get("nexthop", None)
-                    if nexthops is None:
-                        mibs.logger.warning("Route has no nexthop: {} {}".format(routestr, str(ent)))
-                        continue
-                    for nh in nexthops.split(','):
-                        # TODO: if ipn contains IP range, create more sub_id here
-                        sub_id = ip2byte_tuple(ipn.network_address)
-                        self.route_list.append(sub_id)
-                        self.nexthop_map[sub_id] = ipaddress.ip_address(nh).packed
-                        break # Just need the first nexthop
-
-        self.route_list.sort()
+    @property
+    def generation(self):
+        return self.nexthop_table.generation
 
-    def nexthop(self, sub_id):
-        return self.nexthop_map.get(sub_id, None)
+    def get_next_many(self, sub_id, count):
+        return self.nexthop_table.snapshot.get_next_many(sub_id, count)
 
     def get_next(self, sub_id):
-        right = bisect_right(self.route_list, sub_id)
-        if right >= len(self.route_list):
-            return None
-
-        return self.route_list[right]
+        return self.nexthop_table.snapshot.get_next(sub_id)
 
 class IpMib(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.4'):
     arp_updater = ArpUpdater()
@@ -193,9 +361,12 @@ class InterfacesUpdater(MIBUpdater):
 
     RFC1213_MAX_SPEED = 4294967295
 
+    # the port counters read from COUNTERS_DB, the rest of the hash is not fetched
+    COUNTER_COLUMNS = tuple(table.name for table in DbTables)
+
     def __init__(self):
         super().__init__()
-        self.db_conn = Namespace.init_namespace_dbs()
+        self.db_conn = Namespace.borrow_namespace_dbs()
 
         self.lag_name_if_name_map = {}
         self.if_name_lag_name_map = {}
@@ -217,10 +388,11 @@ class InterfacesUpdater(MIBUpdater):
         self.oid_name_map = {}
         self.rif_counters = {}
 
-        self.namespace_db_map = Namespace.get_namespace_db_map(self.db_conn)
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
 
     def reinit_connection(self):
-        Namespace.connect_namespace_dbs(self.db_conn)
+        mibs.ConnectorPool.get().reconnect()
 
     def reinit_data(self):
         """
@@ -229,7 +401,7 @@ class InterfacesUpdater(MIBUpdater):
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = mibs.InterfaceDirectory.get().interface_tables()
         """
         db_conn - will have db_conn to all namespace DBs and
         global db. First db in the list is global db.
@@ -248,7 +420,7 @@ class InterfacesUpdater(MIBUpdater):
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map, \
-        self.lag_sai_map, self.sai_lag_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.lag_sai_map, self.sai_lag_map = mibs.InterfaceDirectory.get().lag_tables()
 
     def update_data(self):
         """
@@ -268,27 +440,13 @@ class InterfacesUpdater(MIBUpdater):
         self.if_range = [(i,) for i in self.if_range]
 
     def update_if_counters(self):
-        for sai_id_key in self.if_id_map:
-            namespace, sai_id = mibs.split_sai_id_key(sai_id_key)
-            if_idx = mibs.get_index_from_str(self.if_id_map[sai_id_key])
-            counters_db_data = self.namespace_db_map[namespace].get_all(mibs.COUNTERS_DB,
-                                                                        mibs.counter_table(sai_id))
-            if counters_db_data is None:
-                counters_db_data = {}
-            self.if_counters[if_idx] = {
-                counter: int(value) for counter, value in counters_db_data.items()
-            }
+        counters = mibs.PortCounterCache.get().port_counters(self, self.if_id_map, self.COUNTER_COLUMNS)
+        self.if_counters = {mibs.get_index_from_str(if_name): counters[sai_id_key]
+                            for sai_id_key, if_name in self.if_id_map.items()}
 
     def update_rif_counters(self):
         rif_sai_ids = list(self.rif_port_map) + list(self.vlan_name_map)
-        for sai_id in rif_sai_ids:
-            counters_db_data = Namespace.dbs_get_all(self.db_conn, mibs.COUNTERS_DB,
-                                                     mibs.counter_table(mibs.split_sai_id_key(sai_id)[1]))
-            if counters_db_data is None:
-                counters_db_data = {}
-            self.rif_counters[sai_id] = {
-                counter: int(value) for counter, value in counters_db_data.items()
-            }
+        self.rif_counters = mibs.PortCounterCache.get().rif_counters(self, rif_sai_ids)
 
     def get_next(self, sub_id):
         """
@@ -368,9 +526,11 @@ class InterfacesUpdater(MIBUpdater):
         for rif_sai_id, port_sai_id in self.rif_port_map.items():
             if port_sai_id in self.if_id_map:
                 port_idx = mibs.get_index_from_str(self.if_id_map[port_sai_id])
+                # the port counters are shared with the other MIBs through the PortCounterCache
+                port_counters = self.if_counters[port_idx] = dict(self.if_counters[port_idx])
                 for port_counter_name, rif_counter_name in mibs.RIF_DROPS_AGGR_MAP.items():
-                    self.if_counters[port_idx][port_counter_name] = \
-                    self.if_counters[port_idx].get(port_counter_name, 0) + \
+                    port_counters[port_counter_name] = \
+                    port_counters.get(port_counter_name, 0) + \
                     self.rif_counters[rif_sai_id].get(rif_counter_name, 0)
 
         for vlan_sai_id, vlan_name in self.vlan_name_map.items():
@@ -594,6 +754,9 @@ class InterfacesMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2'):
 
     if_updater = InterfacesUpdater()
 
+    # polls the port counters served by the updater, shared by the MIBs serving port counters
+    counter_updater = mibs.PortCounterUpdater.get()
+
     oidtree_updater = mibs.RedisOidTreeUpdater(prefix_str='1.3.6.1.2.1.2')
 
     # (subtree, value_type, callable_, *args, handler=None)
@@ -220,8 +220,7 @@ class PhysicalTableMIBUpdater(MIBUpdater):
     def __init__(self):
         super().__init__()
 
-        self.statedb = Namespace.init_namespace_dbs()
-        Namespace.connect_all_dbs(self.statedb, mibs.STATE_DB)
+        self.statedb = Namespace.borrow_namespace_dbs()
 
         # List of available sub OIDs.
         self.physical_entities = []
@@ -268,8 +267,19 @@ class PhysicalTableMIBUpdater(MIBUpdater):
         """
         return [creator(self) for creator in PhysicalTableMIBUpdater.physical_entity_updater_types]
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.statedb)
+
     def reinit_connection(self):
-        Namespace.connect_all_dbs(self.statedb, mibs.STATE_DB)
+        mibs.ConnectorPool.get().reconnect()
+
+    async def prefetch_data(self, reinit):
+        if not reinit:
+            return
+        # the initial entity keys of each physical entity updater, see PhysicalEntityCacheUpdater.reinit_data
+        for updater in self.physical_entity_updaters:
+            pattern = updater.get_key_pattern()
+            self.prefetched[pattern] = await Namespace.dbs_keys_async(self.statedb, mibs.STATE_DB, pattern)
 
     def reinit_data(self):
         """
@@ -691,7 +701,8 @@ class PhysicalEntityCacheUpdater(object):
 
         self.entity_to_oid_map.clear()
         # retrieve the initial list of entity in db
-        key_info = Namespace.dbs_keys(self.mib_updater.statedb, mibs.STATE_DB, self.get_key_pattern())
+        key_info = self.mib_updater.take_prefetched(self.get_key_pattern(), lambda: Namespace.dbs_keys(
+            self.mib_updater.statedb, mibs.STATE_DB, self.get_key_pattern()))
         if key_info:
             keys = [entry for entry in key_info]
         else:
@@ -769,8 +780,7 @@ class XcvrCacheUpdater(PhysicalEntityCacheUpdater):
 
     def reinit_data(self):
         # update interface maps
-        _, self.if_alias_map, _, _ = \
-            Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, Namespace.init_namespace_dbs())
+        _, self.if_alias_map, _, _ = mibs.InterfaceDirectory.get().interface_tables()
         PhysicalEntityCacheUpdater.reinit_data(self)
 
     def _update_entity_cache(self, interface):
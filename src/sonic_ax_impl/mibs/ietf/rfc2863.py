@@ -81,10 +81,13 @@ class DbTables(int, Enum):
 
 
 class InterfaceMIBUpdater(MIBUpdater):
+    # the port counters read from COUNTERS_DB, the rest of the hash is not fetched
+    COUNTER_COLUMNS = tuple(sorted({table.name for table in DbTables32} | {table.name for table in DbTables64}))
+
     def __init__(self):
         super().__init__()
 
-        self.db_conn = Namespace.init_namespace_dbs()
+        self.db_conn = Namespace.borrow_namespace_dbs()
 
         self.lag_name_if_name_map = {}
         self.if_name_lag_name_map = {}
@@ -100,24 +103,30 @@ class InterfaceMIBUpdater(MIBUpdater):
         self.if_id_map = {}
         self.oid_name_map = {}
         self.rif_counters = {}
+        # InterfaceDirectory generation the LAG maps and if_range were derived from
+        self.directory_generation = None
 
-        self.namespace_db_map = Namespace.get_namespace_db_map(self.db_conn)
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.db_conn)
 
     def reinit_connection(self):
-        Namespace.connect_namespace_dbs(self.db_conn)
+        mibs.ConnectorPool.get().reconnect()
 
     def reinit_data(self):
         """
         Subclass update interface information
         """
+        directory = mibs.InterfaceDirectory.get()
         self.if_name_map, \
         self.if_alias_map, \
         self.if_id_map, \
-        self.oid_name_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_interface_tables, self.db_conn)
+        self.oid_name_map = directory.interface_tables()
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
-        self.oid_lag_name_map, _, _ = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.oid_lag_name_map, \
+        self.lag_sai_map, _ = directory.lag_tables()
+        self.directory_generation = directory.generation
         """
         db_conn - will have db_conn to all namespace DBs and
         global db. First db in the list is global db.
@@ -141,19 +150,20 @@ class InterfaceMIBUpdater(MIBUpdater):
         Update redis (caches config)
         Pulls the table references for each interface.
         """
-        for sai_id_key in self.if_id_map:
-            namespace, sai_id = mibs.split_sai_id_key(sai_id_key)
-            if_idx = mibs.get_index_from_str(self.if_id_map[sai_id_key])
-            counter_table = self.namespace_db_map[namespace].get_all(mibs.COUNTERS_DB, \
-                    mibs.counter_table(sai_id))
-            if counter_table is None:
-                counter_table = {}
-            self.if_counters[if_idx] = counter_table
+        counters = mibs.PortCounterCache.get().port_counters(self, self.if_id_map, self.COUNTER_COLUMNS)
+        self.if_counters = {mibs.get_index_from_str(if_name): counters[sai_id_key]
+                            for sai_id_key, if_name in self.if_id_map.items()}
+
+        directory = mibs.InterfaceDirectory.get()
+        lag_tables = directory.lag_tables()
+        if directory.generation == self.directory_generation:
+            return
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map, \
-        self.lag_sai_map, _ = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        self.lag_sai_map, _ = lag_tables
+        self.directory_generation = directory.generation
 
         self.if_range = sorted(list(self.oid_name_map.keys()) +
                                list(self.oid_lag_name_map.keys()) +
@@ -323,6 +333,9 @@ class InterfaceMIBObjects(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.31.1'):
     """
     if_updater = InterfaceMIBUpdater()
 
+    # polls the port counters served by the updater, shared by the MIBs serving port counters
+    counter_updater = mibs.PortCounterUpdater.get()
+
     oidtree_updater = mibs.RedisOidTreeUpdater(prefix_str='1.3.6.1.2.1.31.1')
 
     # ifXTable = '1'
@@ -357,8 +357,7 @@ class PhysicalSensorTableMIBUpdater(MIBUpdater):
 
         super().__init__()
 
-        self.statedb = Namespace.init_namespace_dbs()
-        Namespace.connect_all_dbs(self.statedb, mibs.STATE_DB)
+        self.statedb = Namespace.borrow_namespace_dbs()
 
         # list of available sub OIDs
         self.sub_ids = []
@@ -376,8 +375,22 @@ class PhysicalSensorTableMIBUpdater(MIBUpdater):
         self.thermal_sensor = []
         self.broken_transceiver_info = []
 
+    def shutdown(self):
+        Namespace.release_namespace_dbs(self.statedb)
+
     def reinit_connection(self):
-        Namespace.connect_all_dbs(self.statedb, mibs.STATE_DB)
+        mibs.ConnectorPool.get().reconnect()
+
+    async def prefetch_data(self, reinit):
+        if not reinit:
+            return
+        self.prefetched['transceiver_dom'] = await Namespace.dbs_keys_async(self.statedb, mibs.STATE_DB,
+                                                                             self.TRANSCEIVER_DOM_KEY_PATTERN)
+        for name, pattern in (('fan_sensor', self.FAN_SENSOR_KEY_PATTERN),
+                              ('psu_sensor', self.PSU_SENSOR_KEY_PATTERN),
+                              ('thermal_sensor', self.THERMAL_SENSOR_KEY_PATTERN)):
+            self.prefetched[name] = await Namespace.scan_keys_async(self.statedb[HOST_NAMESPACE_DB_IDX],
+                                                                    mibs.STATE_DB, pattern)
     
     def reinit_data(self):
         """
@@ -390,24 +403,25 @@ class PhysicalSensorTableMIBUpdater(MIBUpdater):
         self.ent_phy_sensor_precision_map = {}
         self.ent_phy_sensor_value_map = {}
         self.ent_phy_sensor_oper_state_map = {}
-        transceiver_dom_encoded = Namespace.dbs_keys(self.statedb, mibs.STATE_DB, self.TRANSCEIVER_DOM_KEY_PATTERN)
+        transceiver_dom_encoded = self.take_prefetched('transceiver_dom', lambda: Namespace.dbs_keys(
+            self.statedb, mibs.STATE_DB, self.TRANSCEIVER_DOM_KEY_PATTERN))
         if transceiver_dom_encoded:
             self.transceiver_dom = [entry for entry in transceiver_dom_encoded]
 
         # for FAN, PSU and thermal sensors, they are in host namespace DB, to avoid iterating all namespace DBs,
         # just get data from host namespace DB, which is self.statedb[0].
-        fan_sensor_encoded = self.statedb[HOST_NAMESPACE_DB_IDX].keys(self.statedb[HOST_NAMESPACE_DB_IDX].STATE_DB,
-                                                                      self.FAN_SENSOR_KEY_PATTERN)
+        fan_sensor_encoded = self.take_prefetched('fan_sensor', lambda: Namespace.scan_keys(
+            self.statedb[HOST_NAMESPACE_DB_IDX], mibs.STATE_DB, self.FAN_SENSOR_KEY_PATTERN))
         if fan_sensor_encoded:
             self.fan_sensor = [entry for entry in fan_sensor_encoded]
 
-        psu_sensor_encoded = self.statedb[HOST_NAMESPACE_DB_IDX].keys(self.statedb[HOST_NAMESPACE_DB_IDX].STATE_DB,
-                                                                      self.PSU_SENSOR_KEY_PATTERN)
+        psu_sensor_encoded = self.take_prefetched('psu_sensor', lambda: Namespace.scan_keys(
+            self.statedb[HOST_NAMESPACE_DB_IDX], mibs.STATE_DB, self.PSU_SENSOR_KEY_PATTERN))
         if psu_sensor_encoded:
             self.psu_sensor = [entry for entry in psu_sensor_encoded]
 
-        thermal_sensor_encoded = self.statedb[HOST_NAMESPACE_DB_IDX].keys(self.statedb[HOST_NAMESPACE_DB_IDX].STATE_DB,
-                                                                          self.THERMAL_SENSOR_KEY_PATTERN)
+        thermal_sensor_encoded = self.take_prefetched('thermal_sensor', lambda: Namespace.scan_keys(
+            self.statedb[HOST_NAMESPACE_DB_IDX], mibs.STATE_DB, self.THERMAL_SENSOR_KEY_PATTERN))
         if thermal_sensor_encoded:
             self.thermal_sensor = [entry for entry in thermal_sensor_encoded]
 
@@ -2,118 +2,255 @@ import ipaddress
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
-from ax_interface import MIBMeta, ValueType, MIBUpdater, SubtreeMIBEntry
+from ax_interface import MIBMeta, ValueType, MIBUpdater, SubtreeMIBEntry, PackedSnapshotBuffer
 from ax_interface.util import ip2byte_tuple
-from bisect import bisect_right
 from sonic_py_common import multi_asic
 
+ROUTE_TABLE_PATTERN = "ROUTE_TABLE:*"
+
+# byte widths of the packed ipCidrRouteTable sub-ids: dest, mask, tos, next hop
+ROUTE_KEY_WIDTHS = (1,) * 13
+
+# ipCidrRouteStatus of the exported routes
+ROUTE_STATUS_ACTIVE = 1
+
+# memory the route index may hold (its published copy holds as much), the routes beyond it are not exported
+ROUTE_INDEX_MEMORY_BUDGET = 32 * 1024 * 1024
+
+def parse_route_key(route_str):
+    """
+    :param route_str: APPL_DB ROUTE_TABLE key
+    :return: the IPv4 network of the route, None for the routes ipCidrRouteTable doesn't hold (IPv6, VRFs).
+    """
+    try:
+        ipn = ipaddress.ip_network(route_str[len("ROUTE_TABLE:"):], strict=False)
+    except ValueError:
+        return None
+    if not isinstance(ipn, ipaddress.IPv4Network):
+        return None
+    return ipn
+
 class RouteUpdater(MIBUpdater):
+    thread_safe_update = True
+    snapshot_attributes = ('route_dest_table',)
+    # the resyncs SCAN the whole table
+    offload_update = True
+
     def __init__(self):
         super().__init__()
         self.tos = 0 # ipCidrRouteTos
         self.db_conn = Namespace.init_namespace_dbs()
-        self.route_dest_map = {}
-        self.route_dest_list = []
+        # sub-id -> ipCidrRouteStatus, kept from the ROUTE_TABLE keyspace notifications in route_dest_table.index
+        self.route_dest_table = PackedSnapshotBuffer(ROUTE_KEY_WIDTHS, 'B')
         ## loopback ip string -> ip address object
         self.loips = {}
+        # the front end namespaces DBs holding the routes and their port tables, set by resync_routes()
+        self.route_dbs = []
+        self.port_tables = []
+        self.route_events = None
+        # read the whole ROUTE_TABLE on the next update_data()
+        self.resync = True
+        self.over_budget = False
 
     def reinit_connection(self):
         Namespace.connect_all_dbs(self.db_conn, mibs.APPL_DB)
+        # notifications may have been lost along with the connections
+        if self.route_events is not None:
+            self.route_events.reset()
+        self.resync = True
 
     def reinit_data(self):
         """
         Subclass update loopback information
         """
-        self.loips = {}
+        loips = {}
 
         loopbacks = Namespace.dbs_keys(self.db_conn, mibs.APPL_DB, "INTF_TABLE:lo:*")
-        if not loopbacks:
-            return
 
         ## Collect only ipv4 lo interfaces
-        for loopback in loopbacks:
+        for loopback in loopbacks or []:
             lostr = loopback
             loipmask = lostr[len("INTF_TABLE:lo:"):]
             loip = loipmask.split('/')[0]
             ipa = ipaddress.ip_address(loip)
             if isinstance(ipa, ipaddress.IPv4Address):
-                self.loips[loip] = ipa
+                loips[loip] = ipa
 
-    def update_data(self):
+        if loips != self.loips:
+            self.loips = loips
+            self.resync = True
+
+    def get_route_dbs(self):
         """
-        Update redis (caches config)
-        Pulls the table references for each interface.
+        :return: the DBs of the namespaces whose routes are exported.
         """
-        self.route_dest_map = {}
-        self.route_dest_list = []
-
-        ## The nexthop for loopbacks should be all zero
-        for loip in self.loips:
-            sub_id = ip2byte_tuple(loip) + (255, 255, 255, 255) + (self.tos,) + (0, 0, 0, 0)
-            self.route_dest_list.append(sub_id)
-            self.route_dest_map[sub_id] = self.loips[loip].packed
-
         # Get list of front end asic namespaces for multi-asic platform.
         # This list will be empty for single asic platform.
         front_ns = multi_asic.get_all_namespaces()['front_ns']
-        ipnstr = "0.0.0.0/0"
-        ipn = ipaddress.ip_network(ipnstr)
-        route_str = "ROUTE_TABLE:0.0.0.0/0"
-
-        for db_conn in Namespace.get_non_host_dbs(self.db_conn):
-            # For multi-asic platform, proceed to get routes only for 
-            # front end namespaces.
-            # For single-asic platform, front_ns will be empty list.
-            if front_ns and db_conn.namespace not in front_ns:
+        # For multi-asic platform, proceed to get routes only for
+        # front end namespaces.
+        return [db_conn for db_conn in Namespace.get_non_host_dbs(self.db_conn)
+                if not front_ns or db_conn.namespace in front_ns]
+
+    def loopback_sub_id(self, loip):
+        ## The nexthop for loopbacks should be all zero
+        return ip2byte_tuple(loip) + (255, 255, 255, 255) + (self.tos,) + (0, 0, 0, 0)
+
+    def route_sub_ids(self, route_str, ent, db_conn, port_table):
+        """
+        :return: the sub-ids of a ROUTE_TABLE entry of a namespace, one per (ECMP) next hop.
+        """
+        ipn = parse_route_key(route_str)
+        if ipn is None:
+            return
+        nexthops = ent.get("nexthop", None)
+        if nexthops is None:
+            mibs.logger.warning("Route has no nexthop: {} {}".format(route_str, str(ent)))
+            return
+        ifnames = ent.get("ifname", None)
+        if ifnames is None:
+            mibs.logger.warning("Route has no ifname: {} {}".format(route_str, str(ent)))
+            return
+
+        route_prefix = ip2byte_tuple(ipn.network_address) + ip2byte_tuple(ipn.netmask) + (self.tos,)
+        for nh, ifn in zip(nexthops.split(','), ifnames.split(',')):
+            ## Ignore non front panel interfaces
+            ## TODO: non front panel interfaces should not be in APPL_DB at very beginning
+            ## This is to workaround the bug in current sonic-swss implementation
+            if ifn == "eth0" or ifn == "lo" or ifn == "docker0":
                 continue
-            port_table = multi_asic.get_port_table_for_asic(db_conn.namespace)
-            ent = db_conn.get_all(mibs.APPL_DB, route_str, blocking=False)
-            if not ent:
+
+            # Ignore internal asic routes
+            if multi_asic.is_port_channel_internal(ifn, db_conn.namespace):
                 continue
-            nexthops = ent.get("nexthop", None)
-            if nexthops is None:
-                mibs.logger.warning("Route has no nexthop: {} {}".format(route_str, str(ent)))
+            if (ifn in port_table and
+                multi_asic.PORT_ROLE in port_table[ifn] and
+                port_table[ifn][multi_asic.PORT_ROLE] == multi_asic.INTERNAL_PORT):
                 continue
-            ifnames = ent.get("ifname", None)
-            if ifnames is None:
-                mibs.logger.warning("Route has no ifname: {} {}".format(route_str, str(ent)))
+
+            try:
+                nh_tuple = ip2byte_tuple(nh)
+            except ValueError:
+                mibs.logger.debug("Route has an invalid nexthop: {} {}".format(route_str, nh))
+                continue
+            if len(nh_tuple) != 4:
                 continue
-            for nh, ifn in zip(nexthops.split(','), ifnames.split(',')):
-                ## Ignore non front panel interfaces
-                ## TODO: non front panel interfaces should not be in APPL_DB at very beginning
-                ## This is to workaround the bug in current sonic-swss implementation
-                if ifn == "eth0" or ifn == "lo" or ifn == "docker0":
-                    continue
-
-                # Ignore internal asic routes
-                if multi_asic.is_port_channel_internal(ifn, db_conn.namespace):
-                    continue
-                if (ifn in port_table and
-                    multi_asic.PORT_ROLE in port_table[ifn] and
-                    port_table[ifn][multi_asic.PORT_ROLE] == multi_asic.INTERNAL_PORT):
-                    continue
-
-                sub_id = ip2byte_tuple(ipn.network_address) + ip2byte_tuple(ipn.netmask) + (self.tos,) + ip2byte_tuple(nh)
-                self.route_dest_list.append(sub_id)
-                self.route_dest_map[sub_id] = ipn.network_address.packed
-
-        self.route_dest_list.sort()
+            yield route_prefix + nh_tuple
 
-    def route_dest(self, sub_id):
-        return self.route_dest_map.get(sub_id, None)
+    def within_budget(self, row_count):
+        """
+        :return: True if the route index has room for one more row over row_count.
+        """
+        if (row_count + 1) * self.route_dest_table.index.row_size <= ROUTE_INDEX_MEMORY_BUDGET:
+            return True
+        if not self.over_budget:
+            mibs.logger.warning("ipCidrRouteTable reached its memory budget of {} bytes, "
+                                "the routes beyond {} rows are not exported".format(ROUTE_INDEX_MEMORY_BUDGET, row_count))
+            self.over_budget = True
+        return False
 
-    def route_status(self, sub_id):
-        if sub_id in self.route_dest_map:
-            return 1 ## active
+    def resync_routes(self):
+        """
+        Reads the whole ROUTE_TABLE again. The keyspace notifications are subscribed to before the read,
+        a change made during the read is then applied by the next update_data().
+        """
+        route_dbs = self.get_route_dbs()
+        if self.route_events is None or self.route_events.dbs != route_dbs:
+            self.route_events = mibs.KeyspaceEvents(route_dbs, mibs.APPL_DB, ROUTE_TABLE_PATTERN)
+        self.route_events.subscribe()
+        self.route_dbs = route_dbs
+        self.port_tables = [multi_asic.get_port_table_for_asic(db_conn.namespace) for db_conn in route_dbs]
+        self.over_budget = False
+
+        route_dest_rows = {}
+        for loip in self.loips:
+            route_dest_rows[self.loopback_sub_id(loip)] = ROUTE_STATUS_ACTIVE
+
+        route_keys = {db_conn.namespace: Namespace.scan_keys(db_conn, mibs.APPL_DB, ROUTE_TABLE_PATTERN)
+                      for db_conn in route_dbs}
+        routes = Namespace.dbs_get_all_many(self.db_conn, mibs.APPL_DB, route_keys)
+        for db_conn, port_table in zip(route_dbs, self.port_tables):
+            for route_str, ent in routes[db_conn.namespace].items():
+                for sub_id in self.route_sub_ids(route_str, ent, db_conn, port_table):
+                    if sub_id not in route_dest_rows and not self.within_budget(len(route_dest_rows)):
+                        break
+                    route_dest_rows[sub_id] = ROUTE_STATUS_ACTIVE
+        self.route_dest_table.index.load(route_dest_rows)
+        self.resync = False
+
+    def update_route(self, route_str):
+        """
+        Replaces the rows of a route with the ones of its ROUTE_TABLE entries (in all the namespaces).
+
+        :return: True if rows were removed or added.
+        """
+        ipn = parse_route_key(route_str)
+        if ipn is None:
+            return False
+
+        index = self.route_dest_table.index
+        route_prefix = ip2byte_tuple(ipn.network_address) + ip2byte_tuple(ipn.netmask) + (self.tos,)
+        changed = index.remove_prefix(route_prefix) > 0
+
+        sub_ids = set()
+        loip = str(ipn.network_address)
+        if ipn.prefixlen == 32 and loip in self.loips:
+            sub_ids.add(self.loopback_sub_id(loip))
+        for db_conn, port_table in zip(self.route_dbs, self.port_tables):
+            ent = db_conn.get_all(mibs.APPL_DB, route_str, blocking=False)
+            if ent:
+                sub_ids.update(self.route_sub_ids(route_str, ent, db_conn, port_table))
+        for sub_id in sorted(sub_ids):
+            if not self.within_budget(len(index)):
+                break
+            index.set(sub_id, ROUTE_STATUS_ACTIVE)
+            changed = True
+        return changed
+
+    def update_data(self):
+        """
+        Applies the ROUTE_TABLE changes notified since the previous update, the whole ROUTE_TABLE is only
+        read again when the loopbacks changed or when the notifications can't be relied on.
+        """
+        if not self.resync:
+            events = self.route_events.poll()
+            if events is None:
+                self.resync = True
+
+        if self.resync:
+            self.resync_routes()
+            changed = True
         else:
-            return None
+            changed = False
+            for route_str in {route_str for _, route_str in events}:
+                if self.update_route(route_str):
+                    changed = True
 
-    def get_next(self, sub_id):
-        right = bisect_right(self.route_dest_list, sub_id)
-        if right >= len(self.route_dest_list):
+        if changed:
+            self.route_dest_table.publish()
+
+    @property
+    def route_dest_list(self):
+        return self.route_dest_table.snapshot.keys
+
+    def route_dest(self, sub_id):
+        if sub_id not in self.route_dest_table.snapshot:
             return None
+        # ipCidrRouteDest is the first 4 components of the sub-id
+        return bytes(sub_id[:4])
+
+    def route_status(self, sub_id):
+        return self.route_dest_table.snapshot.get(sub_id)
 
-        return self.route_dest_list[right]
+    @property
+    def generation(self):
+        return self.route_dest_table.generation
+
+    def get_next_many(self, sub_id, count):
+        return self.route_dest_table.snapshot.get_next_many(sub_id, count)
+
+    def get_next(self, sub_id):
+        return self.route_dest_table.snapshot.get_next(sub_id)
 
 class IpCidrRouteTable(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.4.24.4'):
     """
@@ -2,11 +2,20 @@ import json
 
 from sonic_ax_impl import mibs
 from sonic_ax_impl.mibs import Namespace
-from ax_interface import MIBMeta, ValueType, MIBUpdater, SubtreeMIBEntry
+from ax_interface import MIBMeta, ValueType, MIBUpdater, SubtreeMIBEntry, PackedSnapshotBuffer
 from ax_interface.util import mac_decimals
-from bisect import bisect_right
+
+FDB_ENTRY_PATTERN = "ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:*"
+
+# byte widths of the packed dot1qTpFdbTable sub-ids: vlan id, then the 6 MAC bytes
+FDB_KEY_WIDTHS = (2, 1, 1, 1, 1, 1, 1)
 
 class FdbUpdater(MIBUpdater):
+    thread_safe_update = True
+    snapshot_attributes = ('vlanmac_ifindex_table',)
+    # the resyncs SCAN the whole table
+    offload_update = True
+
     def __init__(self):
         super().__init__()
         self.db_conn = Namespace.init_namespace_dbs()
@@ -16,11 +25,16 @@ class FdbUpdater(MIBUpdater):
         self.if_id_map = {}
         self.oid_name_map = {}
         self.sai_lag_map = {}
-        self.vlanmac_ifindex_map = {}
-        self.vlanmac_ifindex_list = []
+        # InterfaceDirectory generation of the interface and LAG maps the rows were mapped with
+        self.directory_generation = None
+        # vlanmac -> port index, kept from the ASIC_DB keyspace notifications in vlanmac_ifindex_table.index
+        self.vlanmac_ifindex_table = PackedSnapshotBuffer(FDB_KEY_WIDTHS)
         self.if_bpid_map = {}
         self.bvid_vlan_map = {}
         self.broken_fdbs = []
+        self.fdb_events = mibs.KeyspaceEvents(self.db_conn, mibs.ASIC_DB, FDB_ENTRY_PATTERN)
+        # read the whole FDB on the next update_data()
+        self.resync = True
 
     def fdb_vlanmac(self, fdb):
         if 'vlan' in fdb:
@@ -43,94 +57,182 @@ class FdbUpdater(MIBUpdater):
 
     def reinit_connection(self):
         Namespace.connect_namespace_dbs(self.db_conn)
+        # notifications may have been lost along with the connections
+        self.fdb_events.reset()
+        self.resync = True
 
     def reinit_data(self):
         """
         Subclass update interface information
         """
+        directory = mibs.InterfaceDirectory.get()
         (
             self.if_name_map,
             self.if_alias_map,
             self.if_id_map,
             self.oid_name_map,
-        ) = Namespace.get_sync_d_from_all_namespace(
-            mibs.init_sync_d_interface_tables, self.db_conn
-        )
+        ) = directory.interface_tables()
 
         self.lag_name_if_name_map, \
         self.if_name_lag_name_map, \
         self.oid_lag_name_map,     \
-        _, self.sai_lag_map = Namespace.get_sync_d_from_all_namespace(mibs.init_sync_d_lag_tables, self.db_conn)
+        _, self.sai_lag_map = directory.lag_tables()
 
-        self.if_bpid_map = Namespace.dbs_get_bridge_port_map(self.db_conn, mibs.ASIC_DB)
+        if_bpid_map = Namespace.dbs_get_bridge_port_map(self.db_conn, mibs.ASIC_DB)
         self.bvid_vlan_map.clear()
         self.broken_fdbs.clear()
+        # the rows are mapped through the bridge port, interface and LAG maps: map the whole FDB again only
+        # when one of them changed
+        if if_bpid_map != self.if_bpid_map or directory.generation != self.directory_generation:
+            self.resync = True
+        self.if_bpid_map = if_bpid_map
+        self.directory_generation = directory.generation
+
+    def parse_fdb_key(self, fdb_str):
+        """
+        :param fdb_str: ASIC_DB FDB_ENTRY key
+        :return: the FDB entry description encoded in the key, None if it is invalid.
+        """
+        try:
+            return json.loads(fdb_str.split(":", maxsplit=2)[-1])
+        except ValueError as e:  # includes simplejson.decoder.JSONDecodeError
+            mibs.logger.error("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': {}.".format(fdb_str, e))
+            return None
+
+    def read_fdb_entry(self, fdb_str):
+        """
+        :param fdb_str: ASIC_DB FDB_ENTRY key
+        :return: (vlanmac, port index) of the entry, None if it is missing or can't be mapped to a port.
+        """
+        fdb = self.parse_fdb_key(fdb_str)
+        if fdb is None:
+            return None
+
+        ent = Namespace.dbs_get_all(self.db_conn, mibs.ASIC_DB, fdb_str, blocking=False)
+        return self._fdb_row(fdb_str, fdb, ent)
+
+    def _fdb_row(self, fdb_str, fdb, ent):
+        """
+        :param fdb_str: ASIC_DB FDB_ENTRY key
+        :param fdb: the FDB entry description encoded in the key
+        :param ent: the FDB_ENTRY hash
+        :return: (vlanmac, port index) of the entry, None if it is missing or can't be mapped to a port.
+        """
+        if not ent:
+            return None
+
+        bridge_port_id_attr = ""
+        try:
+            bridge_port_id_attr = ent["SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID"]
+        except KeyError as e:
+            # Only write warning log once
+            if fdb_str not in self.broken_fdbs:
+                mibs.logger.warn("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed to get bridge_port_id, exception: {}".format(fdb_str, e))
+                self.broken_fdbs.append(fdb_str)
+            return None
+
+        # Example output: oid:0x3a000000000608
+        bridge_port_id = bridge_port_id_attr[6:]
+        if bridge_port_id not in self.if_bpid_map:
+            return None
+        port_id = self.if_bpid_map[bridge_port_id]
+        if port_id in self.if_id_map:
+            port_name = self.if_id_map[port_id]
+            port_index = mibs.get_index_from_str(port_name)
+        elif port_id in self.sai_lag_map:
+            port_name = self.sai_lag_map[port_id]
+            port_index = mibs.get_index_from_str(port_name)
+        else:
+            return None
+
+        vlanmac = self.fdb_vlanmac(fdb)
+        if not vlanmac:
+            mibs.logger.debug("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed in fdb_vlanmac().".format(fdb_str))
+            return None
+        return vlanmac, port_index
+
+    def resync_fdb(self):
+        """
+        Reads the whole FDB again. The keyspace notifications are subscribed to before the read,
+        a change made during the read is then applied by the next update_data().
+        """
+        self.fdb_events.subscribe()
+
+        vlanmac_ifindex_rows = {}
+        fdb_keys = {db_conn.namespace: Namespace.scan_keys(db_conn, mibs.ASIC_DB, FDB_ENTRY_PATTERN)
+                    for db_conn in self.db_conn}
+        entries = Namespace.dbs_get_all_many(self.db_conn, mibs.ASIC_DB, fdb_keys)
+        for db_conn in self.db_conn:
+            for fdb_str, ent in entries[db_conn.namespace].items():
+                fdb = self.parse_fdb_key(fdb_str)
+                if fdb is None:
+                    continue
+                entry = self._fdb_row(fdb_str, fdb, ent)
+                if entry is None:
+                    continue
+                vlanmac, port_index = entry
+                vlanmac_ifindex_rows[vlanmac] = port_index
+        self.vlanmac_ifindex_table.index.load(vlanmac_ifindex_rows)
+        self.resync = False
+
+    def update_fdb_entry(self, fdb_str, event):
+        """
+        Applies a keyspace event of an FDB key.
+        :return: True if the FDB rows changed.
+        """
+        if event not in mibs.KeyspaceEvents.DELETE_EVENTS:
+            entry = self.read_fdb_entry(fdb_str)
+            if entry is not None:
+                vlanmac, port_index = entry
+                return self.vlanmac_ifindex_table.index.set(vlanmac, port_index)
+
+        # the entry is gone (or no longer maps to a port), its vlanmac is encoded in the key
+        fdb = self.parse_fdb_key(fdb_str)
+        if fdb is None:
+            return False
+        vlanmac = self.fdb_vlanmac(fdb)
+        if not vlanmac:
+            return False
+        return self.vlanmac_ifindex_table.index.remove(vlanmac)
 
     def update_data(self):
         """
-        Update redis (caches config)
-        Pulls the table references for each interface.
+        Applies the FDB_ENTRY changes notified since the previous update, the whole FDB is only
+        read again after reinit_data() or when the notifications can't be relied on.
         """
-        self.vlanmac_ifindex_map = {}
-        self.vlanmac_ifindex_list = []
-
-        fdb_strings = Namespace.dbs_keys(self.db_conn, mibs.ASIC_DB, "ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:*")
-        if not fdb_strings:
-            return
-
-        for s in fdb_strings:
-            fdb_str = s
-            try:
-                fdb = json.loads(fdb_str.split(":", maxsplit=2)[-1])
-            except ValueError as e:  # includes simplejson.decoder.JSONDecodeError
-                mibs.logger.error("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': {}.".format(fdb_str, e))
-                continue
-
-            ent = Namespace.dbs_get_all(self.db_conn, mibs.ASIC_DB, s, blocking=False)
-            if not ent:
-                continue
-
-            bridge_port_id_attr = ""
-            try:
-                bridge_port_id_attr = ent["SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID"]
-            except KeyError as e:
-                # Only write warning log once
-                if fdb_str not in self.broken_fdbs:
-                    mibs.logger.warn("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed to get bridge_port_id, exception: {}".format(fdb_str, e))
-                    self.broken_fdbs.append(fdb_str)
-                continue
-
-            # Example output: oid:0x3a000000000608
-            bridge_port_id = bridge_port_id_attr[6:]
-            if bridge_port_id not in self.if_bpid_map:
-                continue
-            port_id = self.if_bpid_map[bridge_port_id]
-            if port_id in self.if_id_map:
-                port_name = self.if_id_map[port_id]
-                port_index = mibs.get_index_from_str(port_name)
-            elif port_id in self.sai_lag_map:
-                port_name = self.sai_lag_map[port_id]
-                port_index = mibs.get_index_from_str(port_name)
-            else:
-                continue
+        if not self.resync:
+            events = self.fdb_events.poll()
+            if events is None:
+                self.resync = True
+
+        if self.resync:
+            self.resync_fdb()
+            changed = True
+        else:
+            changed = False
+            for (_, fdb_str), event in events.items():
+                if self.update_fdb_entry(fdb_str, event):
+                    changed = True
+
+        if changed:
+            self.vlanmac_ifindex_table.publish()
 
-            vlanmac = self.fdb_vlanmac(fdb)
-            if not vlanmac:
-                mibs.logger.debug("SyncD 'ASIC_DB' includes invalid FDB_ENTRY '{}': failed in fdb_vlanmac().".format(fdb_str))
-                continue
-            self.vlanmac_ifindex_map[vlanmac] = port_index
-            self.vlanmac_ifindex_list.append(vlanmac)
-        self.vlanmac_ifindex_list.sort()
+    @property
+    def vlanmac_ifindex_list(self):
+        return self.vlanmac_ifindex_table.snapshot.keys
 
     def fdb_ifindex(self, sub_id):
-        return self.vlanmac_ifindex_map.get(sub_id, None)
+        return self.vlanmac_ifindex_table.snapshot.get(sub_id)
 
-    def get_next(self, sub_id):
-        right = bisect_right(self.vlanmac_ifindex_list, sub_id)
-        if right >= len(self.vlanmac_ifindex_list):
-            return None
+    @property
+    def generation(self):
+        return self.vlanmac_ifindex_table.generation
 
-        return self.vlanmac_ifindex_list[right]
+    def get_next_many(self, sub_id, count):
+        return self.vlanmac_ifindex_table.snapshot.get_next_many(sub_id, count)
+
+    def get_next(self, sub_id):
+        return self.vlanmac_ifindex_table.snapshot.get_next(sub_id)
 
 class QBridgeMIBObjects(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.17.7.1'):
     """
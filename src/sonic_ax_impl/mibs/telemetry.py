@@ -0,0 +1,194 @@
+"""
+Subagent self-telemetry: the health of the MIB updaters and the AgentX request counters, served over SNMP.
+"""
+import time
+from enum import unique, Enum
+
+from ax_interface import MIBMeta, MIBUpdater, ValueType, SubtreeMIBEntry, SnapshotBuffer
+from ax_interface.constants import PduTypes
+
+MAX_UNSIGNED_32 = 0xffffffff
+
+
+@unique
+class UpdaterColumns(int, Enum):
+    """
+    Columns of sonicSubagentUpdaterEntry, also the position of each value in an updater row.
+    """
+    NAME = 1
+    # microseconds
+    LAST_DURATION = 2
+    AVERAGE_DURATION = 3
+    # seconds
+    FREQUENCY = 4
+    REINIT_COUNT = 5
+    EXCEPTION_COUNT = 6
+    # seconds since the last successful update
+    SNAPSHOT_AGE = 7
+    UPDATE_COUNT = 8
+
+
+@unique
+class PduColumns(int, Enum):
+    """
+    Columns of sonicSubagentPduEntry, also the position of each value in a PDU row.
+    """
+    NAME = 1
+    COUNT = 2
+    VARBINDS = 3
+    # microseconds
+    LATENCY_P50 = 4
+    LATENCY_P99 = 5
+
+
+def _unsigned_32(value):
+    if value is None:
+        return None
+    return min(int(value), MAX_UNSIGNED_32)
+
+
+def _microseconds(seconds):
+    if seconds is None:
+        return None
+    return seconds * 1000000
+
+
+class TelemetryUpdater(MIBUpdater):
+    """
+    Copies the telemetry of every updater of the MIB table (see ax_interface.stats.UpdaterTelemetry) and the
+    per PDU type request statistics of the agent into two snapshots.
+    """
+    thread_safe_update = True
+    # the MIB entries iterate the snapshot buffers, which are cheap to construct
+    deferrable_init = False
+
+    def __init__(self):
+        super().__init__()
+        self.updater_table = SnapshotBuffer()
+        self.pdu_table = SnapshotBuffer()
+
+    def update_data(self):
+        updater_rows = self.updater_table.back_buffer()
+        pdu_rows = self.pdu_table.back_buffer()
+
+        if self.mib_table is not None:
+            # a stable row order: by updater class name
+            updaters = sorted(self.mib_table.updater_instances, key=lambda updater: type(updater).__name__)
+            for index, updater in enumerate(updaters, 1):
+                telemetry = updater.telemetry
+                updater_rows[(index,)] = (
+                    None,  # columns are 1-based
+                    type(updater).__name__,
+                    _microseconds(telemetry.last_duration),
+                    _microseconds(telemetry.average_duration),
+                    telemetry.next_interval,
+                    telemetry.reinit_count,
+                    telemetry.exception_count,
+                    telemetry.last_update_time,
+                    telemetry.update_count,
+                )
+
+            for pdu_type, pdu_stats in self.mib_table.stats.pdus.items():
+                latency = pdu_stats.latency
+                pdu_rows[(int(pdu_type),)] = (
+                    None,  # columns are 1-based
+                    PduTypes(pdu_type).name,
+                    latency.count,
+                    pdu_stats.varbinds,
+                    latency.percentile(50) / 1000,
+                    latency.percentile(99) / 1000,
+                )
+
+        self.updater_table.publish(updater_rows)
+        self.pdu_table.publish(pdu_rows)
+
+    def updater_value(self, sub_id, column):
+        row = self.updater_table.snapshot.get(sub_id)
+        if row is None:
+            return None
+        value = row[column]
+        if column == UpdaterColumns.NAME:
+            return value
+        if column == UpdaterColumns.SNAPSHOT_AGE:
+            # computed when queried, the rows are only refreshed every update cycle
+            if value is None:
+                return None
+            value = max(0, time.time() - value)
+        elif column in (UpdaterColumns.REINIT_COUNT, UpdaterColumns.EXCEPTION_COUNT, UpdaterColumns.UPDATE_COUNT):
+            # Counter32 wraps
+            return value & MAX_UNSIGNED_32
+        return _unsigned_32(value)
+
+    def pdu_value(self, sub_id, column):
+        row = self.pdu_table.snapshot.get(sub_id)
+        if row is None:
+            return None
+        value = row[column]
+        if column == PduColumns.NAME:
+            return value
+        if column in (PduColumns.COUNT, PduColumns.VARBINDS):
+            # Counter64 wraps
+            return value & 0xffffffffffffffff
+        return _unsigned_32(value)
+
+
+class SonicSubagentTelemetryMIB(metaclass=MIBMeta, prefix='.1.3.6.1.4.1.8072.9999.9999.1'):
+    """
+    Subagent self-telemetry, under the experimental netSnmpPlaypen subtree (.1.3.6.1.4.1.8072.9999.9999):
+      sonicSubagentUpdaterTable .1.1.<column>.<updater index>
+      sonicSubagentPduTable     .2.1.<column>.<PDU type>
+    """
+
+    telemetry_updater = TelemetryUpdater()
+
+    updaterName = \
+        SubtreeMIBEntry('1.1.1', telemetry_updater.updater_table, ValueType.OCTET_STRING,
+                        telemetry_updater.updater_value, UpdaterColumns.NAME)
+
+    updaterLastDuration = \
+        SubtreeMIBEntry('1.1.2', telemetry_updater.updater_table, ValueType.GAUGE_32,
+                        telemetry_updater.updater_value, UpdaterColumns.LAST_DURATION)
+
+    updaterAverageDuration = \
+        SubtreeMIBEntry('1.1.3', telemetry_updater.updater_table, ValueType.GAUGE_32,
+                        telemetry_updater.updater_value, UpdaterColumns.AVERAGE_DURATION)
+
+    updaterFrequency = \
+        SubtreeMIBEntry('1.1.4', telemetry_updater.updater_table, ValueType.GAUGE_32,
+                        telemetry_updater.updater_value, UpdaterColumns.FREQUENCY)
+
+    updaterReinitCount = \
+        SubtreeMIBEntry('1.1.5', telemetry_updater.updater_table, ValueType.COUNTER_32,
+                        telemetry_updater.updater_value, UpdaterColumns.REINIT_COUNT)
+
+    updaterExceptionCount = \
+        SubtreeMIBEntry('1.1.6', telemetry_updater.updater_table, ValueType.COUNTER_32,
+                        telemetry_updater.updater_value, UpdaterColumns.EXCEPTION_COUNT)
+
+    updaterSnapshotAge = \
+        SubtreeMIBEntry('1.1.7', telemetry_updater.updater_table, ValueType.GAUGE_32,
+                        telemetry_updater.updater_value, UpdaterColumns.SNAPSHOT_AGE)
+
+    updaterUpdateCount = \
+        SubtreeMIBEntry('1.1.8', telemetry_updater.updater_table, ValueType.COUNTER_32,
+                        telemetry_updater.updater_value, UpdaterColumns.UPDATE_COUNT)
+
+    pduTypeName = \
+        SubtreeMIBEntry('2.1.1', telemetry_updater.pdu_table, ValueType.OCTET_STRING,
+                        telemetry_updater.pdu_value, PduColumns.NAME)
+
+    pduCount = \
+        SubtreeMIBEntry('2.1.2', telemetry_updater.pdu_table, ValueType.COUNTER_64,
+                        telemetry_updater.pdu_value, PduColumns.COUNT)
+
+    pduVarbinds = \
+        SubtreeMIBEntry('2.1.3', telemetry_updater.pdu_table, ValueType.COUNTER_64,
+                        telemetry_updater.pdu_value, PduColumns.VARBINDS)
+
+    pduLatencyP50 = \
+        SubtreeMIBEntry('2.1.4', telemetry_updater.pdu_table, ValueType.GAUGE_32,
+                        telemetry_updater.pdu_value, PduColumns.LATENCY_P50)
+
+    pduLatencyP99 = \
+        SubtreeMIBEntry('2.1.5', telemetry_updater.pdu_table, ValueType.GAUGE_32,
+                        telemetry_updater.pdu_value, PduColumns.LATENCY_P99)
@@ -5,14 +5,14 @@ from getopt import getopt
 
 def usage(script_name):
     print('Usage: python ', script_name,
-          '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+          '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -w [update_workers] -u [update_processes] -h [help]')
 
 
 def process_options(script_name):
     """
     Process command line options
     """
-    options, remainders = getopt(sys.argv[1:], "t:p:s:d:f:rh", ["host=", "port=", "unix_socket_path=", "debug=", "frequency=", "enable_dynamic_frequency", "help"])
+    options, remainders = getopt(sys.argv[1:], "t:p:s:d:f:rw:uh", ["host=", "port=", "unix_socket_path=", "debug=", "frequency=", "enable_dynamic_frequency", "update_workers=", "update_processes", "help"])
 
     args = {}
     for (opt, arg) in options:
@@ -29,6 +29,10 @@ def process_options(script_name):
                 args['update_frequency'] = int(arg)
             elif opt in ('-r', '--enable_dynamic_frequency'):
                 args['enable_dynamic_frequency'] = True
+            elif opt in ('-w', '--update_workers'):
+                args['update_workers'] = int(arg)
+            elif opt in ('-u', '--update_processes'):
+                args['update_processes'] = True
             elif opt in ('-h', '--help'):
                 usage(script_name)
                 sys.exit(0)
@@ -0,0 +1,156 @@
+"""
+A minimal AgentX master agent (the snmpd side of the subagent socket) for tests and benchmarks.
+
+It accepts a subagent session on a unix socket, acknowledges the Open and Register PDUs and sends Get, GetNext and
+GetBulk requests, matching each Response to its request by h.packetID. Like snmpd, GetNext and GetBulk search ranges
+are bounded by the registered region they start in, crossing to the next region is up to the caller (see walk()).
+"""
+import asyncio
+import itertools
+
+from ax_interface.constants import PduTypes, ValueType
+from ax_interface.encodings import ObjectIdentifier, SearchRange
+from ax_interface.pdu import PDU, PDUHeader, PDUFrameBuffer
+from ax_interface.pdu_implementations import GetPDU, GetNextPDU, GetBulkPDU, OpenPDU, RegisterPDU, ResponsePDU
+
+SESSION_ID = 42
+
+
+class FakeMaster(asyncio.Protocol):
+    """
+    Serves a single subagent session. Requests may be pipelined: request() returns a future resolved with the
+    ResponsePDU.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.transport = None
+        self.server = None
+        self.frame_buffer = PDUFrameBuffer()
+        self.packet_ids = itertools.count(1)
+        # packet id -> future of the ResponsePDU
+        self.pending = {}
+        # ObjectIdentifier of each registered subtree, in registration order
+        self.registered = []
+        self.closed = asyncio.Event()
+
+    async def start(self, path):
+        self.server = await self.loop.create_unix_server(lambda: self, path=path)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+        if self.server is not None:
+            self.server.close()
+
+    async def wait_registered(self, count, timeout=10):
+        """
+        Waits until the subagent registered `count` subtrees.
+        """
+        async def registered():
+            while len(self.registered) < count:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(registered(), timeout)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("subagent connection lost"))
+        self.pending.clear()
+        self.closed.set()
+
+    def data_received(self, data):
+        self.frame_buffer.feed(data)
+        for pdu_bytes in self.frame_buffer:
+            pdu = PDU.decode(pdu_bytes)
+            if isinstance(pdu, ResponsePDU):
+                future = self.pending.pop(pdu.header.packet_id, None)
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+            elif isinstance(pdu, OpenPDU):
+                self.acknowledge(pdu.header._replace(session_id=SESSION_ID))
+            elif isinstance(pdu, RegisterPDU):
+                self.registered.append(pdu.subtree)
+                self.acknowledge(pdu.header)
+
+    def acknowledge(self, header):
+        response = ResponsePDU(header=header._replace(type_=PduTypes.RESPONSE), sys_up_time=0,
+                               error=ResponsePDU.Errors.NO_AGENT_X_ERROR, index=0)
+        self.transport.write(response.encode())
+
+    def _header(self, type_):
+        return PDUHeader(1, type_, PDUHeader.MASK_NEWORK_BYTE_ORDER, 0, SESSION_ID, 0, next(self.packet_ids), 0)
+
+    def request(self, pdu):
+        future = self.loop.create_future()
+        self.pending[pdu.header.packet_id] = future
+        self.transport.write(pdu.encode())
+        return future
+
+    def get(self, oids):
+        return self.request(GetPDU(header=self._header(PduTypes.GET), oids=oids))
+
+    def get_next(self, oids):
+        return self.request(self._bounded(GetNextPDU(header=self._header(PduTypes.GET_NEXT), oids=[]), oids))
+
+    def get_bulk(self, oids, max_repetitions, non_repeaters=0):
+        pdu = GetBulkPDU(header=self._header(PduTypes.GET_BULK), non_repeaters=non_repeaters,
+                         max_repetitions=max_repetitions, oids=[])
+        return self.request(self._bounded(pdu, oids))
+
+    def region_start(self, oid=None):
+        """
+        :return: the start OID of the first registered region after `oid` (the first region if None),
+                 None past the last one.
+        """
+        key = oid.to_tuple() if oid is not None else ()
+        for subtree in sorted(self.registered, key=ObjectIdentifier.to_tuple):
+            if subtree.to_tuple() > key and not _contains(subtree, key):
+                # the registered subtree may be an instance itself
+                return subtree._replace(include=1)
+        return None
+
+    async def walk(self, limit=None):
+        """
+        Walks every registered region with GetNext requests, like snmpwalk through snmpd.
+
+        :return: list of the ObjectIdentifier of every instance, at most `limit` of them.
+        """
+        oids = []
+        oid = self.region_start()
+        while oid is not None and (limit is None or len(oids) < limit):
+            response = await self.get_next([oid])
+            value = response.values[0]
+            if value.type_ == ValueType.END_OF_MIB_VIEW:
+                oid = self.region_start(oid)
+            else:
+                oid = value.name._replace(include=0)
+                oids.append(oid)
+        return oids
+
+    def _region(self, oid):
+        """
+        :return: the innermost registered subtree holding `oid`, None if there is none.
+        """
+        key = oid.to_tuple()
+        regions = [subtree for subtree in self.registered if _contains(subtree, key)]
+        return max(regions, key=lambda subtree: subtree.n_subid, default=None)
+
+    def _bounded(self, pdu, oids):
+        search_ranges = []
+        for oid in oids:
+            region = self._region(oid)
+            # outside of every region the subagent answers endOfMibView
+            end = region.inc() if region is not None else ObjectIdentifier.null_oid()
+            search_ranges.append(SearchRange(start=oid, end=end))
+        pdu.sr = search_ranges
+        pdu.header = pdu.header._replace(payload_length=pdu.payload_length)
+        return pdu
+
+
+def _contains(subtree, key):
+    prefix = subtree.to_tuple()
+    return key[:len(prefix)] == prefix
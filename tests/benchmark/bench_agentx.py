@@ -0,0 +1,231 @@
+"""
+Benchmark: end to end AgentX request throughput and latency.
+
+Runs ax_interface.Agent against an in-process fake master agent (agentx_master.FakeMaster) over a unix socket,
+walks the registered view once to learn the instance OIDs, then replays a Get/GetNext/GetBulk mix and reports
+requests/s and the p50/p99 latency per PDU type, as seen by the master.
+
+  - Get requests read --varbinds random instances.
+  - GetNext and GetBulk requests continue sequential walks (region after region, restarting at the end of the
+    view), the way snmpwalk and snmpbulkwalk drive the subagent through snmpd.
+
+--mib sonic serves SonicMIB from the tests/mock_tables data (needs the test dependencies: swsscommon, mockredis,
+...), or from the tables generated by tests/mock_tables/scale_tables.py with --tables DIR. --mib synthetic serves a
+--rows rows table built from ax_interface only.
+
+Usage:
+    python tests/benchmark/bench_agentx.py [--mib sonic|synthetic] [--tables DIR] [--requests 10000]
+                                           [--mix get=40,getnext=40,getbulk=20] [--concurrency 1] [--varbinds 1]
+                                           [--repetitions 10] [--rows 10000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import ax_interface
+from ax_interface.constants import PduTypes, ValueType
+from ax_interface.stats import LatencyHistogram, STATS_BASIC
+
+from agentx_master import FakeMaster
+
+REQUEST_TYPES = {
+    'get': PduTypes.GET,
+    'getnext': PduTypes.GET_NEXT,
+    'getbulk': PduTypes.GET_BULK,
+}
+
+
+def sonic_mib(tables_dir=None):
+    if tables_dir is not None:
+        # read by the mock connectors at import
+        os.environ['MOCK_TABLES_DIR'] = os.path.abspath(tables_dir)
+    # noinspection PyUnresolvedReferences
+    import tests.mock_tables.dbconnector
+    if os.path.exists(os.path.join(tests.mock_tables.dbconnector.INPUT_DIR, 'database_global.json')):
+        # multi-ASIC layout
+        # noinspection PyUnresolvedReferences
+        import tests.mock_tables.multi_asic
+        tests.mock_tables.dbconnector.load_namespace_config()
+    else:
+        tests.mock_tables.dbconnector.load_database_config()
+    from sonic_ax_impl.main import SonicMIB
+    return SonicMIB
+
+
+def synthetic_mib(rows):
+    class SyntheticUpdater(ax_interface.MIBUpdater):
+        thread_safe_update = True
+
+        def __init__(self):
+            super().__init__()
+            self.table = ax_interface.SnapshotBuffer()
+
+        def update_data(self):
+            table = self.table.back_buffer()
+            for index in range(1, rows + 1):
+                table[(index,)] = index
+            self.table.publish(table)
+
+        def value(self, sub_id):
+            return self.table.snapshot.get(sub_id)
+
+    class SyntheticMIB(metaclass=ax_interface.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.10'):
+        updater = SyntheticUpdater()
+
+        counter = ax_interface.SubtreeMIBEntry('1.1', updater.table, ValueType.COUNTER_64, updater.value)
+        gauge = ax_interface.SubtreeMIBEntry('1.2', updater.table, ValueType.GAUGE_32, updater.value)
+
+    return SyntheticMIB
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name not in REQUEST_TYPES:
+            raise argparse.ArgumentTypeError("unknown request type [{}], expected one of {}".format(
+                name, sorted(REQUEST_TYPES)))
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class LoadGenerator:
+    """
+    Keeps `concurrency` requests in flight until `requests` were answered.
+    """
+
+    def __init__(self, master, oids, args):
+        self.master = master
+        self.oids = oids
+        self.args = args
+        self.random = random.Random(args.seed)
+        names = list(args.mix)
+        self.schedule = self.random.choices(names, weights=[args.mix[name] for name in names], k=args.requests)
+        self.latency = {name: LatencyHistogram() for name in names}
+        self.varbinds = {name: 0 for name in names}
+
+    def next_request(self, name, walk):
+        if name == 'get':
+            return self.master.get(self.random.sample(self.oids, min(self.args.varbinds, len(self.oids))))
+        if name == 'getnext':
+            return self.master.get_next([walk[0]])
+        return self.master.get_bulk([walk[0]], self.args.repetitions)
+
+    async def worker(self, schedule, first_oid):
+        # each worker runs its own sequential walk
+        walk = [first_oid]
+        for name in schedule:
+            start = time.perf_counter_ns()
+            response = await self.next_request(name, walk)
+            self.latency[name].record(time.perf_counter_ns() - start)
+            self.varbinds[name] += len(response.values)
+            if name != 'get':
+                last = response.values[-1]
+                # continue after the last instance returned, in the next region at the end of this one
+                if last.type_ == ValueType.END_OF_MIB_VIEW:
+                    walk[0] = self.master.region_start(last.name) or self.master.region_start()
+                else:
+                    walk[0] = last.name._replace(include=0)
+
+    async def run(self):
+        concurrency = self.args.concurrency
+        workers = [self.worker(self.schedule[i::concurrency], self.oids[i * len(self.oids) // concurrency])
+                   for i in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*workers)
+        return time.perf_counter() - start
+
+
+async def run_benchmark(args, loop):
+    mib_cls = sonic_mib(args.tables) if args.mib == 'sonic' else synthetic_mib(args.rows)
+    agent = ax_interface.Agent(mib_cls, False, args.update_frequency, loop, stats_level=STATS_BASIC)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'master')
+        master = FakeMaster(loop)
+        await master.start(path)
+        agent.socket_mgr.ax_socket_type = 'unix'
+        agent.socket_mgr.ax_socket_path = path
+        agent_task = loop.create_task(agent.run_in_event_loop())
+        try:
+            await master.wait_registered(len(agent.mib_table.prefixes))
+            # let the updaters publish their first snapshot
+            await asyncio.sleep(args.warmup)
+
+            start = time.perf_counter()
+            oids = await master.walk(limit=args.max_oids)
+            walk_time = time.perf_counter() - start
+            if not oids:
+                raise RuntimeError("the subagent view is empty")
+            print("walked {} instances in {:.3f}s ({:,.0f} GetNext/s)".format(
+                len(oids), walk_time, len(oids) / walk_time))
+
+            agent.reset_stats()
+            generator = LoadGenerator(master, oids, args)
+            elapsed = await generator.run()
+        finally:
+            await agent.shutdown()
+            master.close()
+            await agent_task
+
+    print("{:,} requests in {:.3f}s: {:,.0f} requests/s, concurrency {}".format(
+        args.requests, elapsed, args.requests / elapsed, args.concurrency))
+    print('{:<10} {:>9} {:>12} {:>10} {:>10} {:>10}'.format(
+        'PDU', 'requests', 'varbinds', 'p50 (us)', 'p99 (us)', 'max (us)'))
+    for name, histogram in generator.latency.items():
+        if not histogram.count:
+            continue
+        print('{:<10} {:>9,} {:>12,} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+            name, histogram.count, generator.varbinds[name], histogram.percentile(50) / 1000,
+            histogram.percentile(99) / 1000, histogram.max / 1000))
+
+    if args.agent_stats:
+        print('subagent side (decode, processing and encode):')
+        for pdu_type, summary in agent.get_stats()['pdus'].items():
+            latency = summary['latency']
+            print('{:<10} {:>9,} {:>10.1f} {:>10.1f}'.format(
+                pdu_type, latency['count'], latency['p50_us'], latency['p99_us']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AgentX end to end request throughput and latency')
+    parser.add_argument('--mib', choices=('sonic', 'synthetic'), default='sonic',
+                        help='SonicMIB on tests/mock_tables, or a synthetic table')
+    parser.add_argument('--requests', type=int, default=10000, help='number of requests to replay')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('get=40,getnext=40,getbulk=20'),
+                        help='request type weights, e.g. get=40,getnext=40,getbulk=20')
+    parser.add_argument('--concurrency', type=int, default=1, help='requests in flight')
+    parser.add_argument('--varbinds', type=int, default=1, help='varbinds per Get request')
+    parser.add_argument('--repetitions', type=int, default=10, help='max-repetitions of GetBulk requests')
+    parser.add_argument('--tables', default=None,
+                        help='--mib sonic tables directory, see tests/mock_tables/scale_tables.py')
+    parser.add_argument('--rows', type=int, default=10000, help='rows of the synthetic table')
+    parser.add_argument('--max-oids', type=int, default=None, help='stop the initial walk after this many instances')
+    parser.add_argument('--update-frequency', type=int, default=5, help='MIB updaters frequency (seconds)')
+    parser.add_argument('--warmup', type=float, default=0.5, help='wait before the initial walk (seconds)')
+    parser.add_argument('--seed', type=int, default=0, help='request schedule random seed')
+    parser.add_argument('--agent-stats', action='store_true', help='also print the subagent PDU latencies')
+    parser.add_argument('--verbose', action='store_true', help='log the agent')
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(run_benchmark(args, loop))
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
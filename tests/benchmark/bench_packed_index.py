@@ -0,0 +1,88 @@
+"""
+Microbenchmark: PackedMIBIndex update cycles and lookups.
+
+Loads --rows FDB-like rows (the FDB_KEY_WIDTHS layout: vlan, mac), then times update cycles of --edits keyspace
+notification like edits (a third inserts, a third value replacements, a third removals) each followed by a
+PackedSnapshotBuffer publish, the same cycles replacing values only, and the get / get_next / get_next_many
+lookups of the published snapshot.
+
+Usage:
+    python tests/benchmark/bench_packed_index.py [--rows 100000] [--edits 1000] [--seconds 1.0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from ax_interface.mib import PackedSnapshotBuffer
+
+# vlan, mac
+KEY_WIDTHS = (2, 1, 1, 1, 1, 1, 1)
+
+
+def random_sub_id(rng):
+    return (rng.randrange(1, 4095),) + tuple(rng.randrange(256) for _ in range(6))
+
+
+def measure(func, seconds):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = max(1, int(number * seconds / 0.2))
+    return runs / min(timer.repeat(repeat=3, number=runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PackedMIBIndex update cycles and lookups')
+    parser.add_argument('--rows', type=int, default=100000, help='rows loaded in the index')
+    parser.add_argument('--edits', type=int, default=1000, help='edits per update cycle')
+    parser.add_argument('--seconds', type=float, default=1.0, help='approximate time budget per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = {}
+    while len(rows) < args.rows:
+        rows[random_sub_id(rng)] = rng.randrange(1, 1000)
+    table = PackedSnapshotBuffer(KEY_WIDTHS)
+
+    start = time.perf_counter()
+    table.index.load(rows)
+    table.publish()
+    print('{:<28} {:>12.1f} ms ({:,} rows, {:,} bytes)'.format('load', (time.perf_counter() - start) * 1000,
+                                                               len(table.index), table.index.nbytes))
+
+    sub_ids = list(rows)
+
+    def cycle():
+        for _ in range(args.edits // 3):
+            table.index.set(random_sub_id(rng), 1)
+            table.index.set(rng.choice(sub_ids), rng.randrange(1, 1000))
+            table.index.remove(rng.choice(sub_ids))
+        table.publish()
+
+    def replace_cycle():
+        for _ in range(args.edits):
+            table.index.set(rng.choice(sub_ids), rng.randrange(1, 1000))
+        table.publish()
+
+    for name, func in (('cycle (insert/replace/remove)', cycle), ('cycle (replace)', replace_cycle)):
+        rate = measure(func, args.seconds)
+        print('{:<28} {:>12.2f} ms ({:,.0f} edits/s)'.format(name, 1000 / rate, rate * args.edits))
+
+    snapshot = table.snapshot
+    probes = [rng.choice(sub_ids) for _ in range(1000)]
+    lookups = (
+        ('get', lambda: [snapshot.get(sub_id) for sub_id in probes]),
+        ('get_next', lambda: [snapshot.get_next(sub_id) for sub_id in probes]),
+        ('get_next_many(16)', lambda: [snapshot.get_next_many(sub_id, 16) for sub_id in probes]),
+    )
+    for name, func in lookups:
+        rate = measure(func, args.seconds) * len(probes)
+        print('{:<28} {:>12,.0f} lookups/s'.format(name, rate))
+
+
+if __name__ == '__main__':
+    main()
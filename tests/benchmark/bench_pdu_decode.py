@@ -0,0 +1,67 @@
+"""
+Microbenchmark: AgentX PDU decode throughput.
+
+Decodes GetNext requests and Responses carrying 1, 10 and 100 varbinds, and a PDUStream holding 10 back to back
+GetNext requests, reporting PDUs and varbinds decoded per second.
+
+Usage:
+    python tests/benchmark/bench_pdu_decode.py [--seconds 1.0]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from ax_interface.constants import PduTypes, ValueType
+from ax_interface.encodings import ObjectIdentifier, ValueRepresentation
+from ax_interface.pdu import PDU, PDUHeader, PDUStream
+from ax_interface.pdu_implementations import GetNextPDU, ResponsePDU
+
+VARBIND_COUNTS = (1, 10, 100)
+
+# .1.3.6.1.2.1.31.1.1.1.6.<ifindex> (ifHCInOctets)
+IF_HC_IN_OCTETS = (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 6)
+
+
+def get_next_bytes(varbinds):
+    oids = [ObjectIdentifier.from_iterable(IF_HC_IN_OCTETS + (i,)) for i in range(1, varbinds + 1)]
+    return GetNextPDU(header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0), oids=oids).encode()
+
+
+def response_bytes(varbinds):
+    values = [
+        ValueRepresentation.from_typecast(ValueType.COUNTER_64, IF_HC_IN_OCTETS + (i,), 2 ** 40 + i)
+        for i in range(1, varbinds + 1)
+    ]
+    return ResponsePDU(header=PDUHeader(1, PduTypes.RESPONSE, 16, 0, 42, 0, 0, 0),
+                       sys_up_time=0, error=0, index=0, values=values).encode()
+
+
+def measure(func, seconds):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = max(1, int(number * seconds / 0.2))
+    return runs / min(timer.repeat(repeat=3, number=runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AgentX PDU decode throughput')
+    parser.add_argument('--seconds', type=float, default=1.0, help='approximate time budget per measurement')
+    args = parser.parse_args()
+
+    print('{:<22} {:>9} {:>14} {:>16}'.format('PDU', 'varbinds', 'PDUs/s', 'varbinds/s'))
+    for varbinds in VARBIND_COUNTS:
+        for name, data in (('GetNext', get_next_bytes(varbinds)), ('Response', response_bytes(varbinds))):
+            rate = measure(lambda: PDU.decode(data), args.seconds)
+            print('{:<22} {:>9} {:>14,.0f} {:>16,.0f}'.format(name, varbinds, rate, rate * varbinds))
+
+    for varbinds in VARBIND_COUNTS:
+        stream = get_next_bytes(varbinds) * 10
+        rate = measure(lambda: list(PDUStream(stream)), args.seconds) * 10
+        print('{:<22} {:>9} {:>14,.0f} {:>16,.0f}'.format('PDUStream(10xGetNext)', varbinds, rate, rate * varbinds))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 import json
 import os
 import sys
+from unittest import mock
 
 import mockredis
 import redis
@@ -11,6 +12,9 @@ from swsssdk.interface import DBInterface
 from swsscommon import swsscommon
 from sonic_py_common import multi_asic
 
+# the DB json files, overridden to run against generated tables (see scale_tables.py)
+INPUT_DIR = os.environ.get('MOCK_TABLES_DIR', os.path.dirname(os.path.abspath(__file__)))
+
 
 if sys.version_info >= (3, 0):
     long = int
@@ -37,8 +41,7 @@ def load_namespace_config():
     # namespace testing.
     clean_up_config()
     SonicDBConfig.load_sonic_global_db_config(
-        global_db_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), 'database_global.json'))
+        global_db_file_path=os.path.join(INPUT_DIR, 'database_global.json'))
 
 
 # TODO Convert this to fixture as all Test classes require it.
@@ -46,8 +49,7 @@ def load_database_config():
     # Load local database_config.json for single namespace test scenario
     clean_up_config()
     SonicDBConfig.load_sonic_db_config(
-        sonic_db_file_path=os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), 'database_config.json'))
+        sonic_db_file_path=os.path.join(INPUT_DIR, 'database_config.json'))
 
 
 _old_connect_SonicV2Connector = SonicV2Connector.connect
@@ -90,7 +92,32 @@ class MockPubSub:
         return self
 
 
-INPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+class MockKeyspacePubSub:
+    """
+    Keyspace notifications of one DB: queued by notify(), read back by get_message().
+    """
+    def __init__(self, db):
+        self.db = db
+        self.messages = []
+
+    def notify(self, key, event):
+        self.messages.append({'type': 'pmessage', 'channel': '__keyspace@{}__:{}'.format(self.db, key), 'data': event})
+
+    def get_message(self):
+        return self.messages.pop(0) if self.messages else None
+
+
+def patch_keyspace_events(test, db, patches=()):
+    """
+    Starts the patches for the duration of the test, the KeyspaceEvents of the updaters
+    read their notifications from the returned MockKeyspacePubSub.
+    """
+    pubsub = MockKeyspacePubSub(db)
+    for patch in [mock.patch('sonic_ax_impl.mibs.get_redis_pubsub', mock.MagicMock(return_value=pubsub))] + list(patches):
+        patch.start()
+        test.addCleanup(patch.stop)
+    return pubsub
+
 
 class SwssSyncClient(mockredis.MockRedis):
     def __init__(self, *args, **kwargs):
@@ -140,6 +167,16 @@ class SwssSyncClient(mockredis.MockRedis):
         # Find every key that matches the pattern
         return [key for key in self.redis.keys() if regex.match(key)]
 
+    # Patch mockredis/mockredis/client.py
+    # Same key matching as keys() above, the cursor is an offset in the sorted matching keys
+    def scan(self, cursor=0, match=None, count=None):
+        """Emulate scan."""
+        keys = sorted(self.keys(match or '*'))
+        cursor = int(cursor)
+        count = count or 10
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        return next_cursor, keys[cursor:cursor + count]
+
 DBInterface._subscribe_keyspace_notification = _subscribe_keyspace_notification
 mockredis.MockRedis.config_set = config_set
 redis.StrictRedis = SwssSyncClient
@@ -152,3 +189,8 @@ swsscommon.SonicDBConfig.isGlobalInit = mock_SonicDBConfig_isGlobalInit
 from importlib import reload
 import sonic_ax_impl.mibs
 reload(sonic_ax_impl.mibs)
+
+# The tests patch the DB content between updater reinits, always read the interface maps and counters again
+sonic_ax_impl.mibs.InterfaceDirectory.interface_period = 0
+sonic_ax_impl.mibs.InterfaceDirectory.lag_period = 0
+sonic_ax_impl.mibs.PortCounterCache.max_age = 0
@@ -6,7 +6,7 @@ from sonic_py_common import multi_asic
 from swsssdk import SonicDBConfig
 
 
-INPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_DIR = tests.mock_tables.dbconnector.INPUT_DIR
 int_port_channel = ['PortChannel01', 'PortChannel02', 'PortChannel03', 'PortChannel04']
 
 def mock_get_num_asics():
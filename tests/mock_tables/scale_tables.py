@@ -0,0 +1,334 @@
+"""
+Synthetic scale fixtures: writes a mock_tables directory (appl_db.json, asic_db.json, counters_db.json, state_db.json,
+config_db.json, snmp_overlay_db.json and the database configs) describing a device of the requested size, e.g. 600+
+ports with 20 queues each, tens of thousands of FDB entries and neighbors.
+
+The tables are coherent with each other: every port, LAG, RIF and queue name map entry has its COUNTERS hash, LAG
+members, bridge ports, FDB entries, neighbors and routes point at generated ports. The counter and sensor field sets
+are copied from the checked-in fixtures, the values are pseudo-random (seeded).
+
+With --asics N (N > 1) the output is a multi-ASIC layout: global_db/ for the host namespace, asic0..asicN-1/ each
+holding its share of the ports, and database_global.json listing them.
+
+Point the mock connectors at the output with the MOCK_TABLES_DIR environment variable (see dbconnector.py).
+
+Usage:
+    python tests/mock_tables/scale_tables.py OUTPUT_DIR [--ports 640] [--queues 20] [--lags 32] [--lag-members 4]
+                                             [--fdb 32000] [--neighbors 20000] [--routes 10000] [--ecmp 8]
+                                             [--transceivers 640] [--asics 1] [--seed 0]
+"""
+import argparse
+import ipaddress
+import json
+import os
+import random
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DB_FILES = ('appl_db', 'asic_db', 'counters_db', 'state_db', 'config_db', 'snmp_overlay_db')
+
+# SAI object id bases, as in the checked-in fixtures
+PORT_OID_BASE = 0x1000000000000
+LAG_OID_BASE = 0x2000000000000
+BRIDGE_PORT_OID_BASE = 0x3a000000000000
+RIF_OID_BASE = 0x6000000000000
+QUEUE_OID_BASE = 0x15000000000000
+VLAN_OID_BASE = 0x26000000000000
+SWITCH_OID = 'oid:0x21000000000000'
+
+VLAN_ID = 1000
+MAX_COUNTER = 2 ** 48
+
+# device totals, spread over the ASICs; queues, lag_members and ecmp are per port, LAG and route
+DEFAULT_SCALE = {
+    'ports': 640,
+    'queues': 20,
+    'lags': 32,
+    'lag_members': 4,
+    'fdb': 32000,
+    'neighbors': 20000,
+    'routes': 10000,
+    'ecmp': 8,
+    'transceivers': 640,
+}
+
+
+def _oid(base, index):
+    return 'oid:0x{:x}'.format(base + index)
+
+
+def _mac(index):
+    return '52:54:{:02X}:{:02X}:{:02X}:{:02X}'.format(*index.to_bytes(4, 'big'))
+
+
+def load_fixture(db_file, directory=FIXTURES_DIR):
+    with open(os.path.join(directory, db_file + '.json')) as f:
+        return json.load(f)
+
+
+class Templates:
+    """
+    Field sets taken from the checked-in fixtures, so the generated hashes carry what the updaters read.
+    """
+
+    def __init__(self):
+        counters = load_fixture('counters_db')
+        appl = load_fixture('appl_db')
+        state = load_fixture('state_db')
+        config = load_fixture('config_db')
+
+        def fields(prefix):
+            # the richest COUNTERS hash of that kind
+            hashes = [value for key, value in counters.items()
+                      if key.startswith('COUNTERS:') and any(field.startswith(prefix) for field in value)]
+            return sorted(max(hashes, key=len))
+
+        self.port_counters = fields('SAI_PORT_STAT_')
+        self.rif_counters = fields('SAI_ROUTER_INTERFACE_STAT_')
+        self.queue_counters = fields('SAI_QUEUE_STAT_')
+        self.lldp_entry = appl['LLDP_ENTRY_TABLE:Ethernet0']
+        self.lldp_loc_chassis = appl['LLDP_LOC_CHASSIS']
+        self.transceiver_info = state['TRANSCEIVER_INFO|Ethernet0']
+        self.transceiver_dom = state['TRANSCEIVER_DOM_SENSOR|Ethernet0']
+        # chassis level entities (PSUs, fans, thermals, ...) are not scaled
+        self.chassis_state = {key: value for key, value in state.items()
+                              if not key.startswith(('TRANSCEIVER_', 'BUFFER_MAX_PARAM_TABLE|', 'NEIGH_STATE_TABLE|'))}
+        self.host_config = {key: value for key, value in config.items()
+                            if key.startswith(('MGMT_PORT|', 'DEVICE_METADATA|'))}
+
+
+class NamespaceTables:
+    """
+    The DB contents of one namespace (the whole device on a single ASIC platform).
+    """
+
+    def __init__(self):
+        self.dbs = {db_file: {} for db_file in DB_FILES}
+
+    def __getitem__(self, db_file):
+        return self.dbs[db_file]
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for db_file, content in self.dbs.items():
+            with open(os.path.join(directory, db_file + '.json'), 'w') as f:
+                json.dump(content, f, indent=1, sort_keys=True)
+
+
+class ScaleGenerator:
+    def __init__(self, templates=None, seed=0, **scale):
+        unknown = set(scale) - set(DEFAULT_SCALE)
+        if unknown:
+            raise ValueError("Unknown scale parameter(s): {}".format(sorted(unknown)))
+        self.scale = dict(DEFAULT_SCALE, **scale)
+        self.templates = templates or Templates()
+        self.random = random.Random(seed)
+
+    def counters(self, fields):
+        return {field: str(self.random.randrange(MAX_COUNTER)) for field in fields}
+
+    def generate(self, asics=1):
+        """
+        :return: {namespace directory (None for the single ASIC layout): NamespaceTables}
+        """
+        if asics <= 1:
+            tables = NamespaceTables()
+            self.add_host(tables)
+            self.add_asic(tables, 0, 1)
+            return {None: tables}
+
+        namespaces = {'global_db': NamespaceTables()}
+        self.add_host(namespaces['global_db'])
+        for asic in range(asics):
+            tables = NamespaceTables()
+            tables['config_db']['DEVICE_METADATA|localhost'] = {'sub_role': 'FrontEnd'}
+            self.add_asic(tables, asic, asics)
+            namespaces['asic{}'.format(asic)] = tables
+        return namespaces
+
+    def add_host(self, tables):
+        templates = self.templates
+        tables['appl_db']['LLDP_LOC_CHASSIS'] = dict(templates.lldp_loc_chassis)
+        tables['config_db'].update(templates.host_config)
+        tables['state_db'].update(templates.chassis_state)
+
+    @staticmethod
+    def share(total, asic, asics):
+        """
+        :return: range of the items of `asic` when `total` items are spread over `asics` ASICs.
+        """
+        return range(total * asic // asics, total * (asic + 1) // asics)
+
+    def add_asic(self, tables, asic, asics):
+        scale = self.scale
+        appl, asic_db, counters, state, config = (tables['appl_db'], tables['asic_db'], tables['counters_db'],
+                                                  tables['state_db'], tables['config_db'])
+        templates = self.templates
+        multi_asic = asics > 1
+
+        # ports, with their counters, queues and LLDP neighbor
+        ports = self.share(scale['ports'], asic, asics)
+        port_names = ['Ethernet{}'.format(4 * port) for port in ports]
+        port_name_map = counters['COUNTERS_PORT_NAME_MAP'] = {}
+        queue_name_map = counters['COUNTERS_QUEUE_NAME_MAP'] = {}
+        queue_type_map = counters['COUNTERS_QUEUE_TYPE_MAP'] = {}
+        for port, name in zip(ports, port_names):
+            port_oid = _oid(PORT_OID_BASE, port)
+            port_name_map[name] = port_oid
+            counters['COUNTERS:' + port_oid] = self.counters(templates.port_counters)
+            port_entry = {'alias': 'etp{}'.format(port + 1), 'description': 'snowflake', 'speed': 100000}
+            appl['PORT_TABLE:' + name] = port_entry
+            if multi_asic:
+                config['PORT_TABLE:' + name] = dict(port_entry, role='Ext')
+
+            lldp_entry = dict(templates.lldp_entry, lldp_rem_port_id='Ethernet{}'.format(port),
+                              lldp_rem_sys_name='switch{}'.format(port // 32),
+                              lldp_rem_chassis_id=_mac(port // 32))
+            appl['LLDP_ENTRY_TABLE:' + name] = lldp_entry
+
+            state['BUFFER_MAX_PARAM_TABLE|' + name] = {'max_queues': str(scale['queues'])}
+            for queue in range(scale['queues']):
+                queue_oid = _oid(QUEUE_OID_BASE, port * scale['queues'] + queue)
+                queue_name_map['{}:{}'.format(name, queue)] = queue_oid
+                # the upper half are multicast queues, as on most platforms
+                queue_type_map[queue_oid] = 'SAI_QUEUE_TYPE_UNICAST' if queue < scale['queues'] // 2 or \
+                    scale['queues'] == 1 else 'SAI_QUEUE_TYPE_MULTICAST'
+                counters['COUNTERS:' + queue_oid] = self.counters(templates.queue_counters)
+
+        for port, name in list(zip(ports, port_names))[:scale['transceivers'] // asics]:
+            state['TRANSCEIVER_INFO|' + name] = dict(templates.transceiver_info, serial='SN{:06d}'.format(port))
+            state['TRANSCEIVER_DOM_SENSOR|' + name] = dict(templates.transceiver_dom)
+
+        # LAGs over the first ports, the other ports are routed
+        lag_name_map = counters['COUNTERS_LAG_NAME_MAP'] = {}
+        members = iter(port_names)
+        lag_names = []
+        for lag in self.share(scale['lags'], asic, asics):
+            lag_name = 'PortChannel{:02d}'.format(lag + 1)
+            lag_members = [name for _, name in zip(range(scale['lag_members']), members)]
+            if not lag_members:
+                break
+            lag_names.append(lag_name)
+            lag_oid = _oid(LAG_OID_BASE, lag)
+            lag_name_map[lag_name] = lag_oid
+            appl['LAG_TABLE:' + lag_name] = {'admin_status': 'up', 'oper_status': 'up', 'mtu': '9216'}
+            for member in lag_members:
+                appl['LAG_MEMBER_TABLE:{}:{}'.format(lag_name, member)] = {'status': 'enabled'}
+            asic_db['ASIC_STATE:SAI_OBJECT_TYPE_LAG:' + lag_oid] = {'NULL': 'NULL'}
+            counters['COUNTERS:' + lag_oid] = self.counters(templates.port_counters)
+        routed_ports = list(members)
+
+        # router interfaces: one per LAG and routed port
+        rif_name_map = counters['COUNTERS_RIF_NAME_MAP'] = {}
+        rif_type_map = counters['COUNTERS_RIF_TYPE_MAP'] = {}
+        for index, name in enumerate(lag_names + routed_ports):
+            rif_oid = _oid(RIF_OID_BASE, index)
+            attached = lag_name_map[name] if name in lag_name_map else port_name_map[name]
+            rif_name_map[name] = rif_oid
+            rif_type_map[rif_oid] = 'SAI_ROUTER_INTERFACE_TYPE_PORT'
+            asic_db['ASIC_STATE:SAI_OBJECT_TYPE_ROUTER_INTERFACE:' + rif_oid] = {
+                'SAI_ROUTER_INTERFACE_ATTR_TYPE': 'SAI_ROUTER_INTERFACE_TYPE_PORT',
+                'SAI_ROUTER_INTERFACE_ATTR_PORT_ID': attached,
+            }
+            counters['COUNTERS:' + rif_oid] = self.counters(templates.rif_counters)
+
+        # FDB entries learnt on the bridge ports of the routed ports (all ports when every port is in a LAG)
+        bridged_ports = routed_ports or port_names
+        vlan_oid = _oid(VLAN_OID_BASE, asic)
+        asic_db['ASIC_STATE:SAI_OBJECT_TYPE_VLAN:' + vlan_oid] = {'SAI_VLAN_ATTR_VLAN_ID': str(VLAN_ID)}
+        bridge_port_oids = []
+        port_index = dict(zip(port_names, ports))
+        for name in bridged_ports:
+            bridge_port_oid = _oid(BRIDGE_PORT_OID_BASE, port_index[name])
+            bridge_port_oids.append(bridge_port_oid)
+            asic_db['ASIC_STATE:SAI_OBJECT_TYPE_BRIDGE_PORT:' + bridge_port_oid] = {
+                'SAI_BRIDGE_PORT_ATTR_TYPE': 'SAI_BRIDGE_PORT_TYPE_PORT',
+                'SAI_BRIDGE_PORT_ATTR_PORT_ID': port_name_map[name],
+                'SAI_BRIDGE_PORT_ATTR_ADMIN_STATE': 'true',
+            }
+        for entry in self.share(scale['fdb'], asic, asics):
+            fdb_key = json.dumps({'bvid': vlan_oid, 'mac': _mac(0x01000000 + entry), 'switch_id': SWITCH_OID},
+                                 separators=(',', ':'), sort_keys=True)
+            asic_db['ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:' + fdb_key] = {
+                'SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID': bridge_port_oids[entry % len(bridge_port_oids)],
+                'SAI_FDB_ENTRY_ATTR_TYPE': 'SAI_FDB_ENTRY_TYPE_DYNAMIC',
+            }
+
+        # neighbors, spread over the router interfaces, and ECMP routes through them
+        interfaces = lag_names + routed_ports
+        neighbor_ips = []
+        for neighbor in self.share(scale['neighbors'], asic, asics):
+            ip = ipaddress.IPv4Address('10.0.0.0') + neighbor + 1
+            interface = interfaces[neighbor % len(interfaces)]
+            appl['NEIGH_TABLE:{}:{}'.format(interface, ip)] = {'neigh': _mac(0x02000000 + neighbor),
+                                                               'family': 'IPv4'}
+            neighbor_ips.append((interface, str(ip)))
+        if not neighbor_ips:
+            # routes need a next hop
+            neighbor_ips = [(interface, '10.0.0.{}'.format(index + 1)) for index, interface in
+                            enumerate(interfaces[:scale['ecmp']])]
+        for route in self.share(scale['routes'], asic, asics):
+            prefix = ipaddress.IPv4Network((int(ipaddress.IPv4Address('100.64.0.0')) + route * 256, 24))
+            first = route * scale['ecmp']
+            next_hops = [neighbor_ips[(first + path) % len(neighbor_ips)] for path in range(scale['ecmp'])]
+            appl['ROUTE_TABLE:{}'.format(prefix)] = {
+                'ifname': ','.join(interface for interface, _ in next_hops),
+                'nexthop': ','.join(ip for _, ip in next_hops),
+            }
+        if asic == 0:
+            # the default route is installed once
+            appl['ROUTE_TABLE:0.0.0.0/0'] = {
+                'ifname': ','.join(interface for interface, _ in neighbor_ips[:scale['ecmp']]),
+                'nexthop': ','.join(ip for _, ip in neighbor_ips[:scale['ecmp']]),
+            }
+
+
+def write_tables(output_dir, asics=1, seed=0, **scale):
+    """
+    Generates the tables and writes them, along with the database configs, to `output_dir`.
+    """
+    namespaces = ScaleGenerator(seed=seed, **scale).generate(asics)
+    os.makedirs(output_dir, exist_ok=True)
+    for namespace, tables in namespaces.items():
+        directory = output_dir if namespace is None else os.path.join(output_dir, namespace)
+        tables.write(directory)
+        template = os.path.join(FIXTURES_DIR, namespace if namespace == 'global_db' else '', 'database_config.json')
+        with open(template) as src, open(os.path.join(directory, 'database_config.json'), 'w') as dst:
+            dst.write(src.read())
+
+    if asics > 1:
+        # the host namespace (its tables are read from global_db/, see dbconnector.py), then the ASICs
+        database_global = {
+            'INCLUDES': [{'include': 'database_config.json'}] +
+                        [{'namespace': 'asic{}'.format(asic), 'include': './asic{}/database_config.json'.format(asic)}
+                         for asic in range(asics)],
+            'VERSION': '1.0',
+        }
+        with open(os.path.join(output_dir, 'database_global.json'), 'w') as f:
+            json.dump(database_global, f, indent=4)
+        # the host namespace configuration of a single ASIC device
+        with open(os.path.join(FIXTURES_DIR, 'database_config.json')) as src, \
+                open(os.path.join(output_dir, 'database_config.json'), 'w') as dst:
+            dst.write(src.read())
+    return namespaces
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate mock_tables at scale')
+    parser.add_argument('output_dir', help='directory to write the tables to')
+    for name, default in DEFAULT_SCALE.items():
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=default, dest=name,
+                            help='(default: {})'.format(default))
+    parser.add_argument('--asics', type=int, default=1, help='number of ASIC namespaces (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='counter values random seed')
+    args = vars(parser.parse_args())
+
+    output_dir = args.pop('output_dir')
+    namespaces = write_tables(output_dir, **args)
+    for namespace, tables in sorted(namespaces.items(), key=lambda item: item[0] or ''):
+        print('{:<10} {}'.format(namespace or '.', ', '.join(
+            '{}: {} keys'.format(db_file, len(content)) for db_file, content in tables.dbs.items())))
+
+
+if __name__ == '__main__':
+    main()
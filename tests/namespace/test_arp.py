@@ -21,6 +21,7 @@ class TestSonicMIB(TestCase):
         tests.mock_tables.python_arptable.arp_filename = '/host_arp.txt'
         tests.mock_tables.dbconnector.load_namespace_config()
         importlib.reload(rfc1213)
+        rfc1213.ARP_TABLE_PATH = tests.mock_tables.python_arptable.arp_table_path()
         cls.lut = MIBTable(rfc1213.IpMib)
         for updater in cls.lut.updater_instances:
             updater.update_data()
@@ -1,3 +1,4 @@
+import threading
 from unittest import TestCase
 
 import tests.mock_tables.dbconnector
@@ -48,6 +49,25 @@ class TestGetNextPDU(TestCase):
             self.assertTrue(oid_name_map[intf_index] == recirc_port_name)
             self.assertTrue(if_id_map[intf_id_key] == recirc_port_name)
 
+    def test_map_namespaces_concurrent(self):
+        dbs = Namespace.init_namespace_dbs()
+        # only passes if all the namespaces are read at the same time
+        barrier = threading.Barrier(len(dbs), timeout=5)
+
+        def per_namespace_func(db_conn):
+            barrier.wait()
+            return db_conn.namespace
+
+        self.assertEqual(mibs.map_namespaces(per_namespace_func, dbs), [db_conn.namespace for db_conn in dbs])
+
+    def test_dbs_keys_merge_order(self):
+        dbs = Namespace.init_namespace_dbs()
+        expected = []
+        for db_conn in dbs:
+            expected.extend(db_conn.keys(mibs.COUNTERS_DB, "COUNTERS:oid:*") or [])
+
+        self.assertEqual(Namespace.dbs_keys(dbs, mibs.COUNTERS_DB, "COUNTERS:oid:*"), expected)
+
     @classmethod
     def tearDownClass(cls):
         tests.mock_tables.dbconnector.clean_up_config()
@@ -3,6 +3,10 @@ import struct
 from unittest import TestCase
 from ax_interface.encodings import ObjectIdentifier, OctetString, SearchRange, ValueRepresentation
 from ax_interface import constants
+from ax_interface.constants import PduTypes, ValueType
+from ax_interface.pdu import PDU, PDUHeader, PDUHeaderTags, ContextOptionalPDU
+from ax_interface.pdu_implementations import OpenPDU, ClosePDU, RegisterPDU, GetPDU, GetNextPDU, GetBulkPDU, \
+    PingPDU, CommitSetPDU, UndoSetPDU, CleanupSetPDU, ResponsePDU
 
 
 class TestPDUEncodings(TestCase):
@@ -104,3 +108,112 @@ class TestPDUEncodings(TestCase):
                                                        subids=(1, 6027, 3, 10, 1, 2, 9)), data=None)
         self.assertEqual(ValueRepresentation.from_bytes(vr.to_bytes('!'), '!'), vr)  # roundtrip
 
+
+def concat_encode_varbind(vr, endianness):
+    # VarBind encoder preceding ValueRepresentation.pack_into()
+    byte_string = struct.pack(endianness + 'HH', vr.type_, vr.reserved) + vr.name.to_bytes(endianness)
+    if vr.type_ in ValueRepresentation.FOUR_BYTE_TYPES:
+        byte_string += struct.pack(endianness + 'L', vr.data & 0x00000000ffffffff)
+    elif vr.type_ == ValueType.COUNTER_64:
+        byte_string += struct.pack(endianness + 'Q', vr.data & 0xffffffffffffffff)
+    elif vr.type_ == ValueType.OBJECT_IDENTIFIER or vr.type_ in ValueRepresentation.OCTET_STRINGS:
+        byte_string += vr.data.to_bytes(endianness)
+    return byte_string
+
+
+def concat_encode(pdu):
+    """
+    The concatenating encoder preceding PDU.encode(): header bytes, then each field appended in turn.
+    """
+    endianness = pdu.header.endianness
+    payload = b''
+    if isinstance(pdu, ContextOptionalPDU) and pdu.context is not None:
+        payload += pdu.context.to_bytes(endianness)
+    if isinstance(pdu, OpenPDU):
+        payload += struct.pack(endianness + 'B3s', pdu.timeout, pdu.reserved)
+        payload += pdu.oid.to_bytes(endianness) + pdu.descr.to_bytes(endianness)
+    elif isinstance(pdu, ClosePDU):
+        payload += struct.pack(endianness + 'B3s', pdu.reason, pdu.reason_reserved)
+    elif isinstance(pdu, RegisterPDU):
+        payload += struct.pack(endianness + 'BBBB', pdu.timeout, pdu.priority, pdu.range_subid,
+                               pdu.range_subid_reserved)
+        payload += pdu.subtree.to_bytes(endianness)
+        if pdu.upper_bound is not None:
+            payload += struct.pack(endianness + 'L', pdu.upper_bound)
+    elif isinstance(pdu, GetBulkPDU):
+        payload += struct.pack(endianness + 'HH', pdu.non_repeaters, pdu.max_repetitions)
+        payload += b''.join(sr.to_bytes(endianness) for sr in pdu.sr)
+    elif isinstance(pdu, GetPDU):
+        payload += b''.join(sr.to_bytes(endianness) for sr in pdu.sr)
+    elif isinstance(pdu, ResponsePDU):
+        payload += struct.pack(endianness + 'LHH', pdu.sys_up_time, pdu.error, pdu.index)
+        payload += b''.join(concat_encode_varbind(vr, endianness) for vr in pdu.values)
+    header = pdu.header
+    return struct.pack('!BBBB', header.version, header.type_, header.flags, header.reserved) + \
+        struct.pack(endianness + 'LLLL', header.session_id, header.transaction_id, header.packet_id, len(payload)) + \
+        payload
+
+
+class TestPDUEncode(TestCase):
+    IF_DESCR = ObjectIdentifier(5, 2, 0, 0, (1, 2, 2, 1, 2))
+    SYS_NAME = ObjectIdentifier(4, 2, 0, 0, (1, 1, 5, 0))
+    CONTEXT = OctetString.from_string('ctx')
+
+    def header(self, type_, flags=PDUHeaderTags.MASK_NEWORK_BYTE_ORDER):
+        return PDUHeader(1, type_, flags, 0, 42, 7, 3, 0)
+
+    def decode(self, type_, payload=b'', flags=PDUHeaderTags.MASK_NEWORK_BYTE_ORDER):
+        # the PDUs only built from the wire
+        header = self.header(type_, flags)._replace(payload_length=len(payload))
+        return PDU.decode(header.to_bytes() + payload)
+
+    def pdus(self, flags):
+        endianness = '!' if flags & PDUHeaderTags.MASK_NEWORK_BYTE_ORDER else '<'
+        context_flags = flags | PDUHeaderTags.MASK_NON_DEFAULT_CONTEXT
+        values = [
+            ValueRepresentation(ValueType.INTEGER, 0, self.SYS_NAME, 0x1ffffffff),
+            ValueRepresentation(ValueType.COUNTER_64, 0, self.SYS_NAME, 2 ** 64 + 5),
+            ValueRepresentation(ValueType.OCTET_STRING, 0, self.SYS_NAME, OctetString.from_string('Ethernet0')),
+            ValueRepresentation(ValueType.OBJECT_IDENTIFIER, 0, self.SYS_NAME, self.IF_DESCR),
+            ValueRepresentation(ValueType.END_OF_MIB_VIEW, 0, self.SYS_NAME, None),
+        ]
+        return [
+            OpenPDU(header=self.header(PduTypes.OPEN, flags), timeout=5, oid=self.IF_DESCR, descr='SONiC Agent'),
+            self.decode(PduTypes.CLOSE, struct.pack(endianness + 'B3s', 5, bytes(3)), flags),
+            RegisterPDU(header=self.header(PduTypes.REGISTER, flags), timeout=0, priority=127, range_subid=0,
+                        subtree=self.IF_DESCR, upper_bound=None),
+            RegisterPDU(header=self.header(PduTypes.REGISTER, flags), timeout=0, priority=127, range_subid=10,
+                        subtree=self.IF_DESCR, upper_bound=22),
+            GetPDU(header=self.header(PduTypes.GET, flags), oids=(self.IF_DESCR, self.SYS_NAME)),
+            self.decode(PduTypes.GET, self.CONTEXT.to_bytes(endianness) +
+                        SearchRange(self.SYS_NAME, self.SYS_NAME.inc()).to_bytes(endianness), context_flags),
+            GetNextPDU(header=self.header(PduTypes.GET_NEXT, flags), oids=(self.IF_DESCR,)),
+            GetBulkPDU(header=self.header(PduTypes.GET_BULK, flags), non_repeaters=1, max_repetitions=10,
+                       oids=(self.SYS_NAME, self.IF_DESCR)),
+            self.decode(PduTypes.PING, b'', flags),
+            self.decode(PduTypes.PING, self.CONTEXT.to_bytes(endianness), context_flags),
+            self.decode(PduTypes.COMMIT_SET, b'', flags),
+            self.decode(PduTypes.UNDO_SET, b'', flags),
+            self.decode(PduTypes.CLEANUP_SET, b'', flags),
+            ResponsePDU(header=self.header(PduTypes.RESPONSE, flags), sys_up_time=0,
+                        error=ResponsePDU.Errors.NO_AGENT_X_ERROR, index=0, values=values),
+            ResponsePDU(header=self.header(PduTypes.RESPONSE, flags), sys_up_time=0,
+                        error=ResponsePDU.Errors.SNMP2_GEN_ERR, index=1, values=[]),
+        ]
+
+    def check_encode(self, flags):
+        for pdu in self.pdus(flags):
+            with self.subTest(pdu=type(pdu).__name__, flags=flags):
+                expected = concat_encode(pdu)
+                encoded = pdu.encode()
+
+                self.assertEqual(pdu.payload_length, len(encoded) - constants.AGENTX_HEADER_LENGTH)
+                self.assertEqual(PDUHeader.from_bytes(encoded).payload_length, pdu.payload_length)
+                self.assertEqual(encoded, expected)
+                self.assertEqual(PDU.decode(encoded).encode(), encoded)
+
+    def test_encode_network_byte_order(self):
+        self.check_encode(PDUHeaderTags.MASK_NEWORK_BYTE_ORDER)
+
+    def test_encode_little_endian(self):
+        self.check_encode(0)
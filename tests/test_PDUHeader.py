@@ -1,14 +1,17 @@
 
 
+import bisect
 import struct
 import pprint
-from unittest import TestCase
-from ax_interface.pdu import PDU, PDUHeader, PDUHeaderTags, supported_pdus, ContextOptionalPDU, _ignored_pdus, PDUStream
-from ax_interface.pdu_implementations import OpenPDU, ResponsePDU, RegisterPDU, GetPDU
+from unittest import TestCase, mock
+from ax_interface.pdu import PDU, PDUHeader, PDUHeaderTags, supported_pdus, ContextOptionalPDU, _ignored_pdus, PDUStream, \
+    PDUFrameBuffer
+from ax_interface.protocol import AgentX
+from ax_interface.pdu_implementations import OpenPDU, ResponsePDU, RegisterPDU, GetPDU, GetNextPDU, GetBulkPDU
 from ax_interface import exceptions
-from ax_interface.encodings import ObjectIdentifier
-from ax_interface.constants import PduTypes
-from ax_interface.mib import MIBTable
+from ax_interface.encodings import ObjectIdentifier, SearchRange
+from ax_interface.constants import PduTypes, ValueType, SNMP_MAX_MSG_SIZE
+from ax_interface.mib import MIBTable, MIBMeta, MIBUpdater, SubtreeMIBEntry, SnapshotBuffer
 from sonic_ax_impl.mibs.vendor.dell import force10
 
 
@@ -245,3 +248,308 @@ class TestGetNextPDU(TestCase):
 
         get_pdu = PDU.decode(get_bytes)
         get_pdu.make_response(self.lut)
+
+
+class BulkTableUpdater(MIBUpdater):
+    def __init__(self, rows):
+        super().__init__()
+        self.sub_ids = [(i,) for i in range(1, rows + 1)]
+
+    def update_data(self):
+        return
+
+    def get_next(self, sub_id):
+        right = bisect.bisect_right(self.sub_ids, sub_id)
+        if right >= len(self.sub_ids):
+            return None
+        return self.sub_ids[right]
+
+    def get_index(self, sub_id):
+        return sub_id[0]
+
+    def get_descr(self, sub_id):
+        return 'Ethernet{}'.format(sub_id[0])
+
+
+def bulk_table_mib(rows):
+    class BulkTableMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2.2.1'):
+        updater = BulkTableUpdater(rows)
+        ifIndex = SubtreeMIBEntry('1', updater, ValueType.INTEGER, updater.get_index)
+        ifDescr = SubtreeMIBEntry('2', updater, ValueType.OCTET_STRING, updater.get_descr)
+    return BulkTableMIB
+
+
+class TestGetBulkPDU(TestCase):
+    IF_INDEX = ObjectIdentifier(5, 2, 0, 0, (1, 2, 2, 1, 1))
+    IF_DESCR = ObjectIdentifier(5, 2, 0, 0, (1, 2, 2, 1, 2))
+
+    def make_get_bulk(self, non_repeaters, max_repetitions, oids):
+        return GetBulkPDU(
+            header=PDUHeader(1, PduTypes.GET_BULK, 16, 0, 42, 0, 0, 0),
+            non_repeaters=non_repeaters,
+            max_repetitions=max_repetitions,
+            oids=oids
+        )
+
+    def test_roundtrip(self):
+        get_bulk_pdu = self.make_get_bulk(1, 10, (self.IF_INDEX, self.IF_DESCR))
+
+        encoded = get_bulk_pdu.encode()
+        decoded = PDU.decode(encoded)
+
+        self.assertEqual(decoded.header.type_, PduTypes.GET_BULK)
+        self.assertIsInstance(decoded, GetBulkPDU)
+        self.assertEqual(decoded.non_repeaters, 1)
+        self.assertEqual(decoded.max_repetitions, 10)
+        self.assertEqual(get_bulk_pdu, decoded)
+
+    def test_make_response(self):
+        lut = MIBTable(bulk_table_mib(10))
+        get_bulk_pdu = PDU.decode(self.make_get_bulk(1, 3, (self.IF_INDEX, self.IF_DESCR)).encode())
+
+        response = get_bulk_pdu.make_response(lut)
+
+        self.assertIsInstance(response, ResponsePDU)
+        names = [vr.name.to_tuple() for vr in response.values]
+        self.assertEqual(names, [
+            (1, 3, 6, 1, 2, 1, 2, 2, 1, 1, 1),
+            (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 1),
+            (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 2),
+            (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 3),
+        ])
+        self.assertEqual(str(response.values[-1].data), 'Ethernet3')
+        self.assertEqual(PDU.decode(response.encode()), response)
+
+    def test_end_of_mib_view(self):
+        lut = MIBTable(bulk_table_mib(2))
+        get_bulk_pdu = self.make_get_bulk(0, 10, (self.IF_DESCR,))
+
+        response = get_bulk_pdu.make_response(lut)
+
+        # two rows, then a single endOfMibView repetition terminates the walk
+        self.assertEqual(len(response.values), 3)
+        self.assertEqual([vr.type_ for vr in response.values],
+                         [ValueType.OCTET_STRING, ValueType.OCTET_STRING, ValueType.END_OF_MIB_VIEW])
+        self.assertEqual(response.values[-1].name.to_tuple(), (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 2))
+
+    def test_max_message_size(self):
+        lut = MIBTable(bulk_table_mib(1000))
+        get_bulk_pdu = self.make_get_bulk(0, 1000, (self.IF_INDEX, self.IF_DESCR))
+
+        response = get_bulk_pdu.make_response(lut)
+
+        self.assertLessEqual(len(response.encode()), SNMP_MAX_MSG_SIZE)
+        self.assertTrue(response.values)
+        # only whole repetitions are returned
+        self.assertEqual(len(response.values) % 2, 0)
+        self.assertEqual(response.values[-2].name.to_tuple()[-1], len(response.values) // 2)
+
+    def test_gen_err(self):
+        lut = MIBTable(bulk_table_mib(2))
+        get_bulk_pdu = self.make_get_bulk(0, 10, (self.IF_INDEX, self.IF_DESCR))
+
+        with mock.patch.object(lut, 'get_bulk', side_effect=KeyError):
+            response = get_bulk_pdu.make_response(lut)
+
+        self.assertEqual(response.error, ResponsePDU.Errors.SNMP2_GEN_ERR)
+        self.assertEqual(response.index, 1)
+        self.assertEqual([vr.type_ for vr in response.values], [ValueType.NULL, ValueType.NULL])
+        self.assertEqual(PDU.decode(response.encode()), response)
+
+
+class TestMIBTablePrefixIndex(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(bulk_table_mib(2))
+
+    def test_find_parent_prefix(self):
+        if_index = (1, 3, 6, 1, 2, 1, 2, 2, 1, 1)
+        if_descr = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+        self.assertEqual(self.lut._find_parent_prefix(if_index), if_index)
+        self.assertEqual(self.lut._find_parent_prefix(if_descr + (7,)), if_descr)
+        self.assertIsNone(self.lut._find_parent_prefix((1, 3, 6, 1, 2, 1, 2, 2, 1, 3)))
+        self.assertIsNone(self.lut._find_parent_prefix((1, 3, 6, 1, 2, 1, 2, 2)))
+
+    def test_get_next_crosses_subtrees(self):
+        # GetNext from the last ifIndex row lands on the first ifDescr row
+        get_next_pdu = GetNextPDU(
+            header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0),
+            oids=(ObjectIdentifier(6, 2, 0, 0, (1, 2, 2, 1, 1, 2)),)
+        )
+        get_next_pdu.sr[0] = get_next_pdu.sr[0]._replace(end=ObjectIdentifier(4, 2, 0, 0, (1, 2, 2, 2)))
+
+        response = get_next_pdu.make_response(self.lut)
+
+        self.assertEqual(response.values[0].name.to_tuple(), (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 1))
+        self.assertEqual(str(response.values[0].data), 'Ethernet1')
+
+
+class SnapshotTableUpdater(MIBUpdater):
+    def __init__(self, rows):
+        super().__init__()
+        self.table = SnapshotBuffer()
+        self.get_next_calls = 0
+        self.publish(rows)
+
+    def publish(self, rows):
+        table_rows = self.table.back_buffer()
+        table_rows.update({(i,): 'Ethernet{}'.format(i) for i in rows})
+        self.table.publish(table_rows)
+
+    def update_data(self):
+        return
+
+    @property
+    def generation(self):
+        return self.table.generation
+
+    def get_next_many(self, sub_id, count):
+        return self.table.snapshot.get_next_many(sub_id, count)
+
+    def get_next(self, sub_id):
+        self.get_next_calls += 1
+        return self.table.snapshot.get_next(sub_id)
+
+    def get_descr(self, sub_id):
+        return self.table.snapshot.get(sub_id)
+
+
+def snapshot_table_mib(rows):
+    class SnapshotTableMIB(metaclass=MIBMeta, prefix='.1.3.6.1.2.1.2.2.1'):
+        updater = SnapshotTableUpdater(rows)
+        ifDescr = SubtreeMIBEntry('2', updater, ValueType.OCTET_STRING, updater.get_descr)
+        ifType = SubtreeMIBEntry('3', updater, ValueType.OCTET_STRING, updater.get_descr)
+    return SnapshotTableMIB
+
+
+class TestWalkCursor(TestCase):
+    IF_DESCR = ObjectIdentifier(5, 2, 0, 0, (1, 2, 2, 1, 2))
+    WALK_END = ObjectIdentifier(4, 2, 0, 0, (1, 2, 2, 2))
+
+    def walk(self, lut, session_id, limit=100):
+        names = []
+        sr = SearchRange(start=self.IF_DESCR, end=self.WALK_END)
+        for _ in range(limit):
+            vr = lut.get_next(sr, session_id)
+            if vr.type_ == ValueType.END_OF_MIB_VIEW:
+                break
+            names.append((vr.name.to_tuple(), str(vr.data)))
+            sr = SearchRange(start=vr.name, end=self.WALK_END)
+        return names
+
+    def test_walk_matches_lookup(self):
+        mib = snapshot_table_mib(range(1, 11))
+        lut = MIBTable(mib, walk_readahead=4)
+        expected = self.walk(lut, None)
+        self.assertEqual(len(expected), 20)
+
+        mib.updater.get_next_calls = 0
+        self.assertEqual(self.walk(lut, 42), expected)
+        # only entering and leaving each column takes a lookup, the other rows come from the cursor
+        self.assertEqual(mib.updater.get_next_calls, 4)
+
+    def test_new_generation(self):
+        mib = snapshot_table_mib(range(1, 11))
+        lut = MIBTable(mib, walk_readahead=4)
+        sr = SearchRange(start=self.IF_DESCR, end=self.WALK_END)
+        for _ in range(3):
+            vr = lut.get_next(sr, 42)
+            sr = SearchRange(start=vr.name, end=self.WALK_END)
+        self.assertEqual(vr.name.to_tuple()[-1], 3)
+
+        # rows read ahead by the cursor are gone, the walk follows the new snapshot
+        mib.updater.publish([1, 2, 3, 9])
+        vr = lut.get_next(sr, 42)
+        self.assertEqual(vr.name.to_tuple()[-1], 9)
+
+    def test_disabled(self):
+        mib = snapshot_table_mib(range(1, 11))
+        lut = MIBTable(mib, walk_readahead=0)
+        self.assertEqual(len(self.walk(lut, 42)), 20)
+        self.assertEqual(lut._walk_cursors, {})
+
+    def test_close_session(self):
+        lut = MIBTable(snapshot_table_mib(range(1, 4)))
+        self.walk(lut, 42)
+        self.assertIn(42, lut._walk_cursors)
+        lut.close_session(42)
+        self.assertNotIn(42, lut._walk_cursors)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+
+class TestPDUFrameBuffer(TestCase):
+    def get_next_bytes(self, packet_id, *subids):
+        return GetNextPDU(
+            header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, packet_id, 0),
+            oids=[ObjectIdentifier(len(subids), 2, 0, 0, subids)]
+        ).encode()
+
+    def test_fragmented_writes(self):
+        first = self.get_next_bytes(1, 1, 2, 2, 1, 1)
+        second = self.get_next_bytes(2, 1, 2, 2, 1, 2)
+        stream = first + second
+
+        # split inside the first header, inside the first payload, and across the PDU boundary
+        cuts = [0, 7, len(first) - 5, len(first) + 3, len(stream)]
+        frame_buffer = PDUFrameBuffer()
+        received = []
+        for start, end in zip(cuts, cuts[1:]):
+            frame_buffer.feed(stream[start:end])
+            received.append([bytes(frame) for frame in frame_buffer])
+
+        self.assertEqual(received, [[], [], [first], [second]])
+        self.assertEqual(len(frame_buffer), 0)
+
+    def test_byte_by_byte(self):
+        stream = self.get_next_bytes(1, 1, 2, 2, 1, 1) + self.get_next_bytes(2, 1, 2, 2, 1, 2)
+
+        frame_buffer = PDUFrameBuffer()
+        pdus = []
+        for i in range(len(stream)):
+            frame_buffer.feed(stream[i:i + 1])
+            pdus.extend(PDU.decode(frame) for frame in frame_buffer)
+
+        self.assertEqual([pdu.header.packet_id for pdu in pdus], [1, 2])
+        self.assertEqual(pdus, list(PDUStream(stream)))
+
+    def test_bad_payload_length(self):
+        frame_buffer = PDUFrameBuffer(max_payload_length=64)
+        frame_buffer.feed(PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 1, 65).to_bytes())
+
+        with self.assertRaises(exceptions.PDUUnpackError):
+            list(frame_buffer)
+        # the corrupt bytes are dropped
+        self.assertEqual(len(frame_buffer), 0)
+
+
+class TestAgentXFraming(TestCase):
+    def test_fragmented_request(self):
+        protocol = AgentX(MIBTable(bulk_table_mib(2)), None)
+        protocol.connection_made(FakeTransport())
+
+        request = GetNextPDU(
+            header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 7, 0),
+            oids=[ObjectIdentifier(5, 2, 0, 0, (1, 2, 2, 1, 2))]
+        ).encode()
+
+        protocol.data_received(request[:10])
+        protocol.data_received(request[10:30])
+        self.assertEqual(protocol.transport.writes, [])
+
+        # the last fragment completes the PDU, together with the start of the next one.
+        protocol.data_received(request[30:] + request[:30])
+        protocol.data_received(request[30:])
+
+        self.assertEqual(len(protocol.transport.writes), 2)
+        for write in protocol.transport.writes:
+            response = PDU.decode(write)
+            self.assertIsInstance(response, ResponsePDU)
+            self.assertEqual(response.header.packet_id, 7)
+            self.assertEqual(response.values[0].name.to_tuple(), (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 1))
@@ -1,9 +1,16 @@
 import asyncio
+import os
+import tempfile
+import threading
 import time
-from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
 
 
 import ax_interface
+from ax_interface.constants import ValueType
+from ax_interface.encodings import ObjectIdentifier
+from tests.benchmark.agentx_master import FakeMaster
 
 class SonicMIB(metaclass=ax_interface.mib.MIBMeta):
     """
@@ -21,3 +28,380 @@ class TestAgentLoop(TestCase):
         agent = ax_interface.Agent(SonicMIB, False, 5, event_loop)
         event_loop.create_task(self.delayed_shutdown(agent))
         event_loop.run_until_complete(agent.run_in_event_loop())
+
+
+class ThreadRecordingUpdater(ax_interface.MIBUpdater):
+    def __init__(self, thread_safe_update, offload_update=False):
+        super().__init__()
+        self.thread_safe_update = thread_safe_update
+        self.offload_update = offload_update
+        self.update_threads = []
+
+    def update_data(self):
+        self.update_threads.append(threading.get_ident())
+
+
+class ThreadedUpdaterMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027'):
+    thread_safe_updater = ThreadRecordingUpdater(True)
+    loop_updater = ThreadRecordingUpdater(False)
+
+
+class OffloadedUpdaterMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027'):
+    offloaded_updater = ThreadRecordingUpdater(True, offload_update=True)
+    loop_updater = ThreadRecordingUpdater(False, offload_update=True)
+
+
+class TestUpdaterExecutor(TestCase):
+
+    def run_update_cycles(self, mib_table, executor=None):
+        event_loop = asyncio.new_event_loop()
+
+        async def run_updaters():
+            event = asyncio.Event()
+            event.set()
+            background_task = mib_table.start_background_tasks(event, executor)
+            # one update cycle of each updater is enough
+            while not all(updater.update_threads for updater in mib_table.updater_instances):
+                await asyncio.sleep(0.01)
+            event.clear()
+            await background_task
+
+        event_loop.run_until_complete(run_updaters())
+        event_loop.close()
+
+    def test_update_cycle_in_executor(self):
+        mib_table = ax_interface.mib.MIBTable(ThreadedUpdaterMIB, False, 0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.run_update_cycles(mib_table, executor)
+
+        loop_thread = threading.get_ident()
+        self.assertNotIn(loop_thread, ThreadedUpdaterMIB.thread_safe_updater.update_threads)
+        # updaters not declaring thread_safe_update stay on the event loop
+        self.assertEqual(set(ThreadedUpdaterMIB.loop_updater.update_threads), {loop_thread})
+
+    def test_offload_update(self):
+        mib_table = ax_interface.mib.MIBTable(OffloadedUpdaterMIB, False, 0)
+        self.run_update_cycles(mib_table)
+
+        loop_thread = threading.get_ident()
+        # no update executor: the default executor of the loop runs the offloaded cycles
+        self.assertNotIn(loop_thread, OffloadedUpdaterMIB.offloaded_updater.update_threads)
+        self.assertEqual(set(OffloadedUpdaterMIB.loop_updater.update_threads), {loop_thread})
+
+    def test_update_cycle_error(self):
+        updater = ThreadRecordingUpdater(True)
+        updater.update_data = mock.Mock(side_effect=RuntimeError)
+        self.assertTrue(updater._update_cycle(False))
+        updater.update_data = mock.Mock(side_effect=ValueError)
+        self.assertTrue(updater._update_cycle(True))
+        self.assertFalse(updater._update_cycle(False))
+
+
+class PrefetchingUpdater(ax_interface.MIBUpdater):
+    def __init__(self, batches=3, fail=False):
+        super().__init__()
+        self.batches = batches
+        self.fail = fail
+        self.reinit_flags = []
+        self.keys = None
+
+    async def prefetch_data(self, reinit):
+        self.reinit_flags.append(reinit)
+        keys = []
+        for batch in range(self.batches):
+            keys.append(batch)
+            # the other tasks of the loop run between the batches
+            await asyncio.sleep(0)
+        if self.fail:
+            raise ValueError("prefetch failed")
+        self.prefetched['keys'] = keys
+
+    def update_data(self):
+        self.keys = self.take_prefetched('keys', lambda: 'read')
+
+
+class TestUpdaterPrefetch(TestCase):
+
+    def run_prefetch_cycle(self, updater):
+        event_loop = asyncio.new_event_loop()
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(len(updater.reinit_flags))
+                await asyncio.sleep(0)
+
+        async def run_cycle():
+            ticker_task = asyncio.ensure_future(ticker())
+            redis_exception_happen = await updater._prefetch(False)
+            redis_exception_happen = updater._update_cycle(redis_exception_happen)
+            ticker_task.cancel()
+            return redis_exception_happen
+
+        redis_exception_happen = event_loop.run_until_complete(run_cycle())
+        event_loop.close()
+        return redis_exception_happen, ticks
+
+    def test_prefetch(self):
+        updater = PrefetchingUpdater()
+        redis_exception_happen, ticks = self.run_prefetch_cycle(updater)
+
+        self.assertFalse(redis_exception_happen)
+        self.assertEqual(updater.reinit_flags, [True])
+        self.assertEqual(updater.keys, [0, 1, 2])
+        # the loop kept running other tasks while the prefetch was in progress
+        self.assertGreaterEqual(ticks.count(1), updater.batches - 1)
+        # taken once
+        self.assertEqual(updater.take_prefetched('keys', lambda: 'read'), 'read')
+
+    def test_prefetch_error(self):
+        updater = PrefetchingUpdater(fail=True)
+        redis_exception_happen, _ = self.run_prefetch_cycle(updater)
+
+        # the cycle read the data itself
+        self.assertFalse(redis_exception_happen)
+        self.assertEqual(updater.keys, 'read')
+
+    def test_no_prefetch_after_redis_error(self):
+        updater = PrefetchingUpdater()
+        event_loop = asyncio.new_event_loop()
+        self.assertTrue(event_loop.run_until_complete(updater._prefetch(True)))
+        event_loop.close()
+
+        self.assertEqual(updater.reinit_flags, [])
+
+    def test_not_prefetched_off_the_loop(self):
+        updater = PrefetchingUpdater()
+        updater.thread_safe_update = True
+        updater.offload_update = True
+        event_loop = asyncio.new_event_loop()
+
+        async def run_updater():
+            updater.run_event.set()
+            task = asyncio.ensure_future(updater.start())
+            while updater.keys is None:
+                await asyncio.sleep(0.01)
+            updater.run_event.clear()
+            task.cancel()
+
+        event_loop.run_until_complete(run_updater())
+        event_loop.close()
+
+        self.assertEqual(updater.reinit_flags, [])
+        self.assertEqual(updater.keys, 'read')
+
+
+class ProcessRecordingUpdater(ax_interface.MIBUpdater):
+    thread_safe_update = True
+    snapshot_attributes = ('update_pid', 'oid_list')
+
+    def __init__(self):
+        super().__init__()
+        self.update_pid = None
+        self.oid_list = []
+
+    def update_data(self):
+        self.update_pid = os.getpid()
+        self.oid_list = [(1,), (2,), (3,)]
+
+
+class ProcessUpdaterMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027'):
+    process_updater = ProcessRecordingUpdater()
+
+
+class TestUpdaterProcess(TestCase):
+
+    def test_snapshot_from_process(self):
+        event_loop = asyncio.new_event_loop()
+        mib_table = ax_interface.mib.MIBTable(ProcessUpdaterMIB, False, 0)
+        updater = ProcessUpdaterMIB.process_updater
+
+        async def run_updaters():
+            event = asyncio.Event()
+            event.set()
+            background_task = mib_table.start_background_tasks(event, update_processes=True)
+            while updater.update_pid is None:
+                await asyncio.sleep(0.01)
+            event.clear()
+            await background_task
+
+        event_loop.run_until_complete(run_updaters())
+        event_loop.close()
+
+        self.assertTrue(updater.run_in_process)
+        # the snapshot was built by another process and applied here
+        self.assertNotEqual(updater.update_pid, os.getpid())
+        self.assertEqual(updater.oid_list, [(1,), (2,), (3,)])
+
+
+class ConstructorRecordingUpdater(ax_interface.MIBUpdater):
+    constructed = []
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        ConstructorRecordingUpdater.constructed.append(name)
+
+    def update_data(self):
+        pass
+
+    def value(self):
+        return self.name
+
+
+class DerivedRecordingUpdater(ConstructorRecordingUpdater):
+    def __init__(self):
+        super().__init__('derived')
+        self.derived = True
+
+
+class TestDeferredUpdaterInit(TestCase):
+
+    def setUp(self):
+        ConstructorRecordingUpdater.constructed = []
+
+    def test_deferred(self):
+        with ax_interface.mib.deferred_updater_init():
+            class DeferredMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.11'):
+                updater = ConstructorRecordingUpdater('base')
+                derived_updater = DerivedRecordingUpdater()
+
+                scalar = ax_interface.MIBEntry('1.0', ValueType.OCTET_STRING, updater.value)
+
+        self.assertEqual(ConstructorRecordingUpdater.constructed, [])
+        self.assertFalse(hasattr(DeferredMIB.updater, 'name'))
+
+        mib_table = ax_interface.mib.MIBTable(DeferredMIB)
+        mib_table.initialize_updaters()
+        self.assertEqual(sorted(ConstructorRecordingUpdater.constructed), ['base', 'derived'])
+        self.assertEqual(DeferredMIB.updater.value(), 'base')
+        self.assertTrue(DeferredMIB.derived_updater.derived)
+
+        # constructed once
+        mib_table.initialize_updaters()
+        self.assertFalse(DeferredMIB.updater.initialize())
+        self.assertEqual(len(ConstructorRecordingUpdater.constructed), 2)
+
+    def test_not_deferred(self):
+        updater = DerivedRecordingUpdater()
+
+        self.assertEqual(ConstructorRecordingUpdater.constructed, ['derived'])
+        self.assertEqual(updater.name, 'derived')
+        self.assertFalse(updater.initialize())
+
+
+class ShutdownRecordingUpdater(ax_interface.MIBUpdater):
+    shut_down = []
+
+    def __init__(self, name, fail=False):
+        super().__init__()
+        self.name = name
+        self.fail = fail
+
+    def update_data(self):
+        pass
+
+    def shutdown(self):
+        ShutdownRecordingUpdater.shut_down.append(self.name)
+        if self.fail:
+            raise RuntimeError("shutdown failed")
+
+
+class TestUpdaterShutdown(TestCase):
+
+    def setUp(self):
+        ShutdownRecordingUpdater.shut_down = []
+
+    def test_shutdown_updaters(self):
+        class ShutdownMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.12'):
+            failing_updater = ShutdownRecordingUpdater('failing', fail=True)
+            updater = ShutdownRecordingUpdater('updater')
+
+        ax_interface.mib.MIBTable(ShutdownMIB).shutdown_updaters()
+
+        # a failing updater does not keep the others from shutting down
+        self.assertEqual(sorted(ShutdownRecordingUpdater.shut_down), ['failing', 'updater'])
+
+    def test_deferred_not_shut_down(self):
+        with ax_interface.mib.deferred_updater_init():
+            class DeferredShutdownMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.13'):
+                updater = ShutdownRecordingUpdater('deferred')
+
+        ax_interface.mib.MIBTable(DeferredShutdownMIB).shutdown_updaters()
+
+        self.assertEqual(ShutdownRecordingUpdater.shut_down, [])
+
+    def test_agent_shuts_down_updaters(self):
+        class AgentShutdownMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.14'):
+            updater = ShutdownRecordingUpdater('agent')
+
+        event_loop = asyncio.new_event_loop()
+        agent = ax_interface.Agent(AgentShutdownMIB, False, 5, event_loop)
+
+        async def run_agent():
+            event_loop.call_later(0.1, lambda: asyncio.ensure_future(agent.shutdown()))
+            await agent.run_in_event_loop()
+
+        event_loop.run_until_complete(run_agent())
+        event_loop.close()
+
+        self.assertEqual(ShutdownRecordingUpdater.shut_down, ['agent'])
+
+
+class WalkedUpdater(ax_interface.MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.table = ax_interface.SnapshotBuffer()
+
+    def update_data(self):
+        table = self.table.back_buffer()
+        table.update({(1,): 10, (2,): 20, (3,): 30})
+        self.table.publish(table)
+
+    def value(self, sub_id):
+        return self.table.snapshot.get(sub_id)
+
+
+class WalkedMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027.3.10'):
+    updater = WalkedUpdater()
+
+    scalar = ax_interface.MIBEntry('1.0', ValueType.INTEGER, lambda: 42)
+    column = ax_interface.SubtreeMIBEntry('2.1', updater.table, ValueType.COUNTER_32, updater.value)
+
+
+class TestFakeMaster(TestCase):
+
+    def test_requests(self):
+        event_loop = asyncio.new_event_loop()
+        agent = ax_interface.Agent(WalkedMIB, False, 5, event_loop)
+        master = FakeMaster(event_loop)
+        prefix = (1, 3, 6, 1, 4, 1, 6027, 3, 10)
+
+        async def run_requests(path):
+            await master.start(path)
+            agent.socket_mgr.ax_socket_type = 'unix'
+            agent.socket_mgr.ax_socket_path = path
+            agent_task = event_loop.create_task(agent.run_in_event_loop())
+            try:
+                await master.wait_registered(len(agent.mib_table.prefixes))
+                walked = await master.walk()
+                get = await master.get([ObjectIdentifier.from_iterable(prefix + (1, 0))])
+                bulk = await master.get_bulk([ObjectIdentifier.from_iterable(prefix + (2, 1))], 5)
+            finally:
+                await agent.shutdown()
+                master.close()
+                await agent_task
+            return walked, get, bulk
+
+        with tempfile.TemporaryDirectory() as directory:
+            walked, get, bulk = event_loop.run_until_complete(run_requests(os.path.join(directory, 'master')))
+        event_loop.close()
+
+        self.assertEqual(len(master.registered), 2)
+        self.assertEqual([oid.to_tuple()[len(prefix):] for oid in walked], [(1, 0), (2, 1, 1), (2, 1, 2), (2, 1, 3)])
+        self.assertEqual(get.values[0].data, 42)
+        # bounded by the registered region, like snmpd does
+        self.assertEqual([value.data for value in bulk.values[:3]], [10, 20, 30])
+        self.assertEqual([value.type_ for value in bulk.values[3:]], [ValueType.END_OF_MIB_VIEW])
+        # answered by the subagent, not by the master
+        self.assertEqual(agent.get_stats()['pdus']['GET']['latency']['count'], 1)
@@ -41,7 +41,7 @@ class TestUtil(TestCase):
         with pytest.raises(SystemExit) as excinfo:
             process_options("sonic_ax_impl")
         assert excinfo.value.code == 0
-        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -w [update_workers] -u [update_processes] -h [help]')
 
     # Given: Pass help
     # When: Parse args
@@ -52,7 +52,7 @@ class TestUtil(TestCase):
         with pytest.raises(SystemExit) as excinfo:
             process_options("sonic_ax_impl")
         assert excinfo.value.code == 0
-        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -h [help]')
+        mock_print.assert_called_with('Usage: python ', 'sonic_ax_impl', '-t [host] -p [port] -s [unix_socket_path] -d [logging_level] -f [update_frequency] -r [enable_dynamic_frequency] -w [update_workers] -u [update_processes] -h [help]')
 
     # Given: Pass -r
     # When: Parse args
@@ -86,6 +86,38 @@ class TestUtil(TestCase):
         args = process_options("sonic_ax_impl")
         self.assertEqual(args["update_frequency"], 9)
 
+    # Given: Pass -w
+    # When: Parse args
+    # Then: Parse update_workers
+    @patch('sys.argv', ['sonic_ax_impl', '-w4'])
+    def test_valid_options_update_workers(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_workers"], 4)
+
+    # Given: Pass --update_workers
+    # When: Parse args
+    # Then: Parse update_workers
+    @patch('sys.argv', ['sonic_ax_impl', '--update_workers=4'])
+    def test_valid_options_update_workers_long(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_workers"], 4)
+
+    # Given: Pass -u
+    # When: Parse args
+    # Then: Enable update_processes
+    @patch('sys.argv', ['sonic_ax_impl', '-u'])
+    def test_valid_options_update_processes(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_processes"], True)
+
+    # Given: Pass --update_processes
+    # When: Parse args
+    # Then: Enable update_processes
+    @patch('sys.argv', ['sonic_ax_impl', '--update_processes'])
+    def test_valid_options_update_processes_long(self):
+        args = process_options("sonic_ax_impl")
+        self.assertEqual(args["update_processes"], True)
+
     # Given: Pass -s
     # When: Parse args
     # Then: Parse socket
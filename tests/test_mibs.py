@@ -1,4 +1,7 @@
+import asyncio
+import json
 import sys
+import threading
 from unittest import TestCase
 
 import tests.mock_tables.dbconnector
@@ -71,3 +74,385 @@ class TestGetNextPDU(TestCase):
         self.assertTrue(vlan_name_map == {})
         self.assertTrue(vlan_oid_sai_map == {})
         self.assertTrue(vlan_oid_name_map == {})
+
+    def test_dbs_get_all_many(self):
+        db_conn = Namespace.init_namespace_dbs()
+        keys = ["COUNTERS:oid:0x1000000000005", "COUNTERS:oid:0xdeadbeef"]
+
+        result = Namespace.dbs_get_all_many(db_conn, mibs.COUNTERS_DB, {'': keys})
+
+        self.assertEqual(result[''][keys[0]], db_conn[0].get_all(mibs.COUNTERS_DB, keys[0]))
+        self.assertTrue(result[''][keys[0]])
+        self.assertEqual(result[''][keys[1]], {})
+
+    def mock_redis_script(self, client, loaded=False):
+        # GET_ALL_MANY_SCRIPT run against the mock DB, through a Redis script cache
+        script_cache = {mibs.GET_ALL_MANY_SCRIPT_SHA} if loaded else set()
+
+        def load_redis_script(db, script):
+            script_cache.add(mibs.GET_ALL_MANY_SCRIPT_SHA)
+            return mibs.GET_ALL_MANY_SCRIPT_SHA
+
+        def run_redis_script(db, sha, keys, argv):
+            if sha not in script_cache:
+                raise RuntimeError("NOSCRIPT No matching script. Please use EVAL.")
+            if argv:
+                return [json.dumps([[client.hget(key, field) or False for field in argv] for key in keys])]
+            return [json.dumps([[item for pair in client.hgetall(key).items() for item in pair] or {} for key in keys])]
+        return mock.MagicMock(side_effect=load_redis_script), mock.MagicMock(side_effect=run_redis_script)
+
+    def test_dbs_get_all_many_without_pipeline(self):
+        db_conn = Namespace.init_namespace_dbs()
+        keys = ["COUNTERS:oid:0x1000000000005", "COUNTERS:oid:0x1000000000006", "COUNTERS:oid:0xdeadbeef"]
+        expected = {key: db_conn[0].get_all(mibs.COUNTERS_DB, key) or {} for key in keys}
+        mocked_load_redis_script, mocked_run_redis_script = \
+            self.mock_redis_script(db_conn[0].get_redis_client(mibs.COUNTERS_DB))
+
+        with mock.patch('swsscommon.swsscommon.SonicV2Connector.get_redis_client', mock.MagicMock(return_value=object())), \
+                mock.patch('swsscommon.swsscommon.loadRedisScript', mocked_load_redis_script, create=True), \
+                mock.patch('swsscommon.swsscommon.runRedisScript', mocked_run_redis_script, create=True), \
+                mock.patch('sonic_ax_impl.mibs.GET_ALL_MANY_BATCH_SIZE', 2), \
+                mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all') as mocked_get_all:
+            result = Namespace.dbs_get_all_many(db_conn, mibs.COUNTERS_DB, {'': keys})
+            # NOSCRIPT on the first batch: the script is loaded, then each batch of 2 keys is one round trip
+            self.assertEqual(mocked_load_redis_script.call_count, 1)
+            self.assertEqual(mocked_run_redis_script.call_count, 3)
+
+            Namespace.dbs_get_all_many(db_conn, mibs.COUNTERS_DB, {'': keys})
+            # the script is not loaded again
+            self.assertEqual(mocked_load_redis_script.call_count, 1)
+            self.assertEqual(mocked_run_redis_script.call_count, 5)
+
+        self.assertEqual(result, {'': expected})
+        mocked_get_all.assert_not_called()
+
+    def test_dbs_get_all_many_fields(self):
+        db_conn = Namespace.init_namespace_dbs()
+        key = "COUNTERS:oid:0x1000000000005"
+        counters = db_conn[0].get_all(mibs.COUNTERS_DB, key)
+        fields = ["SAI_PORT_STAT_IF_IN_OCTETS", "SAI_PORT_STAT_NOT_A_COUNTER"]
+
+        result = Namespace.dbs_get_all_many(db_conn, mibs.COUNTERS_DB, {'': [key]}, fields=fields)
+
+        self.assertEqual(result[''][key], {"SAI_PORT_STAT_IF_IN_OCTETS": counters["SAI_PORT_STAT_IF_IN_OCTETS"]})
+
+    def test_dbs_get_all_many_fields_without_pipeline(self):
+        db_conn = Namespace.init_namespace_dbs()
+        keys = ["COUNTERS:oid:0x1000000000005", "COUNTERS:oid:0xdeadbeef"]
+        counters = db_conn[0].get_all(mibs.COUNTERS_DB, keys[0])
+        fields = ["SAI_PORT_STAT_IF_IN_OCTETS", "SAI_PORT_STAT_NOT_A_COUNTER"]
+        mocked_load_redis_script, mocked_run_redis_script = \
+            self.mock_redis_script(db_conn[0].get_redis_client(mibs.COUNTERS_DB), loaded=True)
+
+        with mock.patch('swsscommon.swsscommon.SonicV2Connector.get_redis_client', mock.MagicMock(return_value=object())), \
+                mock.patch('swsscommon.swsscommon.loadRedisScript', mocked_load_redis_script, create=True), \
+                mock.patch('swsscommon.swsscommon.runRedisScript', mocked_run_redis_script, create=True), \
+                mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all') as mocked_get_all:
+            result = Namespace.dbs_get_all_many(db_conn, mibs.COUNTERS_DB, {'': keys}, fields=fields)
+
+        self.assertEqual(result[''], {keys[0]: {"SAI_PORT_STAT_IF_IN_OCTETS": counters["SAI_PORT_STAT_IF_IN_OCTETS"]},
+                                      keys[1]: {}})
+        # HMGET of the fields only, in one round trip
+        mocked_run_redis_script.assert_called_once_with(mock.ANY, mibs.GET_ALL_MANY_SCRIPT_SHA, keys, fields)
+        mocked_load_redis_script.assert_not_called()
+        mocked_get_all.assert_not_called()
+
+    def test_scan_keys(self):
+        db_conn = Namespace.init_namespace_dbs()
+        expected = db_conn[0].keys(mibs.COUNTERS_DB, "COUNTERS:oid:*")
+
+        batches = list(Namespace.scan(db_conn[0], mibs.COUNTERS_DB, "COUNTERS:oid:*", count=2))
+
+        self.assertTrue(len(batches) > 1)
+        self.assertTrue(all(len(batch) <= 2 for batch in batches))
+        self.assertEqual(sorted(Namespace.scan_keys(db_conn[0], mibs.COUNTERS_DB, "COUNTERS:oid:*", count=2)), sorted(expected))
+        self.assertEqual(sorted(Namespace.dbs_keys(db_conn, mibs.COUNTERS_DB, "COUNTERS:oid:*")), sorted(expected))
+
+    def test_scan_keys_async(self):
+        db_conn = Namespace.init_namespace_dbs()
+        expected = db_conn[0].keys(mibs.COUNTERS_DB, "COUNTERS:oid:*")
+
+        async def scan():
+            batches = []
+            async for batch in Namespace.scan_async(db_conn[0], mibs.COUNTERS_DB, "COUNTERS:oid:*", count=2):
+                batches.append(batch)
+            return (batches,
+                    await Namespace.dbs_keys_async(db_conn, mibs.COUNTERS_DB, "COUNTERS:oid:*"),
+                    await Namespace.dbs_keys_namespace_async(db_conn, mibs.COUNTERS_DB, "COUNTERS:oid:*"))
+
+        event_loop = asyncio.new_event_loop()
+        with mock.patch('sonic_ax_impl.mibs.asyncio.sleep', wraps=asyncio.sleep) as mocked_sleep:
+            batches, keys, namespace_keys = event_loop.run_until_complete(scan())
+        event_loop.close()
+
+        self.assertTrue(len(batches) > 1)
+        # yielded to the event loop between the SCAN calls
+        self.assertGreaterEqual(mocked_sleep.call_count, len(batches) - 1)
+        self.assertEqual(sorted(key for batch in batches for key in batch), sorted(expected))
+        self.assertEqual(sorted(keys), sorted(expected))
+        self.assertEqual(namespace_keys, Namespace.dbs_keys_namespace(db_conn, mibs.COUNTERS_DB, "COUNTERS:oid:*"))
+
+
+class TestInterfaceDirectory(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tests.mock_tables.dbconnector.load_database_config()
+
+    def setUp(self):
+        self.directory = mibs.InterfaceDirectory(('',))
+        self.directory.interface_period = 60
+        self.directory.lag_period = 60
+        self.reads = []
+        self.oid_name_map = {1: 'Ethernet0'}
+        self.get_sync_d_from_all_namespace = Namespace.get_sync_d_from_all_namespace
+
+    def mock_get_sync_d_from_all_namespace(self, per_namespace_func, dbs):
+        self.reads.append(per_namespace_func)
+        if per_namespace_func == mibs.init_sync_d_interface_tables:
+            return [{'Ethernet0': '1000000000001'}, {'Ethernet0': 'etp1'}, {'1000000000001': 'Ethernet0'}, dict(self.oid_name_map)]
+        if per_namespace_func == mibs.init_sync_d_lag_tables:
+            return [{}, {}, {}, {}, {}]
+        return self.get_sync_d_from_all_namespace(per_namespace_func, dbs)
+
+    def test_shared_read(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', self.mock_get_sync_d_from_all_namespace):
+            first = self.directory.interface_tables()
+            second = self.directory.interface_tables()
+            self.directory.lag_tables()
+
+        self.assertIs(first, second)
+        self.assertEqual(first[3], {1: 'Ethernet0'})
+        self.assertEqual(self.reads, [mibs.init_sync_d_interface_tables, mibs.init_sync_d_lag_tables])
+
+    def test_every_call_reads(self):
+        self.directory.interface_period = 0
+        with mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', self.mock_get_sync_d_from_all_namespace):
+            self.directory.interface_tables()
+            self.directory.interface_tables()
+
+        self.assertEqual(len(self.reads), 2)
+
+    def test_next_round(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', self.mock_get_sync_d_from_all_namespace), \
+                mock.patch('sonic_ax_impl.mibs.time.monotonic', side_effect=[10, 59, 61]):
+            self.directory.interface_tables()
+            self.directory.interface_tables()
+            self.directory.interface_tables()
+
+        self.assertEqual(len(self.reads), 2)
+
+    def test_generation(self):
+        self.directory.interface_period = 0
+        with mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', self.mock_get_sync_d_from_all_namespace):
+            self.directory.interface_tables()
+            generation = self.directory.generation
+            # same maps read again
+            self.directory.interface_tables()
+            self.assertEqual(self.directory.generation, generation)
+
+            self.oid_name_map[2] = 'Ethernet4'
+            self.directory.interface_tables()
+            self.assertEqual(self.directory.generation, generation + 1)
+
+    def test_updaters_share_reinit(self):
+        from sonic_ax_impl.mibs.ietf.rfc2863 import InterfaceMIBUpdater
+        from sonic_ax_impl.mibs.vendor.cisco.ciscoPfcExtMIB import PfcUpdater
+
+        updaters = [InterfaceMIBUpdater(), PfcUpdater()]
+        with mock.patch('sonic_ax_impl.mibs.InterfaceDirectory._instance', self.directory), \
+                mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', self.mock_get_sync_d_from_all_namespace):
+            for updater in updaters:
+                updater.reinit_data()
+                updater.update_data()
+            if_ranges = [updater.if_range for updater in updaters]
+            for updater in updaters:
+                updater.update_data()
+
+        self.assertEqual(self.reads.count(mibs.init_sync_d_interface_tables), 1)
+        self.assertEqual(self.reads.count(mibs.init_sync_d_lag_tables), 1)
+        for updater, if_range in zip(updaters, if_ranges):
+            self.assertEqual(updater.directory_generation, self.directory.generation)
+            # nothing changed, if_range was not derived again
+            self.assertIs(updater.if_range, if_range)
+            self.assertIn((1,), updater.if_range)
+
+    def test_per_namespace_config(self):
+        directory = mibs.InterfaceDirectory.get()
+        self.assertIs(mibs.InterfaceDirectory.get(), directory)
+        self.assertEqual(directory.namespaces, ('',))
+
+
+class TestPortCounterCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tests.mock_tables.dbconnector.load_database_config()
+
+    def setUp(self):
+        self.cache = mibs.PortCounterCache(('',))
+        self.cache.max_age = 60
+        self.key = "1000000000005"
+        self.columns = ["SAI_PORT_STAT_IF_IN_OCTETS"]
+
+    def test_shared_read(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many',
+                        wraps=Namespace.dbs_get_all_many) as mocked_get_all_many:
+            first = self.cache.port_counters('reader', [self.key], self.columns)
+            second = self.cache.port_counters('other reader', [self.key], self.columns)
+
+        self.assertEqual(mocked_get_all_many.call_count, 1)
+        self.assertIs(first, second)
+        self.assertEqual(list(first[self.key]), self.columns)
+        self.assertIsInstance(first[self.key]["SAI_PORT_STAT_IF_IN_OCTETS"], int)
+
+    def test_poll(self):
+        self.cache.port_counters('reader', [self.key], self.columns)
+        self.cache.port_counters('other reader', ["1000000000001"], ["SAI_PORT_STAT_IF_OUT_OCTETS"])
+        self.cache.rif_counters('reader', ["6000000000006"])
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many',
+                        wraps=Namespace.dbs_get_all_many) as mocked_get_all_many:
+            # the owner reads the union of the ports and columns of the readers
+            self.cache.poll()
+            port_counters = self.cache.port_counters('reader', [self.key], self.columns)
+            other_counters = self.cache.port_counters('other reader', ["1000000000001"], ["SAI_PORT_STAT_IF_OUT_OCTETS"])
+            rif_counters = self.cache.rif_counters('reader', ["6000000000006"])
+
+        # one read of the ports, one of the router interfaces, the readers got the published snapshot
+        self.assertEqual(mocked_get_all_many.call_count, 2)
+        self.assertIs(port_counters, other_counters)
+        self.assertEqual(set(port_counters), {self.key, "1000000000001"})
+        self.assertEqual(set(port_counters[self.key]), {"SAI_PORT_STAT_IF_IN_OCTETS", "SAI_PORT_STAT_IF_OUT_OCTETS"})
+        self.assertIn("6000000000006", rif_counters)
+
+    def test_updater_polls_shared_cache(self):
+        self.cache.port_counters('reader', [self.key], self.columns)
+        with mock.patch('sonic_ax_impl.mibs.PortCounterCache._instance', self.cache):
+            snapshot = self.cache.port_snapshot
+            mibs.PortCounterUpdater.get().update_data()
+
+        self.assertIsNot(self.cache.port_snapshot, snapshot)
+        self.assertIs(mibs.PortCounterUpdater.get(), mibs.PortCounterUpdater.get())
+
+    def test_new_columns(self):
+        self.cache.port_counters('reader', [self.key], self.columns)
+        counters = self.cache.port_counters('other reader', [self.key], ["SAI_PORT_STAT_IF_OUT_OCTETS"])
+
+        self.assertEqual(set(counters[self.key]), {"SAI_PORT_STAT_IF_IN_OCTETS", "SAI_PORT_STAT_IF_OUT_OCTETS"})
+
+    def test_expired(self):
+        self.cache.max_age = 0
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many',
+                        wraps=Namespace.dbs_get_all_many) as mocked_get_all_many:
+            self.cache.port_counters('reader', [self.key], self.columns)
+            self.cache.port_counters('reader', [self.key], self.columns)
+
+        self.assertEqual(mocked_get_all_many.call_count, 2)
+
+    def test_malformed_counter(self):
+        columns = ["SAI_PORT_STAT_IF_IN_OCTETS", "SAI_PORT_STAT_IF_OUT_OCTETS"]
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', mock.MagicMock(return_value={
+                '': {"COUNTERS:oid:0x" + self.key: {"SAI_PORT_STAT_IF_IN_OCTETS": "N/A", "SAI_PORT_STAT_IF_OUT_OCTETS": "42"}}})):
+            counters = self.cache.port_counters('reader', [self.key], columns)
+
+        # only the malformed counter is missing
+        self.assertEqual(counters[self.key], {"SAI_PORT_STAT_IF_OUT_OCTETS": 42})
+
+    def test_rif_counters(self):
+        counters = self.cache.rif_counters('reader', ["6000000000006", "deadbeef"])
+
+        self.assertTrue(counters["6000000000006"])
+        self.assertTrue(set(counters["6000000000006"]) <= set(mibs.PortCounterCache.RIF_COLUMNS))
+        self.assertEqual(counters["deadbeef"], {})
+
+
+class TestConnectorPool(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tests.mock_tables.dbconnector.load_database_config()
+
+    def setUp(self):
+        self.pool = mibs.ConnectorPool(('',))
+
+    def test_shared_connectors(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.init_namespace_dbs',
+                        wraps=Namespace.init_namespace_dbs) as mocked_init_namespace_dbs:
+            first = self.pool.borrow()
+            second = self.pool.borrow()
+
+        self.assertIs(first, second)
+        self.assertEqual(mocked_init_namespace_dbs.call_count, 1)
+        self.assertEqual(self.pool.borrowers, 2)
+
+    def test_release(self):
+        db_conn = self.pool.borrow()
+        self.pool.borrow()
+
+        with mock.patch.object(db_conn[0], 'close') as mocked_close:
+            self.pool.release(db_conn)
+            mocked_close.assert_not_called()
+            self.pool.release(db_conn)
+            self.assertEqual(mocked_close.call_count, len(mibs.NAMESPACE_DB_NAMES))
+            # released once too often
+            self.pool.release(db_conn)
+            self.assertEqual(mocked_close.call_count, len(mibs.NAMESPACE_DB_NAMES))
+        self.assertIsNone(self.pool.db_conn)
+        self.assertEqual(self.pool.borrowers, 0)
+
+        # borrowing again connects new connectors
+        self.assertIsNot(self.pool.borrow(), db_conn)
+
+    def test_release_foreign_connectors(self):
+        db_conn = self.pool.borrow()
+        other = Namespace.init_namespace_dbs()
+
+        self.pool.release(other)
+        self.assertIs(self.pool.db_conn, db_conn)
+        self.assertEqual(self.pool.borrowers, 1)
+
+    def test_updater_shutdown(self):
+        from sonic_ax_impl.mibs.vendor.cisco.ciscoPfcExtMIB import PfcUpdater
+
+        with mock.patch('sonic_ax_impl.mibs.ConnectorPool._instance', self.pool):
+            updaters = [PfcUpdater(), PfcUpdater()]
+            self.assertEqual(self.pool.borrowers, 2)
+            for updater in updaters:
+                updater.shutdown()
+
+        self.assertEqual(self.pool.borrowers, 0)
+        self.assertIsNone(self.pool.db_conn)
+
+    def test_after_fork(self):
+        with mock.patch('sonic_ax_impl.mibs.ConnectorPool._instance', self.pool), \
+                mock.patch('sonic_ax_impl.mibs.ConnectorPool._instance_lock', threading.Lock()), \
+                mock.patch('sonic_ax_impl.mibs.InterfaceDirectory._instance_lock', threading.Lock()), \
+                mock.patch('sonic_ax_impl.mibs.PortCounterCache._instance_lock', threading.Lock()), \
+                mock.patch('sonic_ax_impl.mibs.PortCounterUpdater._instance_lock', threading.Lock()):
+            self.pool.borrow()
+            # held by a thread which does not exist in the child
+            self.pool.lock.acquire()
+            mibs.ConnectorPool._instance_lock.acquire()
+
+            mibs._reconnect_after_fork()
+
+            self.assertFalse(self.pool.lock.locked())
+            self.assertFalse(mibs.ConnectorPool._instance_lock.locked())
+            self.assertIsNone(self.pool.db_conn)
+            self.assertEqual(self.pool.borrowers, 0)
+
+    def test_reconnect_broken_only(self):
+        db_conn = self.pool.borrow()
+
+        def mock_exists(db_name, key):
+            if db_name == mibs.COUNTERS_DB:
+                raise RuntimeError("connection reset")
+            return False
+
+        with mock.patch.object(db_conn[0], 'exists', side_effect=mock_exists), \
+                mock.patch.object(db_conn[0], 'connect') as mocked_connect:
+            self.pool.reconnect()
+
+        mocked_connect.assert_called_once_with(mibs.COUNTERS_DB)
+
+    def test_per_namespace_config(self):
+        pool = mibs.ConnectorPool.get()
+        self.assertIs(mibs.ConnectorPool.get(), pool)
+        self.assertEqual(pool.namespaces, ('',))
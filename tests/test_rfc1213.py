@@ -1,6 +1,8 @@
 import asyncio
+import os
 import sonic_ax_impl
 import sys
+import tempfile
 from unittest import TestCase
 
 if sys.version_info.major == 3:
@@ -9,12 +11,13 @@ else:
     import mock
 
 
-from sonic_ax_impl.mibs.ietf.rfc1213 import NextHopUpdater, InterfacesUpdater, DbTables
+from sonic_ax_impl import mibs
+from sonic_ax_impl.mibs.ietf.rfc1213 import NextHopUpdater, InterfacesUpdater, DbTables, ArpUpdater, parse_arp_table
+from tests.mock_tables.dbconnector import patch_keyspace_events
 
 
 class TestNextHopUpdater(TestCase):
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(["ROUTE_TABLE:0.0.0.0/0"])))
     @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock.MagicMock(return_value=({"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"})))
     def test_NextHopUpdater_route_has_next_hop(self):
         updater = NextHopUpdater()
@@ -28,7 +31,6 @@ class TestNextHopUpdater(TestCase):
         self.assertTrue(len(updater.route_list) == 1)
         self.assertTrue(updater.route_list[0] == (0,0,0,0))
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(["ROUTE_TABLE:0.0.0.0/0"])))
     @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock.MagicMock(return_value=({"ifname": "Ethernet0,Ethernet4"})))
     def test_NextHopUpdater_route_no_next_hop(self):
         updater = NextHopUpdater()
@@ -52,7 +54,7 @@ class TestNextHopUpdaterRedisException(TestCase):
         self.updater = NextHopUpdater()
     
     # setup mock method, throw exception when first time call it
-    def mock_dbs_keys(self, *args, **kwargs):
+    def mock_dbs_get_all(self, *args, **kwargs):
         if self.throw_exception:
             self.throw_exception = False
             raise RuntimeError
@@ -60,9 +62,8 @@ class TestNextHopUpdaterRedisException(TestCase):
         self.updater.run_event.clear()
         return None
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock.MagicMock(return_value=({"ifname": "Ethernet0,Ethernet4"})))
     def test_NextHopUpdater_redis_exception(self):
-        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', self.mock_dbs_keys):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', self.mock_dbs_get_all):
             with mock.patch('ax_interface.logger.exception') as mocked_exception:
                 self.updater.run_event.set()
                 self.updater.frequency = 1
@@ -96,12 +97,12 @@ class TestNextHopUpdaterRedisException(TestCase):
         
         updater = InterfacesUpdater()
         with mock.patch('sonic_ax_impl.mibs.Namespace.get_sync_d_from_all_namespace', mock_get_sync_d_from_all_namespace):
-            with mock.patch('sonic_ax_impl.mibs.Namespace.connect_namespace_dbs') as connect_namespace_dbs:
+            with mock.patch('sonic_ax_impl.mibs.ConnectorPool.reconnect') as reconnect:
                 updater.reinit_connection()
                 updater.reinit_data()
 
                 # check re-init
-                connect_namespace_dbs.assert_called()
+                reconnect.assert_called()
 
 
     def test_InterfaceUpdater_get_counters(self):
@@ -160,3 +161,108 @@ class TestNextHopUpdaterRedisException(TestCase):
         except TypeError:
             self.fail("Caught Type error")
         self.assertTrue(counter == None)
+
+
+ARP_TABLE_HEADER = b"IP address       HW type     Flags       HW address            Mask     Device\n"
+
+
+class TestArpUpdater(TestCase):
+
+    def setUp(self):
+        self.updater = ArpUpdater()
+        self.neighbors = {"NEIGH_TABLE:Ethernet0:10.0.0.1": {"neigh": "00:11:22:33:44:55", "family": "IPv4"}}
+        self.dbs_get_all_many = mock.MagicMock(side_effect=lambda dbs, db_name, keys_by_namespace:
+                                               {namespace: dict(self.neighbors) for namespace in keys_by_namespace})
+        self.pubsub = patch_keyspace_events(self, 0, [
+            mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', self.dbs_get_all_many),
+            mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all',
+                       mock.MagicMock(side_effect=lambda db_name, key, blocking=False: self.neighbors.get(key, {}))),
+        ])
+        self.updater.update_data()
+        self.ethernet0 = mibs.get_index_from_str("Ethernet0")
+        self.ethernet4 = mibs.get_index_from_str("Ethernet4")
+
+    def test_resync(self):
+        self.assertEqual(self.updater.get_next(()), (self.ethernet0, 10, 0, 0, 1))
+        self.assertEqual(self.updater.arp_dest((self.ethernet0, 10, 0, 0, 1)), '\x00\x11\x22\x33\x44\x55')
+
+    def test_incremental_update(self):
+        generation = self.updater.generation
+        self.updater.update_data()
+        self.assertEqual(self.updater.generation, generation)
+
+        self.neighbors["NEIGH_TABLE:Ethernet4:10.0.0.3"] = {"neigh": "00:11:22:33:44:66", "family": "IPv4"}
+        self.neighbors["NEIGH_TABLE:Ethernet4:fc00::3"] = {"neigh": "00:11:22:33:44:66", "family": "IPv6"}
+        del self.neighbors["NEIGH_TABLE:Ethernet0:10.0.0.1"]
+        self.pubsub.notify("NEIGH_TABLE:Ethernet4:10.0.0.3", 'hset')
+        self.pubsub.notify("NEIGH_TABLE:Ethernet4:fc00::3", 'hset')
+        self.pubsub.notify("NEIGH_TABLE:Ethernet0:10.0.0.1", 'del')
+        self.updater.update_data()
+
+        self.dbs_get_all_many.assert_called_once()
+        self.assertEqual(self.updater.generation, generation + 1)
+        self.assertEqual(self.updater.get_next_many((), 10), ((self.ethernet4, 10, 0, 0, 3),))
+
+    def test_arptable_change(self):
+        content = ARP_TABLE_HEADER + b"10.0.0.5         0x1         0x2         00:11:22:33:44:77     *        Ethernet4\n"
+        with mock.patch('sonic_ax_impl.mibs.ietf.rfc1213.parse_arp_table', wraps=parse_arp_table) as mocked_parse, \
+             mock.patch('builtins.open', mock.mock_open(read_data=content)):
+            self.assertTrue(self.updater.update_from_arptable())
+            # the same content isn't parsed again
+            self.assertFalse(self.updater.update_from_arptable())
+            mocked_parse.assert_called_once_with(content)
+
+        self.assertEqual(self.updater.arp_dest_table.index.get((self.ethernet4, 10, 0, 0, 5)), 0x001122334477)
+
+    def test_arptable_stat(self):
+        content = ARP_TABLE_HEADER + b"10.0.0.5         0x1         0x2         00:11:22:33:44:77     *        Ethernet4\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'arp')
+            with open(path, 'wb') as arp_table:
+                arp_table.write(content)
+            with mock.patch('sonic_ax_impl.mibs.ietf.rfc1213.ARP_TABLE_PATH', path):
+                self.assertTrue(self.updater.update_from_arptable())
+                # a regular file isn't read again while its size and mtime stay the same
+                with mock.patch('builtins.open') as mocked_open:
+                    self.assertFalse(self.updater.update_from_arptable())
+                    mocked_open.assert_not_called()
+
+                with open(path, 'ab') as arp_table:
+                    arp_table.write(b"10.0.0.6         0x1         0x2         00:11:22:33:44:78     *        Ethernet4\n")
+                self.assertTrue(self.updater.update_from_arptable())
+
+        self.assertEqual(self.updater.arp_dest_table.index.get((self.ethernet4, 10, 0, 0, 6)), 0x001122334478)
+
+    def mock_namespace_db(self, neighbors):
+        # a second namespace holding its own NEIGH_TABLE
+        db = mock.MagicMock()
+        db.get_all.side_effect = lambda db_name, key, blocking=False: neighbors.get(key, {})
+        self.updater.db_conn = [self.updater.db_conn[0], db]
+
+    def test_delete_held_by_other_namespace(self):
+        neigh_key = "NEIGH_TABLE:Ethernet0:10.0.0.1"
+        sub_id = (self.ethernet0, 10, 0, 0, 1)
+        namespace_neighbors = {neigh_key: {"neigh": "00:11:22:33:44:99", "family": "IPv4"}}
+        self.mock_namespace_db(namespace_neighbors)
+
+        del self.neighbors[neigh_key]
+        self.updater.update_neigh(0, neigh_key, 'del')
+        # the row of the other namespace replaces it
+        self.assertEqual(self.updater.arp_dest_table.index.get(sub_id), 0x001122334499)
+
+        del namespace_neighbors[neigh_key]
+        self.updater.update_neigh(1, neigh_key, 'del')
+        self.assertIsNone(self.updater.arp_dest_table.index.get(sub_id))
+
+    def test_arptable_fallback(self):
+        sub_id = (self.ethernet0, 10, 0, 0, 1)
+        self.mock_namespace_db({})
+        content = ARP_TABLE_HEADER + b"10.0.0.1         0x1         0x2         00:11:22:33:44:77     *        Ethernet0\n"
+        with mock.patch('builtins.open', mock.mock_open(read_data=content)):
+            self.updater.update_from_arptable()
+        self.assertEqual(self.updater.arp_dest_table.index.get(sub_id), 0x001122334477)
+        with mock.patch('builtins.open', mock.mock_open(read_data=ARP_TABLE_HEADER)):
+            self.assertTrue(self.updater.update_from_arptable())
+
+        # back to the NEIGH_TABLE row of the first namespace, the namespace lacking it doesn't remove it
+        self.assertEqual(self.updater.arp_dest_table.index.get(sub_id), 0x001122334455)
@@ -29,11 +29,11 @@ class TestPhysicalSensorTableMIBUpdater(TestCase):
     def test_PhysicalSensorTableMIBUpdater_re_init_redis_exception(self):
         updater = PhysicalSensorTableMIBUpdater()
 
-        with mock.patch('sonic_ax_impl.mibs.Namespace.connect_all_dbs') as connect_all_dbs:
+        with mock.patch('sonic_ax_impl.mibs.ConnectorPool.reconnect') as reconnect:
             updater.reinit_connection()
 
             # check re-init
-            connect_all_dbs.assert_called()
+            reconnect.assert_called()
 
     @mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all', mock.MagicMock(return_value=({"position_in_parent" : '0', "parent_name" : "FABRIC-CARD0"})))
     def test_PhysicalSensorTableMIBUpdater_fabriccard_update_fan_sensor_data(self):
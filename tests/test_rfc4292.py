@@ -8,11 +8,20 @@ else:
 
 
 from sonic_ax_impl.mibs.ietf.rfc4292 import RouteUpdater
+from tests.mock_tables.dbconnector import patch_keyspace_events
+
+
+def mock_routes(ent):
+    # dbs_get_all_many() of a ROUTE_TABLE holding only the default route
+    def dbs_get_all_many(dbs, db_name, keys_by_namespace):
+        return {namespace: {"ROUTE_TABLE:0.0.0.0/0": ent} for namespace in keys_by_namespace}
+    return mock.MagicMock(side_effect=dbs_get_all_many)
+
 
 class TestRouteUpdater(TestCase):
 
     @mock.patch('sonic_py_common.multi_asic.get_all_namespaces', mock.MagicMock(return_value=({"front_ns": ['']})))
-    @mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all', mock.MagicMock(return_value=({"nexthop": "10.0.0.1", "ifname": "Ethernet0"})))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', mock_routes({"nexthop": "10.0.0.1", "ifname": "Ethernet0"}))
     def test_RouteUpdater_route_has_next_hop_and_iframe(self):
         updater = RouteUpdater()
 
@@ -26,7 +35,7 @@ class TestRouteUpdater(TestCase):
         self.assertTrue(updater.route_dest_list[0] == (0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 1))
 
     @mock.patch('sonic_py_common.multi_asic.get_all_namespaces', mock.MagicMock(return_value=({"front_ns": ['']})))
-    @mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all', mock.MagicMock(return_value=({"ifname": "Ethernet0"})))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', mock_routes({"ifname": "Ethernet0"}))
     def test_RouteUpdater_route_no_next_hop(self):
         updater = RouteUpdater()
 
@@ -42,7 +51,7 @@ class TestRouteUpdater(TestCase):
         self.assertTrue(len(updater.route_dest_list) == 0)
 
     @mock.patch('sonic_py_common.multi_asic.get_all_namespaces', mock.MagicMock(return_value=({"front_ns": ['']})))
-    @mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all', mock.MagicMock(return_value=({"nexthop": "10.0.0.1"})))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', mock_routes({"nexthop": "10.0.0.1"}))
     def test_RouteUpdater_route_no_iframe(self):
         updater = RouteUpdater()
 
@@ -66,4 +75,63 @@ class TestRouteUpdater(TestCase):
             updater.reinit_connection()
 
             # check re-init
-            connect_all_dbs.assert_called()
\ No newline at end of file
+            connect_all_dbs.assert_called()
+
+
+class TestRouteUpdaterNotifications(TestCase):
+
+    def setUp(self):
+        self.updater = RouteUpdater()
+        self.routes = {"ROUTE_TABLE:0.0.0.0/0": {"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"}}
+        self.dbs_get_all_many = mock.MagicMock(side_effect=lambda dbs, db_name, keys_by_namespace:
+                                               {namespace: dict(self.routes) for namespace in keys_by_namespace})
+        self.pubsub = patch_keyspace_events(self, 0, [
+            mock.patch('sonic_py_common.multi_asic.get_all_namespaces', mock.MagicMock(return_value=({"front_ns": ['']}))),
+            mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', self.dbs_get_all_many),
+            mock.patch('swsscommon.swsscommon.SonicV2Connector.get_all',
+                       mock.MagicMock(side_effect=lambda db_name, key, blocking=False: self.routes.get(key, {}))),
+        ])
+        self.updater.update_data()
+
+    def test_resync(self):
+        self.assertEqual(self.updater.route_dest_list, ((0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 1),
+                                                        (0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 3)))
+        self.assertEqual(self.updater.route_dest((0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 1)), bytes(4))
+        self.assertEqual(self.updater.route_status((0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 3)), 1)
+
+    def test_no_change(self):
+        generation = self.updater.generation
+        self.updater.update_data()
+
+        self.assertEqual(self.updater.generation, generation)
+        self.dbs_get_all_many.assert_called_once()
+
+    def test_incremental_update(self):
+        self.routes["ROUTE_TABLE:192.168.0.0/24"] = {"nexthop": "10.0.0.5", "ifname": "Ethernet8"}
+        self.routes["ROUTE_TABLE:0.0.0.0/0"] = {"nexthop": "10.0.0.3", "ifname": "Ethernet4"}
+        self.pubsub.notify("ROUTE_TABLE:192.168.0.0/24", 'hset')
+        self.pubsub.notify("ROUTE_TABLE:0.0.0.0/0", 'hset')
+        # ipCidrRouteTable only holds IPv4 routes
+        self.pubsub.notify("ROUTE_TABLE:fc00::/64", 'hset')
+        self.updater.update_data()
+
+        self.dbs_get_all_many.assert_called_once()
+        self.assertEqual(self.updater.route_dest_list, ((0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 3),
+                                                        (192, 168, 0, 0, 255, 255, 255, 0, 0, 10, 0, 0, 5)))
+
+        del self.routes["ROUTE_TABLE:192.168.0.0/24"]
+        self.pubsub.notify("ROUTE_TABLE:192.168.0.0/24", 'del')
+        self.updater.update_data()
+
+        self.assertEqual(self.updater.route_dest_list, ((0, 0, 0, 0, 0, 0, 0, 0, 0, 10, 0, 0, 3),))
+
+    def test_memory_budget(self):
+        self.routes["ROUTE_TABLE:192.168.0.0/24"] = {"nexthop": "10.0.0.5", "ifname": "Ethernet8"}
+        self.pubsub.notify("ROUTE_TABLE:192.168.0.0/24", 'hset')
+        row_size = self.updater.route_dest_table.index.row_size
+        with mock.patch('sonic_ax_impl.mibs.ietf.rfc4292.ROUTE_INDEX_MEMORY_BUDGET', 2 * row_size), \
+             mock.patch('sonic_ax_impl.mibs.logger.warning') as mocked_warning:
+            self.updater.update_data()
+
+            mocked_warning.assert_called_once()
+        self.assertEqual(len(self.updater.route_dest_list), 2)
@@ -9,11 +9,14 @@ else:
 
 
 from sonic_ax_impl.mibs.ietf.rfc4363 import FdbUpdater
+from tests.mock_tables.dbconnector import patch_keyspace_events
 
 class TestFdbUpdater(TestCase):
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(['ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'])))
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all', mock.MagicMock(return_value=({"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"})))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.scan_keys', mock.MagicMock(return_value=(['ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'])))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', lambda dbs, db_name, keys_by_namespace: {
+        namespace: {key: {"nexthop": "10.0.0.1,10.0.0.3", "ifname": "Ethernet0,Ethernet4"} for key in keys}
+        for namespace, keys in keys_by_namespace.items()})
     def test_FdbUpdater_ent_bridge_port_id_attr_missing(self):
         updater = FdbUpdater()
 
@@ -26,7 +29,7 @@ class TestFdbUpdater(TestCase):
         self.assertTrue(len(updater.vlanmac_ifindex_list) == 0)
 
 
-    @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_keys', mock.MagicMock(return_value=(None)))
+    @mock.patch('sonic_ax_impl.mibs.Namespace.scan_keys', mock.MagicMock(return_value=([])))
     @mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map', mock.MagicMock(return_value=(None)))
     def test_RouteUpdater_re_init_redis_exception(self):
         updater = FdbUpdater()
@@ -42,4 +45,94 @@ class TestFdbUpdater(TestCase):
                 updater.reinit_connection()
 
                 # check re-init
-                connect_namespace_dbs.assert_called()
\ No newline at end of file
+                connect_namespace_dbs.assert_called()
+
+FDB_KEY_1 = 'ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"60:45:BD:98:6F:48","switch_id":"oid:0x21000000000000"}'
+FDB_KEY_2 = 'ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:{"bvid":"oid:0x26000000000b6c","mac":"00:11:22:33:44:55","switch_id":"oid:0x21000000000000"}'
+FDB_ENTRIES = {
+    FDB_KEY_1: ((1000, 96, 69, 189, 152, 111, 72), 1),
+    FDB_KEY_2: ((1000, 0, 17, 34, 51, 68, 85), 5),
+}
+
+
+class TestFdbUpdaterNotifications(TestCase):
+
+    def setUp(self):
+        self.updater = FdbUpdater()
+        self.scan_keys = mock.MagicMock(return_value=[FDB_KEY_1])
+        self.dbs_get_all_many = mock.MagicMock(side_effect=lambda dbs, db_name, keys_by_namespace: {
+            namespace: {key: {} for key in keys} for namespace, keys in keys_by_namespace.items()})
+        self.pubsub = patch_keyspace_events(self, 1, [
+            mock.patch('sonic_ax_impl.mibs.Namespace.scan_keys', self.scan_keys),
+            mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_all_many', self.dbs_get_all_many),
+            mock.patch.object(self.updater, 'read_fdb_entry', FDB_ENTRIES.get),
+            mock.patch.object(self.updater, '_fdb_row', lambda fdb_str, fdb, ent: FDB_ENTRIES.get(fdb_str)),
+        ])
+        # the vlanmac of a deleted entry is read from its key
+        self.updater.bvid_vlan_map["oid:0x26000000000b6c"] = "1000"
+        self.updater.update_data()
+
+    def test_resync(self):
+        self.assertEqual(self.updater.vlanmac_ifindex_list, (FDB_ENTRIES[FDB_KEY_1][0],))
+        self.scan_keys.assert_called_once()
+        # the entries are read with one bulk call
+        self.dbs_get_all_many.assert_called_once()
+
+    def test_no_change(self):
+        generation = self.updater.generation
+        self.updater.update_data()
+
+        self.assertEqual(self.updater.generation, generation)
+        self.scan_keys.assert_called_once()
+
+    def test_incremental_update(self):
+        self.pubsub.notify(FDB_KEY_2, 'hset')
+        self.pubsub.notify(FDB_KEY_1, 'del')
+        self.updater.update_data()
+
+        self.scan_keys.assert_called_once()
+        self.assertEqual(self.updater.vlanmac_ifindex_list, (FDB_ENTRIES[FDB_KEY_2][0],))
+        self.assertEqual(self.updater.fdb_ifindex(FDB_ENTRIES[FDB_KEY_2][0]), 5)
+        self.assertIsNone(self.updater.fdb_ifindex(FDB_ENTRIES[FDB_KEY_1][0]))
+
+        self.pubsub.notify(FDB_KEY_1, 'hset')
+        self.updater.update_data()
+
+        self.assertEqual(self.updater.vlanmac_ifindex_list,
+                         tuple(sorted(entry[0] for entry in FDB_ENTRIES.values())))
+
+    def test_resync_on_overflow(self):
+        self.pubsub.notify(FDB_KEY_2, 'hset')
+        self.pubsub.notify(FDB_KEY_2, 'hset')
+        self.updater.fdb_events.max_pending = 1
+        self.updater.update_data()
+
+        self.assertEqual(self.scan_keys.call_count, 2)
+        self.assertEqual(self.pubsub.messages, [])
+
+    def test_resync_on_reinit(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map', mock.MagicMock(return_value={})):
+            self.updater.reinit_data()
+        self.updater.update_data()
+
+        self.assertEqual(self.scan_keys.call_count, 2)
+
+    def test_no_resync_on_unchanged_reinit(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map', mock.MagicMock(return_value={})):
+            self.updater.reinit_data()
+            self.updater.update_data()
+            self.updater.reinit_data()
+        self.updater.update_data()
+
+        self.assertEqual(self.scan_keys.call_count, 2)
+
+    def test_resync_on_bridge_port_change(self):
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map', mock.MagicMock(return_value={})):
+            self.updater.reinit_data()
+            self.updater.update_data()
+        with mock.patch('sonic_ax_impl.mibs.Namespace.dbs_get_bridge_port_map',
+                        mock.MagicMock(return_value={'3a000000000608': 'oid:0x1000000000003'})):
+            self.updater.reinit_data()
+        self.updater.update_data()
+
+        self.assertEqual(self.scan_keys.call_count, 3)
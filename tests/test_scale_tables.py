@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from tests.mock_tables import scale_tables
+
+SCALE = {
+    'ports': 24,
+    'queues': 4,
+    'lags': 3,
+    'lag_members': 2,
+    'fdb': 50,
+    'neighbors': 40,
+    'routes': 10,
+    'ecmp': 4,
+    'transceivers': 12,
+}
+
+
+class TestScaleTables(TestCase):
+
+    def check_namespace(self, tables):
+        appl, asic_db, counters = tables['appl_db'], tables['asic_db'], tables['counters_db']
+
+        port_name_map = counters['COUNTERS_PORT_NAME_MAP']
+        for name, oid in port_name_map.items():
+            self.assertIn('PORT_TABLE:' + name, appl)
+            self.assertIn('COUNTERS:' + oid, counters)
+            self.assertIn('SAI_PORT_STAT_IF_IN_OCTETS', counters['COUNTERS:' + oid])
+
+        for queue_name, oid in counters['COUNTERS_QUEUE_NAME_MAP'].items():
+            self.assertIn(queue_name.split(':')[0], port_name_map)
+            self.assertIn(oid, counters['COUNTERS_QUEUE_TYPE_MAP'])
+            self.assertIn('COUNTERS:' + oid, counters)
+
+        for key in appl:
+            if key.startswith('LAG_MEMBER_TABLE:'):
+                _, lag_name, member = key.split(':')
+                self.assertIn('LAG_TABLE:' + lag_name, appl)
+                self.assertIn(member, port_name_map)
+
+        rif_name_map = counters['COUNTERS_RIF_NAME_MAP']
+        for oid in rif_name_map.values():
+            rif = asic_db['ASIC_STATE:SAI_OBJECT_TYPE_ROUTER_INTERFACE:' + oid]
+            self.assertIn(rif['SAI_ROUTER_INTERFACE_ATTR_PORT_ID'],
+                          set(port_name_map.values()) | set(counters['COUNTERS_LAG_NAME_MAP'].values()))
+
+        for key, fdb in asic_db.items():
+            if key.startswith('ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:'):
+                fdb_key = json.loads(key[len('ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:'):])
+                self.assertIn('ASIC_STATE:SAI_OBJECT_TYPE_VLAN:' + fdb_key['bvid'], asic_db)
+                bridge_port = asic_db['ASIC_STATE:SAI_OBJECT_TYPE_BRIDGE_PORT:' +
+                                      fdb['SAI_FDB_ENTRY_ATTR_BRIDGE_PORT_ID']]
+                self.assertIn(bridge_port['SAI_BRIDGE_PORT_ATTR_PORT_ID'], port_name_map.values())
+
+        neighbors = {key.split(':', 2)[2] for key in appl if key.startswith('NEIGH_TABLE:')}
+        for key, route in appl.items():
+            if key.startswith('ROUTE_TABLE:'):
+                next_hops = route['nexthop'].split(',')
+                self.assertEqual(len(next_hops), len(route['ifname'].split(',')))
+                self.assertTrue(set(next_hops) <= neighbors)
+
+    def test_single_asic(self):
+        namespaces = scale_tables.ScaleGenerator(**SCALE).generate()
+        self.assertEqual(list(namespaces), [None])
+        tables = namespaces[None]
+        self.check_namespace(tables)
+
+        counters = tables['counters_db']
+        self.assertEqual(len(counters['COUNTERS_PORT_NAME_MAP']), 24)
+        self.assertEqual(len(counters['COUNTERS_QUEUE_NAME_MAP']), 24 * 4)
+        self.assertEqual(len(counters['COUNTERS_LAG_NAME_MAP']), 3)
+        # one per LAG and per port outside of the LAGs
+        self.assertEqual(len(counters['COUNTERS_RIF_NAME_MAP']), 3 + 24 - 3 * 2)
+        self.assertEqual(sum(key.startswith('ASIC_STATE:SAI_OBJECT_TYPE_FDB_ENTRY:') for key in tables['asic_db']),
+                         50)
+        self.assertEqual(sum(key.startswith('NEIGH_TABLE:') for key in tables['appl_db']), 40)
+        # and the default route
+        self.assertEqual(sum(key.startswith('ROUTE_TABLE:') for key in tables['appl_db']), 10 + 1)
+        self.assertEqual(sum(key.startswith('TRANSCEIVER_DOM_SENSOR|') for key in tables['state_db']), 12)
+        self.assertIn('LLDP_LOC_CHASSIS', tables['appl_db'])
+
+    def test_deterministic(self):
+        first = scale_tables.ScaleGenerator(seed=1, **SCALE).generate()[None].dbs
+        second = scale_tables.ScaleGenerator(seed=1, **SCALE).generate()[None].dbs
+        self.assertEqual(first, second)
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            scale_tables.ScaleGenerator(vlans=3)
+
+    def test_multi_asic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            namespaces = scale_tables.write_tables(directory, asics=3, **SCALE)
+            self.assertEqual(sorted(namespaces), ['asic0', 'asic1', 'asic2', 'global_db'])
+            for namespace in namespaces:
+                for db_file in scale_tables.DB_FILES + ('database_config',):
+                    self.assertTrue(os.path.exists(os.path.join(directory, namespace, db_file + '.json')))
+            with open(os.path.join(directory, 'database_global.json')) as f:
+                includes = json.load(f)['INCLUDES']
+            self.assertEqual([include.get('namespace') for include in includes], [None, 'asic0', 'asic1', 'asic2'])
+
+        ports = []
+        for namespace in ('asic0', 'asic1', 'asic2'):
+            self.check_namespace(namespaces[namespace])
+            ports.extend(namespaces[namespace]['counters_db']['COUNTERS_PORT_NAME_MAP'])
+            self.assertEqual(namespaces[namespace]['config_db']['DEVICE_METADATA|localhost'], {'sub_role': 'FrontEnd'})
+        # the ports are spread over the ASICs
+        self.assertEqual(len(ports), 24)
+        self.assertEqual(len(set(ports)), 24)
+        # host only tables
+        self.assertIn('LLDP_LOC_CHASSIS', namespaces['global_db']['appl_db'])
+        self.assertEqual(namespaces['global_db']['counters_db'], {})
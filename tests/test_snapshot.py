@@ -0,0 +1,195 @@
+import pickle
+import random
+from unittest import TestCase
+
+from ax_interface.mib import MIBSnapshot, SnapshotBuffer, PackedMIBIndex, PackedSnapshotBuffer
+
+
+class TestMIBSnapshot(TestCase):
+
+    def test_get_next(self):
+        snapshot = MIBSnapshot({(2, 1): 'b', (1, 5): 'a', (10,): 'c'})
+        self.assertEqual(snapshot.keys, ((1, 5), (2, 1), (10,)))
+        self.assertEqual(snapshot.get_next(()), (1, 5))
+        self.assertEqual(snapshot.get_next((1, 5)), (2, 1))
+        self.assertEqual(snapshot.get_next((3,)), (10,))
+        self.assertIsNone(snapshot.get_next((10,)))
+
+    def test_get(self):
+        snapshot = MIBSnapshot({(1,): 'a'})
+        self.assertEqual(snapshot.get((1,)), 'a')
+        self.assertIsNone(snapshot.get((2,)))
+        self.assertIn((1,), snapshot)
+        self.assertEqual(len(snapshot), 1)
+
+
+class TestSnapshotBuffer(TestCase):
+
+    def test_publish(self):
+        table = SnapshotBuffer()
+        self.assertEqual(table.generation, 0)
+        self.assertIsNone(table.snapshot.get_next(()))
+
+        rows = table.back_buffer()
+        rows[(2,)] = 'b'
+        rows[(1,)] = 'a'
+        # nothing is visible before the swap
+        self.assertEqual(len(table.snapshot), 0)
+        table.publish(rows)
+        self.assertEqual(table.generation, 1)
+        self.assertEqual(table.snapshot.keys, ((1,), (2,)))
+
+    def test_publish_sorted_keys(self):
+        table = SnapshotBuffer()
+        keys = [(1,), (2,)]
+        rows = table.back_buffer()
+        rows.update({(2,): 'b', (1,): 'a'})
+        table.publish(rows, keys)
+        # the snapshot doesn't follow the updater's list
+        keys.append((3,))
+        self.assertEqual(table.snapshot.keys, ((1,), (2,)))
+        self.assertEqual(table.snapshot.get_next((1,)), (2,))
+
+    def test_consistent_walk(self):
+        table = SnapshotBuffer()
+        rows = table.back_buffer()
+        rows.update({(1,): 'a', (2,): 'b'})
+        table.publish(rows)
+
+        # a walk holding a snapshot is not affected by the next cycle
+        snapshot = table.snapshot
+        rows = table.back_buffer()
+        rows[(3,)] = 'c'
+        table.publish(rows)
+        self.assertEqual(snapshot.keys, ((1,), (2,)))
+        self.assertEqual(snapshot.get((2,)), 'b')
+        self.assertEqual(table.snapshot.keys, ((3,),))
+        self.assertEqual(table.generation, 2)
+
+    def test_back_buffer_recycled(self):
+        table = SnapshotBuffer()
+        first = table.back_buffer()
+        first[(1,)] = 'a'
+        table.publish(first)
+        table.publish(table.back_buffer())
+        # the rows retired by the second publish are reused, empty
+        recycled = table.back_buffer()
+        self.assertIs(recycled, first)
+        self.assertEqual(recycled, {})
+
+    def test_pickle(self):
+        table = SnapshotBuffer()
+        rows = table.back_buffer()
+        rows[(1, 2)] = 3
+        table.publish(rows)
+        table.back_buffer()
+
+        copy = pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.generation, 1)
+        self.assertEqual(copy.snapshot.keys, ((1, 2),))
+        self.assertEqual(copy.snapshot.get((1, 2)), 3)
+
+
+class TestPackedMIBIndex(TestCase):
+
+    ROWS = {(1000, 0, 17, 34, 51, 68, 85): 5, (10, 255, 0, 0, 0, 0, 1): 7, (1000, 0, 17, 34, 51, 68, 1): 3}
+
+    def setUp(self):
+        self.index = PackedMIBIndex((2, 1, 1, 1, 1, 1, 1))
+        self.index.load(self.ROWS)
+        self.snapshot = MIBSnapshot(dict(self.ROWS))
+
+    def test_load(self):
+        self.assertEqual(self.index.keys, self.snapshot.keys)
+        self.assertEqual(self.index.nbytes, 3 * (8 + 4))
+        self.assertEqual(self.index.get((1000, 0, 17, 34, 51, 68, 85)), 5)
+        self.assertIsNone(self.index.get((1000, 0, 17, 34, 51, 68)))
+        self.assertNotIn((70000, 0, 0, 0, 0, 0, 0), self.index)
+
+    def test_get_next(self):
+        # prefixes, out of range components and longer sub-ids walk like the tuples
+        for sub_id in [(), (10,), (10, 255), (10, 256), (999,), (1000, 0, 17, 34, 51, 68, 1, 4), (70000,), (1001,)]:
+            self.assertEqual(self.index.get_next(sub_id), self.snapshot.get_next(sub_id), sub_id)
+            self.assertEqual(self.index.get_next_many(sub_id, 2), self.snapshot.get_next_many(sub_id, 2), sub_id)
+
+    def test_set_remove(self):
+        self.assertFalse(self.index.set((10, 255, 0, 0, 0, 0, 1), 7))
+        self.assertTrue(self.index.set((10, 255, 0, 0, 0, 0, 1), 8))
+        self.assertTrue(self.index.set((20, 0, 0, 0, 0, 0, 0), 1))
+        self.assertTrue(self.index.remove((1000, 0, 17, 34, 51, 68, 1)))
+        self.assertFalse(self.index.remove((1000, 0, 17, 34, 51, 68, 1)))
+
+        # the edits are pending until merged
+        self.assertEqual(len(self.index.values), 3)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.get((20, 0, 0, 0, 0, 0, 0)), 1)
+        self.assertNotIn((1000, 0, 17, 34, 51, 68, 1), self.index)
+
+        self.assertEqual(self.index.keys, ((10, 255, 0, 0, 0, 0, 1), (20, 0, 0, 0, 0, 0, 0), (1000, 0, 17, 34, 51, 68, 85)))
+        self.assertEqual(list(self.index.values), [8, 1, 5])
+        self.assertEqual(self.index.pending, {})
+
+    def test_replace_values(self):
+        columns = self.index.columns
+        values = self.index.values
+        self.index.set((10, 255, 0, 0, 0, 0, 1), 8)
+        self.index.merge()
+
+        # the keys are kept, the values are not edited in place
+        self.assertIs(self.index.columns, columns)
+        self.assertIsNot(self.index.values, values)
+        self.assertEqual(list(values), [7, 3, 5])
+        self.assertEqual(list(self.index.values), [8, 3, 5])
+
+    def test_wide_keys(self):
+        # 13 bytes keys span two words
+        index = PackedMIBIndex((1,) * 13, 'B')
+        rows = {}
+        rng = random.Random(4)
+        for _ in range(500):
+            sub_id = tuple(rng.choice((0, 1, 255)) for _ in range(13))
+            if rng.random() < 0.3:
+                self.assertEqual(index.remove(sub_id), sub_id in rows)
+                rows.pop(sub_id, None)
+            else:
+                index.set(sub_id, 1)
+                rows[sub_id] = 1
+            if rng.random() < 0.1:
+                index.merge()
+        self.assertEqual(index.remove_prefix((0, 1)), len([sub_id for sub_id in rows if sub_id[:2] == (0, 1)]))
+        rows = {sub_id: value for sub_id, value in rows.items() if sub_id[:2] != (0, 1)}
+
+        snapshot = MIBSnapshot(rows)
+        self.assertEqual(len(index), len(rows))
+        self.assertEqual(index.keys, snapshot.keys)
+        for sub_id in [(), (0,), (0, 1), (1, 255, 256), snapshot.keys[0], snapshot.keys[-1] + (1,)]:
+            self.assertEqual(index.get_next_many(sub_id, 3), snapshot.get_next_many(sub_id, 3), sub_id)
+
+    def test_remove_prefix(self):
+        self.assertEqual(self.index.remove_prefix((1000, 0, 17)), 2)
+        self.assertEqual(self.index.remove_prefix((10, 256)), 0)
+        self.assertEqual(self.index.keys, ((10, 255, 0, 0, 0, 0, 1),))
+        self.assertEqual(self.index.nbytes, self.index.row_size)
+
+    def test_publish(self):
+        table = PackedSnapshotBuffer((4, 1, 1, 1, 1), 'Q')
+        table.index.set((1, 10, 0, 0, 1), 0x001122334455)
+        table.publish()
+        snapshot = table.snapshot
+        # editing the index doesn't touch the published snapshot
+        table.index.remove((1, 10, 0, 0, 1))
+        table.index.set((1, 10, 0, 0, 2), 1)
+        table.index.merge()
+        self.assertEqual(table.generation, 1)
+        self.assertEqual(snapshot.get((1, 10, 0, 0, 1)), 0x001122334455)
+        self.assertEqual(snapshot.keys, ((1, 10, 0, 0, 1),))
+
+        copy = pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.generation, 1)
+        self.assertEqual(copy.snapshot.keys, ((1, 10, 0, 0, 1),))
+        self.assertEqual(len(copy.index), 0)
+
+        # the published snapshot shares the arrays of the index
+        table.publish()
+        self.assertIs(table.snapshot.values, table.index.values)
+        self.assertEqual(table.snapshot.keys, ((1, 10, 0, 0, 2),))
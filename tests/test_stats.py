@@ -0,0 +1,136 @@
+import asyncio
+from unittest import TestCase
+
+import ax_interface
+from ax_interface.constants import PduTypes, ValueType
+from ax_interface.encodings import ObjectIdentifier
+from ax_interface.pdu import PDUHeader
+from ax_interface.pdu_implementations import GetPDU, GetNextPDU
+from ax_interface.protocol import AgentX
+from ax_interface.stats import LatencyHistogram, UpdaterTelemetry, STATS_DISABLED, STATS_BASIC, STATS_DETAILED
+
+
+class SysMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.2.1.1'):
+    sysDescr = ax_interface.MIBEntry('1.0', ValueType.OCTET_STRING, lambda: 'SONiC')
+
+
+class FakeTransport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+
+class TestLatencyHistogram(TestCase):
+
+    def test_bucket_bounds(self):
+        for value in list(range(0, 100)) + [1000, 12345, 999999, 10 ** 9 + 7]:
+            index = LatencyHistogram.bucket_index(value)
+            upper = LatencyHistogram.bucket_upper_bound(index)
+            self.assertLessEqual(value, upper)
+            # within 1/16th
+            self.assertLessEqual(upper - value, value / 16)
+            if index:
+                self.assertLess(LatencyHistogram.bucket_upper_bound(index - 1), value)
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        for value in range(1, 1001):
+            histogram.record(value * 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.min, 1000)
+        self.assertEqual(histogram.max, 1000000)
+        self.assertAlmostEqual(histogram.percentile(50), 500000, delta=500000 / 16)
+        self.assertAlmostEqual(histogram.percentile(99), 990000, delta=990000 / 16)
+        self.assertEqual(histogram.percentile(100), 1000000)
+
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 1000)
+        self.assertAlmostEqual(summary['mean_us'], 500.5)
+        self.assertIn('p99.9_us', summary)
+
+
+class TestAgentStats(TestCase):
+    SYS_DESCR = ObjectIdentifier(4, 2, 0, 0, (1, 1, 1, 0))
+
+    def make_agent(self, stats_level):
+        agent = ax_interface.Agent(SysMIB, False, 5, asyncio.new_event_loop(), stats_level=stats_level)
+        protocol = AgentX(agent.mib_table, None)
+        protocol.connection_made(FakeTransport())
+        return agent, protocol
+
+    def test_basic(self):
+        agent, protocol = self.make_agent(STATS_BASIC)
+        for _ in range(3):
+            protocol.data_received(GetPDU(header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 1, 0),
+                                          oids=[self.SYS_DESCR]).encode())
+        protocol.data_received(GetNextPDU(header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 2, 0),
+                                          oids=[self.SYS_DESCR, self.SYS_DESCR]).encode())
+
+        stats = agent.get_stats()
+        self.assertEqual(stats['pdus']['GET']['latency']['count'], 3)
+        self.assertEqual(stats['pdus']['GET']['varbinds'], 3)
+        self.assertEqual(stats['pdus']['GET']['decode']['count'], 3)
+        self.assertEqual(stats['pdus']['GET_NEXT']['varbinds'], 2)
+        # no per prefix timing unless detailed
+        self.assertEqual(stats['prefixes'], {})
+
+        agent.reset_stats()
+        self.assertEqual(agent.get_stats(), {'pdus': {}, 'prefixes': {}})
+
+    def test_detailed(self):
+        agent, protocol = self.make_agent(STATS_DETAILED)
+        protocol.data_received(GetPDU(header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 1, 0),
+                                      oids=[self.SYS_DESCR, ObjectIdentifier(4, 2, 0, 0, (9, 9, 9, 9))]).encode())
+
+        prefixes = agent.get_stats()['prefixes']
+        self.assertEqual(prefixes['.1.3.6.1.2.1.1.1.0']['count'], 1)
+        # the lookup outside of every registered prefix
+        self.assertEqual(prefixes[None]['count'], 1)
+
+    def test_disabled(self):
+        agent, protocol = self.make_agent(STATS_DISABLED)
+        protocol.data_received(GetPDU(header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 1, 0),
+                                      oids=[self.SYS_DESCR]).encode())
+        self.assertEqual(len(protocol.transport.writes), 1)
+        self.assertEqual(agent.get_stats(), {'pdus': {}, 'prefixes': {}})
+
+
+class FlakyUpdater(ax_interface.MIBUpdater):
+    def __init__(self):
+        super().__init__()
+        self.fail = False
+
+    def update_data(self):
+        if self.fail:
+            raise ValueError('flaky')
+
+
+class TestUpdaterTelemetry(TestCase):
+
+    def test_record_cycle(self):
+        telemetry = UpdaterTelemetry()
+        self.assertIsNone(telemetry.snapshot_age())
+        telemetry.record_cycle(1.0, True)
+        telemetry.record_cycle(2.0, False)
+        self.assertEqual(telemetry.update_count, 1)
+        self.assertEqual(telemetry.exception_count, 1)
+        self.assertEqual(telemetry.last_duration, 2.0)
+        self.assertAlmostEqual(telemetry.average_duration, 1.2)
+        self.assertGreaterEqual(telemetry.snapshot_age(), 0)
+
+    def test_update_cycle(self):
+        updater = FlakyUpdater()
+        updater._update_cycle(False)
+        updater._update_cycle(False)
+        updater.fail = True
+        updater._update_cycle(False)
+
+        telemetry = updater.telemetry
+        # the first cycle reinitializes
+        self.assertEqual(telemetry.reinit_count, 1)
+        self.assertEqual(telemetry.update_count, 2)
+        self.assertEqual(telemetry.exception_count, 1)
+        self.assertIsNotNone(telemetry.last_update_time)
@@ -0,0 +1,107 @@
+import asyncio
+from unittest import TestCase
+
+import ax_interface
+from ax_interface import ValueType
+from ax_interface.constants import PduTypes
+from ax_interface.encodings import ObjectIdentifier
+from ax_interface.mib import MIBTable
+from ax_interface.pdu import PDUHeader
+from ax_interface.pdu_implementations import GetPDU, GetNextPDU
+from ax_interface.protocol import AgentX
+from ax_interface.stats import AgentStats, STATS_BASIC
+from sonic_ax_impl.mibs import telemetry
+
+TELEMETRY_PREFIX = (1, 3, 6, 1, 4, 1, 8072, 9999, 9999, 1)
+
+
+class SysMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.2.1.1'):
+    sysDescr = ax_interface.MIBEntry('1.0', ValueType.OCTET_STRING, lambda: 'SONiC')
+
+
+class DummyUpdater(ax_interface.MIBUpdater):
+    def update_data(self):
+        pass
+
+
+class DummyMIB(metaclass=ax_interface.mib.MIBMeta, prefix='.1.3.6.1.4.1.6027'):
+    updater = DummyUpdater()
+
+
+class TelemetryTestMIB(SysMIB, DummyMIB, telemetry.SonicSubagentTelemetryMIB):
+    pass
+
+
+class FakeTransport:
+    def write(self, data):
+        pass
+
+
+class TestSubagentTelemetry(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lut = MIBTable(TelemetryTestMIB)
+        cls.lut.stats = AgentStats(STATS_BASIC)
+        cls.lut.start_background_tasks(asyncio.Event())
+        # a GET request for the PDU table
+        protocol = AgentX(cls.lut, None)
+        protocol.connection_made(FakeTransport())
+        protocol.data_received(GetPDU(header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 1, 0),
+                                      oids=[ObjectIdentifier(4, 2, 0, 0, (1, 1, 1, 0))]).encode())
+        for updater in cls.lut.updater_instances:
+            updater._update_cycle(False)
+        # the telemetry of the cycles above
+        TelemetryTestMIB.telemetry_updater.update_data()
+
+    def get(self, sub_ids):
+        oid = ObjectIdentifier(len(TELEMETRY_PREFIX) + len(sub_ids), 0, 0, 0, TELEMETRY_PREFIX + sub_ids)
+        get_pdu = GetPDU(
+            header=PDUHeader(1, PduTypes.GET, 16, 0, 42, 0, 0, 0),
+            oids=[oid]
+        )
+        response = get_pdu.make_response(self.lut)
+        return response.values[0]
+
+    def test_updater_table(self):
+        # updaters are sorted by class name
+        value = self.get((1, 1, 1, 1))
+        self.assertEqual(value.type_, ValueType.OCTET_STRING)
+        self.assertEqual(str(value.data), 'DummyUpdater')
+        self.assertEqual(str(self.get((1, 1, 1, 2)).data), 'TelemetryUpdater')
+
+        value = self.get((1, 1, 8, 1))
+        self.assertEqual(value.type_, ValueType.COUNTER_32)
+        self.assertEqual(value.data, 1)
+
+        value = self.get((1, 1, 6, 1))
+        self.assertEqual(value.data, 0)
+
+        value = self.get((1, 1, 7, 1))
+        self.assertEqual(value.type_, ValueType.GAUGE_32)
+        self.assertLessEqual(value.data, 1)
+
+    def test_pdu_table(self):
+        value = self.get((2, 1, 1, int(PduTypes.GET)))
+        self.assertEqual(str(value.data), 'GET')
+
+        value = self.get((2, 1, 2, int(PduTypes.GET)))
+        self.assertEqual(value.type_, ValueType.COUNTER_64)
+        self.assertEqual(value.data, 1)
+
+        value = self.get((2, 1, 3, int(PduTypes.GET)))
+        self.assertEqual(value.data, 1)
+
+    def test_walk(self):
+        oid = ObjectIdentifier(len(TELEMETRY_PREFIX) + 3, 0, 0, 0, TELEMETRY_PREFIX + (1, 1, 1))
+        get_pdu = GetNextPDU(
+            header=PDUHeader(1, PduTypes.GET_NEXT, 16, 0, 42, 0, 0, 0),
+            oids=[oid]
+        )
+        response = get_pdu.make_response(self.lut)
+        value = response.values[0]
+        self.assertEqual(str(value.name), '.' + '.'.join(str(sub_id) for sub_id in TELEMETRY_PREFIX) + '.1.1.1.1')
+        self.assertEqual(str(value.data), 'DummyUpdater')
+
+    def test_unknown_row(self):
+        value = self.get((1, 1, 1, 99))
+        self.assertEqual(value.type_, ValueType.NO_SUCH_INSTANCE)